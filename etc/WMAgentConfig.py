@@ -92,6 +92,7 @@ config.Agent.agentNumber = agentNumber
 config.Agent.useMsgService = False
 config.Agent.useTrigger = False
 config.Agent.useHeartbeat = True
+config.Agent.daoStatistics = False
 
 config.section_("General")
 config.General.workDir = workDirectory
@@ -104,6 +105,8 @@ config.JobStateMachine.couchurl = couchURL
 config.JobStateMachine.couchDBName = jobDumpDBName
 config.JobStateMachine.jobSummaryDBName = jobSummaryDBName
 config.JobStateMachine.summaryStatsDBName = summaryStatsDBName
+config.JobStateMachine.bulkStateTransition = False
+config.JobStateMachine.stateTransitionBatchSize = 500
 
 config.section_("ACDC")
 config.ACDC.couchurl = "https://cmsweb.cern.ch/couchdb"
@@ -182,6 +185,7 @@ config.JobAccountant.logLevel = globalLogLevel
 config.JobAccountant.workerThreads = 1
 config.JobAccountant.pollInterval = 60
 config.JobAccountant.specDir = config.General.workDir + "/JobAccountant/SpecCache"
+config.JobAccountant.reportLoaderProcesses = 0
 
 config.component_("JobCreator")
 config.JobCreator.namespace = "WMComponent.JobCreator.JobCreator"
@@ -196,6 +200,7 @@ config.JobCreator.pollInterval = 120
 config.JobCreator.jobCacheDir = config.General.workDir + "/JobCache"
 config.JobCreator.defaultJobType = "Processing"
 config.JobCreator.workerThreads = 1
+config.JobCreator.useJobStore = True
 # glidein restrictions used for resource estimation (per core)
 config.JobCreator.GlideInRestriction = {"MinWallTimeSecs": 1 * 60 * 60, "MaxWallTimeSecs": 45 * 60 * 60,   # pilot lifetime is usually 48h
                                         "MinRequestDiskKB": 1 * 1024 * 1024, "MaxRequestDiskKB": 20 * 1024 * 1024} # site limit is ~27GB
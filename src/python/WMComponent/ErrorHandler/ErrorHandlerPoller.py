@@ -217,7 +217,7 @@ class ErrorHandlerPoller(BaseWorkerThread):
                 cooloffJobs.append(job)
                 continue
             try:
-                report.load(reportPath)
+                report.load(reportPath, sections=["errors"])
                 # First let's check the time conditions
                 times = report.getFirstStartLastStop()
                 startTime = None
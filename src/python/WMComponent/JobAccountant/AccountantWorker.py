@@ -18,8 +18,10 @@ import threading
 import logging
 import gc
 import collections
+import itertools
 
 from WMCore.FwkJobReport.Report  import Report
+from WMCore.Configuration        import ConfigSection
 from WMCore.DAOFactory           import DAOFactory
 from WMCore.WMConnectionBase     import WMConnectionBase
 from WMCore.WMException          import WMException
@@ -45,16 +47,218 @@ class AccountantWorkerException(WMException):
     """
 
 
+def createMissingFWKJR(errorCode = 999, errorDescription = 'Failure of unknown type'):
+    """
+    _createMissingFWKJR_
+
+    Create a failure FWJR for a job whose report can't be used.
+    """
+    report = Report()
+    report.addError("cmsRun1", 84, errorCode, errorDescription)
+    report.data.cmsRun1.status = "Failed"
+    return report
+
+def readJobReport(parameters):
+    """
+    _readJobReport_
+
+    Given a framework job report on disk, load it and return a
+    FwkJobReport instance.  If there is any problem loading or parsing the
+    framework job report return a failure report instead.
+    """
+    return _readJobReport(parameters)[0]
+
+def _readJobReport(parameters):
+    """
+    _readJobReport_
+
+    Return the job report and whether it had to be replaced by a failure
+    report.
+    """
+    # The jobReportPath may be prefixed with "file://" which needs to be
+    # removed so it doesn't confuse the FwkJobReport() parser.
+    jobReportPath = parameters.get("fwjr_path", None)
+    if not jobReportPath:
+        logging.error("Bad FwkJobReport Path: %s" % jobReportPath)
+        return createMissingFWKJR(99999, "FWJR path is empty"), True
+
+    jobReportPath = jobReportPath.replace("file://","")
+    if not os.path.exists(jobReportPath):
+        logging.error("Bad FwkJobReport Path: %s" % jobReportPath)
+        return createMissingFWKJR(99999, 'Cannot find file in jobReport path: %s' % jobReportPath), True
+
+    if os.path.getsize(jobReportPath) == 0:
+        logging.error("Empty FwkJobReport: %s" % jobReportPath)
+        return createMissingFWKJR(99998, 'jobReport of size 0: %s ' % jobReportPath), True
+
+    jobReport = Report()
+
+    try:
+        jobReport.load(jobReportPath)
+    except Exception as ex:
+        msg =  "Error loading jobReport %s\n" % jobReportPath
+        msg += str(ex)
+        logging.error(msg)
+        logging.debug("Failing job: %s\n" % parameters)
+        return createMissingFWKJR(99997, 'Cannot load jobReport'), True
+
+    if len(jobReport.listSteps()) == 0:
+        logging.error("FwkJobReport with no steps: %s" % jobReportPath)
+        return createMissingFWKJR(99997, 'jobReport with no steps: %s ' % jobReportPath), True
+
+    return jobReport, False
+
+def preloadJobReport(parameters):
+    """
+    _preloadJobReport_
+
+    Run in the report loader processes: load the report of a job and extract
+    everything the worker needs from it, the outcome, the output files, the
+    number of cmsRun steps, the skipped files and the payload of the FWJR
+    couch document, so that the worker never has to load the report itself.
+    A report that couldn't be loaded is replaced by a failure report first.
+
+    The file references of the output files are replaced by their (step,
+    output module, file number) so they can be found in the payload, and
+    any other report sections in the files by plain dictionaries.
+    """
+    jobReport, _ = _readJobReport(parameters)
+
+    allFiles = []
+    for step in jobReport.listSteps():
+        stepReport = jobReport.retrieveStep(step)
+        for outputModule in getattr(stepReport, 'outputModules', None) or []:
+            files = jobReport.getFilesFromOutputModule(step = step, outputModule = outputModule)
+            for n, fwjrFile in enumerate(files):
+                fwjrFile["fileRef"] = (step, outputModule, n)
+                # sections would drag the whole report along when pickled
+                for key, value in fwjrFile.items():
+                    if isinstance(value, ConfigSection):
+                        fwjrFile[key] = value.dictionary_()
+            allFiles.extend(files)
+
+    summary = {"fwjr": jobReport.__to_json__(None),
+               "steps": list(jobReport.listSteps()),
+               "siteName": jobReport.getSiteName(),
+               "exitCode": jobReport.getExitCode(),
+               "jobSuccess": jobReport.taskSuccessful(),
+               "allFiles": allFiles,
+               "logArchFiles": [x for x in allFiles if x["fileRef"][0] == 'logArch1'],
+               "cmsRunSteps": len([x for x in jobReport.listSteps() if x.startswith("cmsRun")]),
+               "skippedFiles": jobReport.getAllSkippedFiles()}
+    return summary
+
+class PreloadedReport(object):
+    """
+    _PreloadedReport_
+
+    Stands in for the Report of a job summarized by preloadJobReport.  It
+    provides the Report methods the worker and ChangeState use on a job
+    report, working on the FWJR couch document payload and the output files
+    of the summary.
+    """
+    def __init__(self, summary):
+        self.json = summary["fwjr"]
+        self.steps = summary["steps"]
+        self.siteName = summary["siteName"]
+        self.exitCode = summary["exitCode"]
+        self.allFiles = summary["allFiles"]
+        self.jobID = None
+
+    def __to_json__(self, thunker):
+        return self.json
+
+    def setJobID(self, jobID):
+        self.jobID = jobID
+
+    def getJobID(self):
+        return self.jobID
+
+    def setTaskName(self, taskName):
+        self.json["task"] = taskName
+
+    def getTaskName(self):
+        return self.json["task"]
+
+    def listSteps(self):
+        return self.steps
+
+    def getSiteName(self):
+        return self.siteName
+
+    def getExitCode(self):
+        return self.exitCode
+
+    def save(self, filename):
+        """
+        _save_
+
+        Only used to write back a recovered task name, the report on disk is
+        loaded for that.
+        """
+        jobReport = Report()
+        jobReport.load(filename)
+        jobReport.setTaskName(self.getTaskName())
+        jobReport.save(filename)
+        return
+
+    def _outputFile(self, fileRef):
+        step, outputModule, n = fileRef
+        return self.json["steps"][step]["output"][outputModule][n]
+
+    def setFileMerged(self, fileRef):
+        self._outputFile(fileRef)["merged"] = True
+
+    def mapLocations(self, mapper):
+        """
+        _mapLocations_
+
+        Replace the location of every output file by mapper(location)
+        """
+        for step in self.steps:
+            for files in self.json["steps"][step]["output"].values():
+                for jsonFile in files:
+                    if "location" in jsonFile:
+                        jsonFile["location"] = mapper(jsonFile["location"])
+        return
+
+    def getAllFilesFromStep(self, step):
+        listOfFiles = []
+        for fwjrFile in self.allFiles:
+            if fwjrFile["fileRef"][0] == step:
+                location = self._outputFile(fwjrFile["fileRef"]).get("location", None)
+                fwjrFile = dict(fwjrFile, locations = set(fwjrFile.makelist(location)))
+                listOfFiles.append(fwjrFile)
+        return listOfFiles
+
+    def getAllInputFiles(self):
+        listOfFiles = []
+        for step in self.steps:
+            for files in self.json["steps"][step]["input"].values():
+                for jsonFile in files:
+                    listOfFiles.append(dict(jsonFile, lfn = jsonFile.get("lfn", None),
+                                            input_type = jsonFile.get("input_type", None)))
+        return listOfFiles
+
+    def stripInputFiles(self):
+        for step in self.steps:
+            inputSources = self.json["steps"][step]["input"]
+            for inputSource in inputSources:
+                inputSources[inputSource] = []
+        return
+
+
 class AccountantWorker(WMConnectionBase):
     """
     Class that actually does the work of parsing FWJRs for the Accountant
     Run through ProcessPool
     """
-    def __init__(self, config):
+    def __init__(self, config, reportPool = None):
         """
         __init__
 
-        Create all DAO objects that are used by this class.
+        Create all DAO objects that are used by this class.  If reportPool
+        is a multiprocessing pool the job reports are preloaded in it.
         """
         WMConnectionBase.__init__(self, "WMCore.WMBS")
         myThread = threading.currentThread()
@@ -95,6 +299,11 @@ class AccountantWorker(WMConnectionBase):
 
         self.stateChanger = ChangeState(config)
 
+        # Processes loading the job reports, created by the poller before
+        # any thread starts, None loads them in this process
+        self.reportPool = reportPool
+        self.reportLoaderProcesses = getattr(config.JobAccountant, 'reportLoaderProcesses', 0)
+
         # Decide whether or not to attach jobReport to returned value
         self.returnJobReport = getattr(config.JobAccountant, 'returnReportFromWorker', False)
 
@@ -167,38 +376,24 @@ class AccountantWorker(WMConnectionBase):
         FwkJobReport instance.  If there is any problem loading or parsing the
         framework job report return None.
         """
-        # The jobReportPath may be prefixed with "file://" which needs to be
-        # removed so it doesn't confuse the FwkJobReport() parser.
-        jobReportPath = parameters.get("fwjr_path", None)
-        if not jobReportPath:
-            logging.error("Bad FwkJobReport Path: %s" % jobReportPath)
-            return self.createMissingFWKJR(parameters, 99999, "FWJR path is empty")
-
-        jobReportPath = jobReportPath.replace("file://","")
-        if not os.path.exists(jobReportPath):
-            logging.error("Bad FwkJobReport Path: %s" % jobReportPath)
-            return self.createMissingFWKJR(parameters, 99999, 'Cannot find file in jobReport path: %s' % jobReportPath)
+        return readJobReport(parameters)
 
-        if os.path.getsize(jobReportPath) == 0:
-            logging.error("Empty FwkJobReport: %s" % jobReportPath)
-            return self.createMissingFWKJR(parameters, 99998, 'jobReport of size 0: %s ' % jobReportPath)
-
-        jobReport = Report()
-
-        try:
-            jobReport.load(jobReportPath)
-        except Exception as ex:
-            msg =  "Error loading jobReport %s\n" % jobReportPath
-            msg += str(ex)
-            logging.error(msg)
-            logging.debug("Failing job: %s\n" % parameters)
-            return self.createMissingFWKJR(parameters, 99997, 'Cannot load jobReport')
+    def preloadJobReports(self, parameters):
+        """
+        _preloadJobReports_
 
-        if len(jobReport.listSteps()) == 0:
-            logging.error("FwkJobReport with no steps: %s" % jobReportPath)
-            return self.createMissingFWKJR(parameters, 99997, 'jobReport with no steps: %s ' % jobReportPath)
+        Return an iterator over (jobReport, summary) for the jobs, in order.
+        With a report pool the reports are loaded and summarized by
+        preloadJobReport in the pool while the previous jobs are being
+        handled here, and jobReport is a PreloadedReport.  Otherwise the
+        reports are loaded as they are needed and summary is None.
+        """
+        if self.reportPool is None:
+            return ((self.loadJobReport(job), None) for job in parameters)
 
-        return jobReport
+        chunkSize = max(1, len(parameters) // (4 * max(self.reportLoaderProcesses, 1)))
+        summaries = self.reportPool.imap(preloadJobReport, parameters, chunkSize)
+        return ((PreloadedReport(summary), summary) for summary in summaries)
 
     def isTaskExistInFWJR(self, jobReport, jobStatus):
         """
@@ -234,15 +429,16 @@ class AccountantWorker(WMConnectionBase):
         returnList = []
         self.reset()
 
-        for job in parameters:
+        jobReports = self.preloadJobReports(parameters)
+        for job, (fwkJobReport, summary) in itertools.izip(parameters, jobReports):
             logging.info("Handling %s" % job["fwjr_path"])
 
-            # Load the job and set the ID
-            fwkJobReport = self.loadJobReport(job)
+            # Set the ID on the loaded job report
             fwkJobReport.setJobID(job['id'])
-            
+
             jobSuccess = self.handleJob(jobID = job["id"],
-                                        fwkJobReport = fwkJobReport)
+                                        fwkJobReport = fwkJobReport,
+                                        summary = summary)
 
             if self.returnJobReport:
                 returnList.append({'id': job["id"], 'jobSuccess': jobSuccess,
@@ -419,11 +615,12 @@ class AccountantWorker(WMConnectionBase):
 
         return newParents
 
-    def addFileToWMBS(self, jobType, fwjrFile, jobMask, task, jobID = None):
+    def addFileToWMBS(self, jobType, fwjrFile, jobMask, task, jobID = None, fwkJobReport = None):
         """
         _addFileToWMBS_
 
-        Add a file that was produced in a job to WMBS.
+        Add a file that was produced in a job to WMBS.  The file reference of
+        a file preloaded by preloadJobReport is marked merged in fwkJobReport.
         """
         fwjrFile["first_event"] = jobMask["FirstEvent"]
 
@@ -431,7 +628,11 @@ class AccountantWorker(WMConnectionBase):
             fwjrFile["first_event"] = 0
 
         if jobType == "Merge" and fwjrFile["module_label"] != "logArchive":
-            setattr(fwjrFile["fileRef"], 'merged', True)
+            fileRef = fwjrFile["fileRef"]
+            if isinstance(fileRef, tuple):
+                fwkJobReport.setFileMerged(fileRef)
+            else:
+                setattr(fileRef, 'merged', True)
             fwjrFile["merged"] = True
 
         wmbsFile = self.createFileFromDataStructsFile(file = fwjrFile, jobID = jobID)
@@ -449,20 +650,32 @@ class AccountantWorker(WMConnectionBase):
 
 
     def _mapLocation(self, fwkJobReport):
+        if isinstance(fwkJobReport, PreloadedReport):
+            fwkJobReport.mapLocations(lambda location: self.phedex.getBestNodeName(location, self.locLists))
+            return
         for file in fwkJobReport.getAllFileRefs():
             if file and hasattr(file, 'location'):
                 file.location = self.phedex.getBestNodeName(file.location, self.locLists)
 
 
-    def handleJob(self, jobID, fwkJobReport):
+    def handleJob(self, jobID, fwkJobReport, summary = None):
         """
         _handleJob_
 
         Figure out if a job was successful or not, handle it appropriately
         (parse FWJR, update WMBS) and return the success status as a boolean
 
+        summary optionally holds what preloadJobReport extracted from the
+        report in a report loader process.
         """
-        jobSuccess = fwkJobReport.taskSuccessful()
+        if summary is None:
+            jobSuccess = fwkJobReport.taskSuccessful()
+            allFiles = None
+            logArchFiles = fwkJobReport.getAllFilesFromStep(step = 'logArch1')
+        else:
+            jobSuccess = summary["jobSuccess"]
+            allFiles = summary["allFiles"]
+            logArchFiles = summary["logArchFiles"]
 
         outputMap = self.getOutputMapAction.execute(jobID = jobID,
                                                     conn = self.getDBConn(),
@@ -473,7 +686,9 @@ class AccountantWorker(WMConnectionBase):
                                                 transaction = self.existingTransaction())
 
         if jobSuccess:
-            fileList = fwkJobReport.getAllFiles()
+            fileList = allFiles
+            if fileList is None:
+                fileList = fwkJobReport.getAllFiles()
 
             # consistency check comparing outputMap to fileList
             # they should match except for some limited special cases
@@ -493,10 +708,13 @@ class AccountantWorker(WMConnectionBase):
             else:
                 failJob = True
                 if jobType in [ "Processing", "Production" ]:
-                    cmsRunSteps = 0
-                    for step in fwkJobReport.listSteps():
-                        if step.startswith("cmsRun"):
-                            cmsRunSteps += 1
+                    if summary is None:
+                        cmsRunSteps = 0
+                        for step in fwkJobReport.listSteps():
+                            if step.startswith("cmsRun"):
+                                cmsRunSteps += 1
+                    else:
+                        cmsRunSteps = summary["cmsRunSteps"]
                     if cmsRunSteps > 1:
                         failJob = False
 
@@ -505,11 +723,11 @@ class AccountantWorker(WMConnectionBase):
                     logging.error("Job %d , list of expected outputModules does not match job report, failing job", jobID)
                     logging.debug("Job %d , expected outputModules %s", jobID, sorted(outputMap.keys()))
                     logging.debug("Job %d , fwjr outputModules %s", jobID, sorted(outputModules))
-                    fileList = fwkJobReport.getAllFilesFromStep(step = 'logArch1')
+                    fileList = logArchFiles
                 else:
                     logging.debug("Job %d , list of expected outputModules does not match job report, accepted for multi-step CMSSW job", jobID)
         else:
-            fileList = fwkJobReport.getAllFilesFromStep(step = 'logArch1')
+            fileList = logArchFiles
 
         if jobSuccess:
             logging.info("Job %d , handle successful job", jobID)
@@ -555,7 +773,8 @@ class AccountantWorker(WMConnectionBase):
                 logging.debug("Job %d , register output %s", jobID, fwjrFile["lfn"])
 
                 wmbsFile = self.addFileToWMBS(jobType, fwjrFile, wmbsJob["mask"],
-                                              jobID = jobID, task = fwkJobReport.getTaskName())
+                                              jobID = jobID, task = fwkJobReport.getTaskName(),
+                                              fwkJobReport = fwkJobReport)
                 merged = fwjrFile['merged']
                 moduleLabel = fwjrFile["module_label"]
 
@@ -578,7 +797,10 @@ class AccountantWorker(WMConnectionBase):
             # Check if the job had any skipped files, put them in ACDC containers
             # We assume full file processing (no job masks)
             if jobSuccess:
-                skippedFiles = fwkJobReport.getAllSkippedFiles()
+                if summary is None:
+                    skippedFiles = fwkJobReport.getAllSkippedFiles()
+                else:
+                    skippedFiles = summary["skippedFiles"]
                 if skippedFiles:
                     self.jobsWithSkippedFiles[jobID] = skippedFiles
 
@@ -636,10 +858,7 @@ class AccountantWorker(WMConnectionBase):
         Create a missing FWJR if the report can't be found by the code in the
         path location.
         """
-        report = Report()
-        report.addError("cmsRun1", 84, errorCode, errorDescription)
-        report.data.cmsRun1.status = "Failed"
-        return report
+        return createMissingFWKJR(errorCode, errorDescription)
 
     def createFilesInDBSBuffer(self):
         """
@@ -8,6 +8,7 @@ Poll WMBS for complete jobs and process their framework job reports.
 import time
 import threading
 import logging
+import multiprocessing
 
 from WMCore.WorkerThreads.BaseWorkerThread import BaseWorkerThread
 from WMCore.Agent.Harness import Harness
@@ -33,6 +34,12 @@ class JobAccountantPoller(BaseWorkerThread):
         #    self.sendAlert will be then be available
         self.initAlerts(compName = "JobAccountant")
 
+        # Fork the report loader processes now, before the worker threads start
+        self.reportPool = None
+        reportLoaderProcesses = getattr(self.config.JobAccountant, 'reportLoaderProcesses', 0)
+        if reportLoaderProcesses > 0:
+            self.reportPool = multiprocessing.Pool(processes = reportLoaderProcesses)
+
         return
 
     def setup(self, parameters = None):
@@ -44,7 +51,8 @@ class JobAccountantPoller(BaseWorkerThread):
         """
         #self.accountantWorker = AccountantWorker(couchURL = self.config.JobStateMachine.couchurl,
         #                                         couchDBName = self.config.JobStateMachine.couchDBName)
-        self.accountantWorker = AccountantWorker(config = self.config)
+        self.accountantWorker = AccountantWorker(config = self.config,
+                                                 reportPool = self.reportPool)
 
         myThread = threading.currentThread()
         daoFactory = DAOFactory(package = "WMCore.WMBS", logger = myThread.logger,
@@ -66,6 +74,8 @@ class JobAccountantPoller(BaseWorkerThread):
             logging.debug("No work to do; exiting")
             return
 
+        nJobs = len(completeJobs)
+        startTime = time.time()
         while len(completeJobs) > 0:
             try:
                 jobsSlice = completeJobs[:self.accountantWorkSize]
@@ -87,4 +97,19 @@ class JobAccountantPoller(BaseWorkerThread):
                 self.sendAlert(6, msg = msg)
                 raise JobAccountantPollerException(msg)
 
+        elapsedTime = max(time.time() - startTime, 1e-6)
+        logging.info("Processed %d jobs in %.1f seconds (%.1f jobs/s)" % (nJobs, elapsedTime,
+                                                                        nJobs / elapsedTime))
+        return
+
+    def terminate(self, parameters = None):
+        """
+        _terminate_
+
+        Stop the report loader processes.
+        """
+        if self.reportPool is not None:
+            self.reportPool.terminate()
+            self.reportPool.join()
+            self.reportPool = None
         return
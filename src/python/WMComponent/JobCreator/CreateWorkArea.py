@@ -90,7 +90,7 @@ def getMasterName(startDir, wmWorkload = None, workflow = None):
         raise CreateWorkAreaException(msg)
     else:
         wmWorkload = WMWorkloadHelper(WMWorkload("workload"))
-        wmWorkload.load(workflow.spec)
+        wmWorkload.load(workflow.spec, cache = True)
 
         workload = wmWorkload.name()
 
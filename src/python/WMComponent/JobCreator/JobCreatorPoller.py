@@ -23,14 +23,17 @@ from WMCore.JobSplitting.SplitterFactory    import SplitterFactory
 from WMCore.WMBS.Subscription               import Subscription
 from WMCore.WMBS.Workflow                   import Workflow
 from WMCore.WMSpec.WMWorkload               import WMWorkload, WMWorkloadHelper
+from WMCore.WMSpec.Persistency              import specCache
 from WMCore.FwkJobReport.Report             import Report
+from WMCore.DataStructs.JobStore            import JobStore
 
 
 def retrieveWMSpec(workflow = None, wmWorkloadURL = None):
     """
     _retrieveWMSpec_
 
-    Given a subscription, this function loads the WMSpec associated with that workload
+    Given a subscription, this function loads the WMSpec associated with that workload.
+    The spec comes from the process wide spec cache and must not be modified.
     """
     if not wmWorkloadURL and workflow:
         wmWorkloadURL = workflow.spec
@@ -40,7 +43,7 @@ def retrieveWMSpec(workflow = None, wmWorkloadURL = None):
         return None
 
     wmWorkload = WMWorkloadHelper(WMWorkload("workload"))
-    wmWorkload.load(wmWorkloadURL)
+    wmWorkload.load(wmWorkloadURL, cache = True)
 
     return wmWorkload
 
@@ -119,11 +122,13 @@ def capResourceEstimates(jobGroups, nCores, constraints):
 def saveJob(job, workflow, sandbox, wmTask = None, jobNumber = 0,
             owner = None, ownerDN = None, ownerGroup = '', ownerRole = '',
             scramArch = None, swVersion = None, agentNumber = 0, numberOfCores = 1,
-            inputDataset = None, inputDatasetLocations = None, allowOpportunistic=False):
+            inputDataset = None, inputDatasetLocations = None, allowOpportunistic=False,
+            jobStore = None):
     """
     _saveJob_
 
-    Actually do the mechanics of saving the job to a pickle file
+    Actually do the mechanics of saving the job to a pickle file,
+    or queue it in the job store of its collection if one is given
     """
     if wmTask:
             # If we managed to load the task,
@@ -148,6 +153,10 @@ def saveJob(job, workflow, sandbox, wmTask = None, jobNumber = 0,
     job['inputDatasetLocations'] = inputDatasetLocations
     job['allowOpportunistic'] = allowOpportunistic
 
+    if jobStore is not None:
+        jobStore.addJob(job)
+        return
+
     output = open(os.path.join(cacheDir, 'job.pkl'), 'w')
     cPickle.dump(job, output, cPickle.HIGHEST_PROTOCOL)
     output.close()
@@ -156,11 +165,12 @@ def saveJob(job, workflow, sandbox, wmTask = None, jobNumber = 0,
     return
 
 
-def creatorProcess(work, jobCacheDir):
+def creatorProcess(work, jobCacheDir, useJobStore = True):
     """
     _creatorProcess_
 
-    Creator work areas and pickle job objects
+    Creator work areas and pickle job objects, either in one job store
+    per job collection or in a job.pkl per job
     """
     createWorkArea  = CreateWorkArea()
 
@@ -206,8 +216,15 @@ def creatorProcess(work, jobCacheDir):
                                    wmWorkload = wmWorkload,
                                    cache = False)
 
+        jobStores = {}
         for job in wmbsJobGroup.jobs:
             jobNumber += 1
+            jobStore = None
+            if useJobStore:
+                collectionDir = os.path.dirname(job.getCache())
+                if collectionDir not in jobStores:
+                    jobStores[collectionDir] = JobStore(collectionDir)
+                jobStore = jobStores[collectionDir]
             saveJob(job = job, workflow = workflow,
                     wmTask = wmTaskName,
                     jobNumber = jobNumber,
@@ -222,7 +239,11 @@ def creatorProcess(work, jobCacheDir):
                     numberOfCores = numberOfCores,
                     inputDataset = inputDataset,
                     inputDatasetLocations = inputDatasetLocations,
-                    allowOpportunistic = allowOpportunistic)
+                    allowOpportunistic = allowOpportunistic,
+                    jobStore = jobStore)
+
+        for jobStore in jobStores.values():
+            jobStore.save()
 
     except Exception as ex:
         # Register as failure; move on
@@ -377,6 +398,7 @@ class JobCreatorPoller(BaseWorkerThread):
         self.limit          = getattr(config.JobCreator, 'fileLoadLimit', 500)
         self.agentNumber    = int(getattr(config.Agent, 'agentNumber', 0))
         self.glideinLimits  = getattr(config.JobCreator, 'GlideInRestriction', None)
+        self.useJobStore    = getattr(config.JobCreator, 'useJobStore', True)
 
         # initialize the alert framework (if available - config.Alert present)
         #    self.sendAlert will be then be available
@@ -422,6 +444,7 @@ class JobCreatorPoller(BaseWorkerThread):
         logging.debug("Running JSM.JobCreator")
         try:
             self.pollSubscriptions()
+            logging.info("Spec cache statistics: %s", specCache.statistics())
         except WMException:
             #self.close()
             myThread = threading.currentThread()
@@ -617,7 +640,8 @@ class JobCreatorPoller(BaseWorkerThread):
                     tempDict['allowOpportunistic'] = allowOpport
 
                     jobGroup = creatorProcess(work = tempDict,
-                                              jobCacheDir = self.jobCacheDir)
+                                              jobCacheDir = self.jobCacheDir,
+                                              useJobStore = self.useJobStore)
                     jobNumber += jobsInGroup
 
                     # Set jobCache for group
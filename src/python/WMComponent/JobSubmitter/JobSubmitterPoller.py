@@ -12,7 +12,6 @@ Submit jobs for execution.
 import logging
 import threading
 import os.path
-import cPickle
 
 from WMCore.DAOFactory        import DAOFactory
 from WMCore.WMExceptions      import WM_JOB_ERROR_CODES
@@ -21,6 +20,7 @@ from WMCore.JobStateMachine.ChangeState       import ChangeState
 from WMCore.WorkerThreads.BaseWorkerThread    import BaseWorkerThread
 from WMCore.ResourceControl.ResourceControl   import ResourceControl
 from WMCore.DataStructs.JobPackage            import JobPackage
+from WMCore.DataStructs.JobStore              import loadJob
 from WMCore.FwkJobReport.Report               import Report
 from WMCore.WMException                       import WMException
 from WMCore.BossAir.BossAirAPI                import BossAirAPI
@@ -268,6 +268,7 @@ class JobSubmitterPoller(BaseWorkerThread):
         
         logging.info("Determining possible sites for new jobs...")
         jobCount = 0
+        jobStores = {}
         for newJob in newJobs:
             jobID = newJob['id']
             dbJobs.add(jobID)
@@ -278,24 +279,22 @@ class JobSubmitterPoller(BaseWorkerThread):
             if jobCount % 5000 == 0:
                 logging.info("Processed %d/%d new jobs.", jobCount, len(newJobs))
 
-            pickledJobPath = os.path.join(newJob["cache_dir"], "job.pkl")
-
-            if not os.path.isfile(pickledJobPath):
-                # Then we have a problem - there's no file
-                logging.error("Could not find pickled jobObject %s", pickledJobPath)
-                badJobs[71103].append(newJob)
-                continue
             try:
-                jobHandle = open(pickledJobPath, "r")
-                loadedJob = cPickle.load(jobHandle)
-                jobHandle.close()
+                loadedJob = loadJob(newJob["cache_dir"], jobID, jobStores)
             except Exception as ex:
-                msg = "Error while loading pickled job object %s\n" % pickledJobPath
+                msg = "Error while loading pickled job object from %s\n" % newJob["cache_dir"]
                 msg += str(ex)
                 logging.error(msg)
                 self.sendAlert(6, msg=msg)
                 raise JobSubmitterPollerException(msg)
 
+            if loadedJob is None:
+                # Then we have a problem - the job isn't in the job store
+                # of its collection and there's no job.pkl either
+                logging.error("Could not find pickled jobObject for job %s in %s", jobID, newJob["cache_dir"])
+                badJobs[71103].append(newJob)
+                continue
+
             loadedJob['retry_count'] = newJob['retry_count']
 
             # figure out possible locations for job
@@ -401,6 +400,9 @@ class JobSubmitterPoller(BaseWorkerThread):
 
             self.jobDataCache[workflowName][jobID] = jobInfo
 
+        for jobStore in jobStores.values():
+            jobStore.close()
+
         # Register failures in submission
         for errorCode in badJobs:
             if badJobs[errorCode]:
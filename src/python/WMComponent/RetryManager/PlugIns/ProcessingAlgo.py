@@ -60,7 +60,7 @@ class ProcessingAlgo(RetryAlgoBase):
         try:
             report     = Report()
             reportPath = os.path.join(job['cache_dir'], "Report.%i.pkl" % job['retry_count'])
-            report.load(reportPath)
+            report.load(reportPath, sections=["errors"])
         except:
             # If we're here, then the FWJR doesn't exist.
             # Give up, run it again
@@ -33,6 +33,7 @@ from WMCore.BossAir.Plugins.gLitePlugin          import getDefaultDelegation
 from WMCore.Credential.Proxy                     import Proxy
 from WMComponent.JobCreator.CreateWorkArea       import getMasterName
 from WMComponent.JobCreator.JobCreatorPoller     import retrieveWMSpec
+from WMCore.WMSpec.Persistency                   import specCache
 from WMCore.Services.RequestManager.RequestManager import RequestManager
 from WMCore.Services.ReqMgr.ReqMgr               import ReqMgr
 from WMCore.Services.RequestDB.RequestDBWriter   import RequestDBWriter
@@ -264,6 +265,7 @@ class CleanCouchPoller(BaseWorkerThread):
             logging.info("Cleaning up wmsbs and disk")
             self.deleteWorkflowFromWMBSAndDisk()
             logging.info("Done: cleaning up wmsbs and disk")
+            logging.info("Spec cache statistics: %s", specCache.statistics())
             
         except Exception as ex:
             msg = traceback.format_exc()
@@ -35,6 +35,8 @@ config.WorkQueueManager.reqMgrConfig['teamName'] = 'Dodgers'
 config.WorkQueueManager.queueParams = {'LocationRefreshInterval': 10}
 # uncomment to change CacheDir from default
 #config.WorkQueueManager.queueParams['CacheDir'] = os.path.join(config.WorkQueueManager.componentDir, 'wf')
+# uncomment to build faster, gzip compressed, workflow sandboxes
+#config.WorkQueueManager.queueParams['SandboxOptions'] = {'compression': 'gz', 'compressLevel': 1}
 
 # Fill for local queue
 if config.WorkQueueManager.level != "GlobalQueue":
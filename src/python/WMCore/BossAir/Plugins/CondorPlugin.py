@@ -159,6 +159,21 @@ class CondorPlugin(BasePlugin):
 
         return stateDict
 
+    @staticmethod
+    def exitCodeMap():
+        """
+        Condor JobStatus codes and the state they map to
+        NOTE: Status 6 is transferring output, it's listed as running
+        """
+        exitCodeMap = {1: "Idle",
+                       2: "Running",
+                       3: "Error",
+                       4: "Complete",
+                       5: "Held",
+                       6: "Running"}
+
+        return exitCodeMap
+
     def __init__(self, config):
 
         self.config = config
@@ -195,6 +210,11 @@ class CondorPlugin(BasePlugin):
         self.defaultTaskPriority = getattr(config.BossAir, 'defaultTaskPriority', 0)
         self.maxTaskPriority     = getattr(config.BossAir, 'maxTaskPriority', 1e7)
 
+        # Parsed classAds by their raw condor_q text and the classAds
+        # handled by the last track call, so unchanged ads are skipped
+        self.classAdCache  = {}
+        self.trackedAds    = {}
+
         # Required for global pool accounting
         self.acctGroup = getattr(config.BossAir, 'acctGroup', "production")
         self.acctGroupUser = getattr(config.BossAir, 'acctGroupUser', "cmsdataops")
@@ -560,12 +580,17 @@ class CondorPlugin(BasePlugin):
         jobInfo = self.getClassAds()
         if jobInfo == None:
             return runningList, changeList, completeList
-        if len(jobInfo.keys()) == 0:
+        if len(jobInfo) == 0:
             noInfoFlag = True
 
+        stateMap    = CondorPlugin.stateMap()
+        exitCodeMap = CondorPlugin.exitCodeMap()
+        trackedAds  = {}
+
         for job in jobs:
             # Now go over the jobs from WMBS and see what we have
-            if not job['jobid'] in jobInfo.keys():
+            jobAd = jobInfo.get(job['jobid'])
+            if jobAd is None:
                 # Two options here, either put in removed, or not
                 # Only cycle through Removed if condor_q is sending
                 # us no information
@@ -581,67 +606,62 @@ class CondorPlugin(BasePlugin):
                         completeList.append(job)
                 else:
                     completeList.append(job)
-            else:
-                jobAd     = jobInfo.get(job['jobid'])
-                try:
-                    # sometimes it returns 'undefined' (probably over high load)
-                    jobStatus = int(jobAd.get('JobStatus', 0))
-                except ValueError as ex:
-                    jobStatus = 0  # unknown
-                statName  = 'Unknown'
-                if jobStatus == 1:
-                    # Job is Idle, waiting for something to happen
-                    statName = 'Idle'
-                elif jobStatus == 5:
-                    # Job is Held; experienced an error
-                    statName = 'Held'
-                elif jobStatus == 2 or jobStatus == 6:
-                    # Job is Running, doing what it was supposed to
-                    # NOTE: Status 6 is transferring output
-                    # I'm going to list this as running for now because it fits.
-                    statName = 'Running'
-                elif jobStatus == 3:
-                    # Job is in X-state: List as error
-                    statName = 'Error'
-                elif jobStatus == 4:
-                    # Job is completed
-                    statName = 'Complete'
-                else:
-                    # What state are we in?
-                    logging.info("Job in unknown state %i" % jobStatus)
-
-                # Get the global state
-                job['globalState'] = CondorPlugin.stateMap()[statName]
-
-                if statName != job['status']:
-                    # Then the status has changed
-                    job['status']      = statName
-                    job['status_time'] = 0
-
-                #Check if we have a valid status time
-                if not job['status_time']:
-                    if job['status'] == 'Running':
-                        try:
-                            job['status_time'] = int(jobAd.get('runningTime', 0))
-                        except ValueError as ex:
-                            job['status_time'] = 0
-                        # If we transitioned to running then check the site we are running at
-                        job['location'] = jobAd.get('runningCMSSite', None)
-                        if job['location'] is None:
-                            logging.debug('Something is not right here, a job (%s) is running with no CMS site' % str(jobAd))
-                    elif job['status'] == 'Idle':
-                        try:
-                            job['status_time'] = int(jobAd.get('submitTime', 0))
-                        except ValueError as ex:
-                            job['status_time'] = 0
-                    else:
-                        try:
-                            job['status_time'] = int(jobAd.get('stateTime', 0))
-                        except ValueError as ex:
-                            job['status_time'] = 0
-                    changeList.append(job)
+                continue
 
+            # If the classAd didn't change since the last poll and the job
+            # is already in the state we found then, there's nothing to do
+            lastAd, lastStatName = self.trackedAds.get(job['jobid'], (None, None))
+            if jobAd is lastAd and job['status'] == lastStatName and job['status_time']:
+                job['globalState'] = stateMap[lastStatName]
+                trackedAds[job['jobid']] = (jobAd, lastStatName)
                 runningList.append(job)
+                continue
+
+            try:
+                # sometimes it returns 'undefined' (probably over high load)
+                jobStatus = int(jobAd.get('JobStatus', 0))
+            except ValueError as ex:
+                jobStatus = 0  # unknown
+            statName = exitCodeMap.get(jobStatus, 'Unknown')
+            if statName == 'Unknown':
+                # What state are we in?
+                logging.info("Job in unknown state %i" % jobStatus)
+
+            # Get the global state
+            job['globalState'] = stateMap[statName]
+            trackedAds[job['jobid']] = (jobAd, statName)
+
+            if statName != job['status']:
+                # Then the status has changed
+                job['status']      = statName
+                job['status_time'] = 0
+
+            #Check if we have a valid status time
+            if not job['status_time']:
+                if job['status'] == 'Running':
+                    try:
+                        job['status_time'] = int(jobAd.get('runningTime', 0))
+                    except ValueError as ex:
+                        job['status_time'] = 0
+                    # If we transitioned to running then check the site we are running at
+                    job['location'] = jobAd.get('runningCMSSite', None)
+                    if job['location'] is None:
+                        logging.debug('Something is not right here, a job (%s) is running with no CMS site' % str(jobAd))
+                elif job['status'] == 'Idle':
+                    try:
+                        job['status_time'] = int(jobAd.get('submitTime', 0))
+                    except ValueError as ex:
+                        job['status_time'] = 0
+                else:
+                    try:
+                        job['status_time'] = int(jobAd.get('stateTime', 0))
+                    except ValueError as ex:
+                        job['status_time'] = 0
+                changeList.append(job)
+
+            runningList.append(job)
+
+        self.trackedAds = trackedAds
 
         return runningList, changeList, completeList
 
@@ -1113,29 +1133,32 @@ class CondorPlugin(BasePlugin):
             # We have no jobs
             return jobInfo
 
+        # Ads whose text didn't change since the last call are not parsed again
+        classAdCache = {}
         for ad in classAdsRaw:
             # There should be one for every job
-            if not re.search("\(", ad):
-                # There is no ad.
-                # Don't know what happened here
-                continue
-            statements = ad.split('(')
-            tmpDict = {}
-            for statement in statements:
-                # One for each value
-                if not re.search(':', statement):
-                    # Then we have an empty statement
+            tmpDict = self.classAdCache.get(ad)
+            if tmpDict is None:
+                if not '(' in ad:
+                    # There is no ad.
+                    # Don't know what happened here
                     continue
-                key = str(statement.split(':')[0])
-                value = statement.split(':')[1].split(')')[0]
-                tmpDict[key] = value
-            if not 'WMAgentID' in tmpDict.keys():
-                # Then we have an invalid job somehow
-                logging.error("Invalid job discovered in condor_q")
-                logging.error(tmpDict)
-                continue
-            else:
-                jobInfo[int(tmpDict['WMAgentID'])] = tmpDict
+                tmpDict = {}
+                for statement in ad.split('('):
+                    # One for each value
+                    if not ':' in statement:
+                        # Then we have an empty statement
+                        continue
+                    fields = statement.split(':')
+                    tmpDict[str(fields[0])] = fields[1].split(')')[0]
+                if not 'WMAgentID' in tmpDict:
+                    # Then we have an invalid job somehow
+                    logging.error("Invalid job discovered in condor_q")
+                    logging.error(tmpDict)
+                    continue
+            classAdCache[ad] = tmpDict
+            jobInfo[int(tmpDict['WMAgentID'])] = tmpDict
+        self.classAdCache = classAdCache
 
         logging.info("Retrieved %i classAds" % len(jobInfo))
 
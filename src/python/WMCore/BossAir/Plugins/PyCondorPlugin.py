@@ -229,6 +229,12 @@ class PyCondorPlugin(BasePlugin):
         self.result = None
         self.nProcess = getattr(self.config.BossAir, 'nCondorProcesses', 4)
 
+        # State lookup tables and the classAds handled by the last track
+        # call, so jobs whose classAd didn't change are skipped
+        self.statusNames = PyCondorPlugin.exitCodeMap()
+        self.globalStates = PyCondorPlugin.stateMap()
+        self.trackedAds = {}
+
         # Set up my proxy and glexec stuff
         self.setupScript = getattr(config.BossAir, 'UISetupScript', None)
         self.proxy = None
@@ -583,18 +589,35 @@ class PyCondorPlugin(BasePlugin):
         else:
             logging.debug("PyCondor retrieved %s classAds from condor schedd", len(jobInfo))
 
-        if len(jobInfo.keys()) == 0:
+        if len(jobInfo) == 0:
             noInfoFlag = True
 
+        lastTrackedAds = self.trackedAds
+        self.trackedAds = {}
+
         # Now go over the jobs from WMBS and see what we have
         for job in jobs:
-            if job['jobid'] not in jobInfo.keys():
+            jobAd = jobInfo.get(job['jobid'])
+            if jobAd is None:
                 if noInfoFlag:
                     self.procJobNoInfo(job, changeList, completeList)
                 else:
                     self.procCondorLog(job, changeList, completeList, runningList)
-            else:
-                self.procClassAd(job, jobInfo.get(job['jobid']), changeList, completeList, runningList)
+                continue
+
+            # If the classAd didn't change since the last poll and the job
+            # is already in the state we found then, there's nothing to do
+            lastAd, lastStatName = lastTrackedAds.get(job['jobid'], (None, None))
+            if job['status'] == lastStatName and job['status_time'] and jobAd == lastAd:
+                job['globalState'] = self.globalStates.get(lastStatName)
+                self.trackedAds[job['jobid']] = (jobAd, lastStatName)
+                if lastStatName in ("Complete", "Removed"):
+                    completeList.append(job)
+                else:
+                    runningList.append(job)
+                continue
+
+            self.procClassAd(job, jobAd, changeList, completeList, runningList)
 
         logging.debug("PyCondorPlugin tracking : %i/%i/%i (Executing/Changing/Complete)",
                       len(runningList), len(changeList), len(completeList))
@@ -1200,13 +1223,14 @@ class PyCondorPlugin(BasePlugin):
         """
         jobStatus = int(jobAd.get('JobStatus', 0))
 
-        statName = PyCondorPlugin.exitCodeMap().get(jobStatus, 'Unknown')
+        statName = self.statusNames.get(jobStatus, 'Unknown')
 
         if statName == "Unknown":
             logging.info("JobAdInfo: jobid=%i in unknown state %i", job['jobid'], jobStatus)
 
         # Get the global state
-        job['globalState'] = PyCondorPlugin.stateMap().get(statName)
+        job['globalState'] = self.globalStates.get(statName)
+        self.trackedAds[job['jobid']] = (jobAd, statName)
         logging.debug("JobAdInfo: JobStatus for jobid=%i is %s", job['jobid'], job['status'])
         if statName != job['status']:
             # Then the status has changed
@@ -4,7 +4,147 @@ A basic action is a thing that will run a SQL statement
 A more complex one would be something that ran multiple SQL
 objects to produce a single output.
 """
+
+import threading
+import time
+
+
+class DAOStatistics(object):
+    """
+    Count the calls, returned rows and wall time of the DAOs made by the
+    DAOFactory, per thread and DAO class.  Counting is off until enable() is
+    called, the worker threads turn it on with config.Agent.daoStatistics.
+    enable() wraps the execute method of the DAO classes made by the
+    factories, so DAOs made before it is called are counted too, and
+    disable() puts the original methods back.  DAOs run unwrapped while
+    the counting is off.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        # DAO classes made by the factories by DAO name
+        self.daoClasses = {}
+
+    def enable(self):
+        with self.lock:
+            if not self.enabled:
+                self.enabled = True
+                for daoName, daoClass in self.daoClasses.items():
+                    self._instrument(daoClass, daoName)
+
+    def disable(self):
+        with self.lock:
+            if self.enabled:
+                self.enabled = False
+                for daoClass in self.daoClasses.values():
+                    self._restore(daoClass)
+
+    def register(self, daoClass, daoName):
+        """
+        _register_
+
+        Add a DAO class to the classes counted while the statistics are
+        enabled
+        """
+        with self.lock:
+            self.daoClasses[daoName] = daoClass
+            if self.enabled:
+                self._instrument(daoClass, daoName)
+
+    def _counters(self):
+        if not hasattr(self.local, "counters"):
+            self.local.counters = {}
+        return self.local.counters
+
+    def record(self, daoName, rows, wallTime):
+        """
+        _record_
+
+        Add one call of a DAO to the counters of the current thread
+        """
+        counters = self._counters()
+        if daoName not in counters:
+            counters[daoName] = [0, 0, 0.0]
+        entry = counters[daoName]
+        entry[0] += 1
+        entry[1] += rows
+        entry[2] += wallTime
+
+    def statistics(self):
+        """
+        _statistics_
+
+        Return a dict of DAO class name to a dict with the calls, rows and
+        time spent in it by the current thread
+        """
+        return dict((name, {"calls": calls, "rows": rows, "time": wallTime})
+                    for name, (calls, rows, wallTime) in self._counters().items())
+
+    def report(self, limit=10):
+        """
+        _report_
+
+        Summary of the DAOs the current thread spent most time in
+        """
+        counters = sorted(self._counters().items(), key=lambda x: x[1][2], reverse=True)
+        lines = ["DAO statistics, %i DAO classes:" % len(counters)]
+        for name, (calls, rows, wallTime) in counters[:limit]:
+            lines.append("  %s: %i calls, %i rows, %.3f s" % (name, calls, rows, wallTime))
+        return "\n".join(lines)
+
+    def reset(self):
+        self.local.counters = {}
+
+    def _instrument(self, daoClass, daoName):
+        """
+        _instrument_
+
+        Replace the execute method of a DAO class by one that records its
+        calls, called with the lock held
+        """
+        ownExecute = daoClass.__dict__.get("execute")
+        if hasattr(ownExecute, "untimed"):
+            return
+        execute = daoClass.execute.im_func
+        # A parent class may be instrumented already
+        execute = getattr(execute, "untimed", execute)
+
+        def timedExecute(dao, *args, **kwargs):
+            start = time.time()
+            result = execute(dao, *args, **kwargs)
+            try:
+                rows = len(result)
+            except TypeError:
+                rows = 0
+            self.record(daoName, rows, time.time() - start)
+            return result
+
+        timedExecute.untimed = execute
+        timedExecute.ownExecute = ownExecute
+        daoClass.execute = timedExecute
+
+    def _restore(self, daoClass):
+        """
+        _restore_
+
+        Put back the execute method of a DAO class, called with the lock held
+        """
+        timedExecute = daoClass.__dict__.get("execute")
+        if not hasattr(timedExecute, "untimed"):
+            return
+        if timedExecute.ownExecute is None:
+            del daoClass.execute
+        else:
+            daoClass.execute = timedExecute.ownExecute
+
+daoStatistics = DAOStatistics()
+
+
 class DAOFactory(object):
+    # DAO classes by module name, shared by all factories
+    _daoClasses = {}
+
     def __init__(self, package='WMCore', logger=None, dbinterface=None, owner=""):
         self.package = package
         self.logger = logger
@@ -17,11 +157,16 @@ class DAOFactory(object):
         self.dialects = {"Oracle" : OracleDialect,
                     "MySQL" : MySQLDialect,
                     "SQLite" : SQLiteDialect}
+        self._dialect = None
+        self._dialectFor = None
 
-    def __call__(self, classname):
+    def dialect(self):
         """
-        Somewhat fugly method to load generic SQL classes...
+        Name of the dialect of the database interface, looked up once
         """
+        if self._dialect is not None and self._dialectFor is self.dbinterface:
+            return self._dialect
+
         if not isinstance(self.dbinterface, str):
 
             dia = self.dbinterface.engine.dialect
@@ -35,12 +180,26 @@ class DAOFactory(object):
         else:
             dialect = 'CouchDB'
 
+        self._dialect = dialect
+        self._dialectFor = self.dbinterface
+        return dialect
+
+    def __call__(self, classname):
+        """
+        Somewhat fugly method to load generic SQL classes...
+        """
+        module = "%s.%s.%s" % (self.package, self.dialect(), classname)
+        instance = self._daoClasses.get(module)
+        if instance is None:
+            #self.logger.debug("importing %s, %s" % (module, classname))
+            instance = __import__(module, globals(), locals(), [classname])#, -1)
+            instance = getattr(instance, classname.split('.')[-1])
+            self._daoClasses[module] = instance
+            daoStatistics.register(instance, module)
 
-        module = "%s.%s.%s" % (self.package, dialect, classname)
-        #self.logger.debug("importing %s, %s" % (module, classname))
-        module = __import__(module, globals(), locals(), [classname])#, -1)
-        instance = getattr(module, classname.split('.')[-1])
         if self.owner:
-            return instance(self.logger, self.dbinterface, self.owner)
+            dao = instance(self.logger, self.dbinterface, self.owner)
         else:
-            return instance(self.logger, self.dbinterface)
+            dao = instance(self.logger, self.dbinterface)
+
+        return dao
@@ -55,15 +55,14 @@ class File(WMObject, dict):
             msg = "addRun argument must be of type WMCore.DataStructs.Run"
             raise RuntimeError(msg)
 
-        addFlag = False
         for runMember in self['runs']:
             if runMember.run ==  run.run:
                 # this rely on Run object overwrite __add__ to update self
+                # the lumis are merged in a single pass
                 runMember + run
-                addFlag = True
+                return
 
-        if not addFlag:
-            self['runs'].add(run)
+        self['runs'].add(run)
         return
 
     def load(self):
@@ -142,7 +141,7 @@ class File(WMObject, dict):
 
         for run in self["runs"]:
             runDict = {"run_number": run.run,
-                       "lumis": run.lumis}
+                       "lumis": list(run.lumis)}
             fileDict["runs"].append(runDict)
 
         return fileDict
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+"""
+_JobStore_
+
+Append-only file holding the pickled job objects of a job collection,
+so the JobSubmitter doesn't have to open a job.pkl in every job cache
+directory.
+
+The store is a small header followed by one record per job: the job id
+and the length of the pickled job, then the pickled job itself.  Saving
+a job again appends a new record, the last record of a job wins.  The
+offsets of the records are found by walking over the record headers of
+the memory-mapped file, so single jobs can be unpickled without reading
+the others.
+"""
+
+import os
+import mmap
+import struct
+import logging
+import cPickle
+
+JOB_STORE_NAME = "JobStore.dat"
+
+_MAGIC = "WMJOBSTORE\x01"
+_record = struct.Struct(">qI")
+
+
+class JobStoreException(Exception):
+    """
+    _JobStoreException_
+
+    The job store file is not valid.
+    """
+    pass
+
+
+class JobStore(object):
+    """
+    _JobStore_
+
+    Jobs of one job collection directory
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, JOB_STORE_NAME)
+        self.pending = []
+        self.handle = None
+        self.data = None
+        self.index = None
+
+    def exists(self):
+        """
+        _exists_
+
+        Whether there is a job store file in the directory
+        """
+        return os.path.isfile(self.path)
+
+    def addJob(self, job):
+        """
+        _addJob_
+
+        Queue a job to be appended to the store by save()
+        """
+        self.pending.append((job["id"], cPickle.dumps(job, cPickle.HIGHEST_PROTOCOL)))
+        return
+
+    def save(self):
+        """
+        _save_
+
+        Append the queued jobs to the store file
+        """
+        if not self.pending:
+            return
+
+        self.close()
+        fileHandle = open(self.path, "ab")
+        try:
+            if fileHandle.tell() == 0:
+                fileHandle.write(_MAGIC)
+            chunks = []
+            for jobID, payload in self.pending:
+                chunks.append(_record.pack(jobID, len(payload)))
+                chunks.append(payload)
+            fileHandle.write("".join(chunks))
+        finally:
+            fileHandle.close()
+        self.pending = []
+        return
+
+    def _load(self):
+        """
+        _load_
+
+        Map the store file and build the index of job id to the offset
+        and length of its latest record.
+        """
+        if self.index is not None:
+            return
+
+        self.index = {}
+        if not self.exists() or os.path.getsize(self.path) == 0:
+            return
+
+        self.handle = open(self.path, "rb")
+        self.data = mmap.mmap(self.handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(_MAGIC)] != _MAGIC:
+            self.close()
+            raise JobStoreException("%s is not a job store" % self.path)
+
+        size = len(self.data)
+        offset = len(_MAGIC)
+        while offset + _record.size <= size:
+            jobID, length = _record.unpack_from(self.data, offset)
+            offset += _record.size
+            if offset + length > size:
+                # A write that didn't finish, ignore it
+                logging.warning("Incomplete record for job %s in %s", jobID, self.path)
+                break
+            self.index[jobID] = (offset, length)
+            offset += length
+        return
+
+    def __contains__(self, jobID):
+        self._load()
+        return jobID in self.index
+
+    def jobIDs(self):
+        """
+        _jobIDs_
+
+        Return the ids of the jobs in the store
+        """
+        self._load()
+        return self.index.keys()
+
+    def getJob(self, jobID):
+        """
+        _getJob_
+
+        Unpickle a single job from the store, None if it's not there
+        """
+        self._load()
+        if jobID not in self.index:
+            return None
+        offset, length = self.index[jobID]
+        return cPickle.loads(self.data[offset:offset + length])
+
+    def loadJobs(self):
+        """
+        _loadJobs_
+
+        Unpickle all the jobs in the store, keyed by job id
+        """
+        self._load()
+        return dict((jobID, self.getJob(jobID)) for jobID in self.index)
+
+    def close(self):
+        """
+        _close_
+
+        Unmap the store file, it's mapped again when needed
+        """
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+        self.index = None
+        return
+
+
+def loadJob(cacheDir, jobID, jobStores=None):
+    """
+    _loadJob_
+
+    Load the job object of a job from the job store of its collection, or
+    from the job.pkl in its cache directory if it isn't in a store.
+    jobStores is an optional dict of collection directory to JobStore that
+    is used to keep the stores open between calls.  Returns None if the job
+    can't be found.
+    """
+    collectionDir = os.path.dirname(os.path.normpath(cacheDir))
+    if jobStores is None:
+        jobStores = {}
+    if collectionDir not in jobStores:
+        jobStores[collectionDir] = JobStore(collectionDir)
+    jobStore = jobStores[collectionDir]
+
+    if jobID in jobStore:
+        return jobStore.getJob(jobID)
+
+    pickledJobPath = os.path.join(cacheDir, "job.pkl")
+    if not os.path.isfile(pickledJobPath):
+        return None
+    jobHandle = open(pickledJobPath, "r")
+    try:
+        return cPickle.load(jobHandle)
+    finally:
+        jobHandle.close()
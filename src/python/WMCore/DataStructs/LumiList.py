@@ -13,12 +13,73 @@ This code began life in COMP/CRAB/python/LumiList.py
 """
 
 
-import copy
+import bisect
+import heapq
 import itertools
 import json
 import re
 import urllib2
 
+# Upper bound used to bisect the [first, last] lumi ranges
+_MAX_LUMI = float('inf')
+
+def _subtractRanges(alumis, blumis):
+    """
+    Ranges from the sorted alumis not in the sorted blumis, done as a single
+    sweep over both lists.
+    """
+    result = []
+    nb = len(blumis)
+    j = 0
+    for first, last in alumis:
+        # Skip the ranges of b that end before this range of a
+        while j < nb and blumis[j][1] < first:
+            j += 1
+        k = j
+        while k < nb and blumis[k][0] <= last:
+            if blumis[k][0] > first:
+                result.append([first, blumis[k][0] - 1])
+            first = max(first, blumis[k][1] + 1)
+            if first > last:
+                break
+            k += 1
+        if first <= last:
+            result.append([first, last])
+    return result
+
+def _intersectRanges(alumis, blumis):
+    """
+    Ranges both in the sorted alumis and the sorted blumis, done as a single
+    sweep over both lists.
+    """
+    result = []
+    i = j = 0
+    na, nb = len(alumis), len(blumis)
+    while i < na and j < nb:
+        first = max(alumis[i][0], blumis[j][0])
+        last = min(alumis[i][1], blumis[j][1])
+        if first <= last:
+            result.append([first, last])
+        if alumis[i][1] < blumis[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+def _mergeRanges(alumis, blumis):
+    """
+    Union of the sorted alumis and the sorted blumis, overlapping and
+    adjacent ranges are joined.
+    """
+    result = []
+    for first, last in heapq.merge(alumis, blumis):
+        if result and first <= result[-1][1] + 1:
+            if last > result[-1][1]:
+                result[-1][1] = last
+        else:
+            result.append([first, last])
+    return result
+
 class LumiList(object):
     """
     Deal with lists of lumis in several different forms:
@@ -147,29 +208,9 @@ class LumiList(object):
 
     def __sub__(self, other): # Things from self not in other
         result = {}
-        for run in sorted(self.compactList.keys()):
-            alumis = sorted(self.compactList[run])
-            blumis = sorted(other.compactList.get(run, []))
-            alist = []                    # verified part
-            for alumi in alumis:
-                tmplist = [alumi[0], alumi[1]] # may be part
-                for blumi in blumis:
-                    if blumi[0] <= tmplist[0] and blumi[1] >= tmplist[1]: # blumi has all of alumi
-                        tmplist = []
-                        break # blumi is has all of alumi
-                    if blumi[0] > tmplist[0] and blumi[1] < tmplist[1]: # blumi is part of alumi
-                        alist.append([tmplist[0], blumi[0]-1])
-                        tmplist = [blumi[1]+1, tmplist[1]]
-                    elif blumi[0] <= tmplist[0] and blumi[1] < tmplist[1] and blumi[1]>=tmplist[0]: # overlaps start
-                        tmplist = [blumi[1]+1, tmplist[1]]
-                    elif blumi[0] > tmplist[0] and blumi[1] >= tmplist[1] and blumi[0]<=tmplist[1]: # overlaps end
-                        alist.append([tmplist[0], blumi[0]-1])
-                        tmplist = []
-                        break
-                if tmplist:
-                    alist.append(tmplist)
-            result[run] = alist
-
+        for run in self.compactList.keys():
+            result[run] = _subtractRanges(sorted(self.compactList[run]),
+                                          sorted(other.compactList.get(run, [])))
         return LumiList(compactList = result)
 
 
@@ -178,46 +219,18 @@ class LumiList(object):
         aruns = set(self.compactList.keys())
         bruns = set(other.compactList.keys())
         for run in aruns & bruns:
-            lumiList = []                    # List for this run
-            unique = []                    # List for this run
-            for alumi in self.compactList[run]:
-                for blumi in other.compactList[run]:
-                    if blumi[0] <= alumi[0] and blumi[1] >= alumi[1]: # blumi has all of alumi
-                        lumiList.append(alumi)
-                    if blumi[0] > alumi[0] and blumi[1] < alumi[1]: # blumi is part of alumi
-                        lumiList.append(blumi)
-                    elif blumi[0] <= alumi[0] and blumi[1] < alumi[1] and blumi[1] >= alumi[0]: # overlaps start
-                        lumiList.append([alumi[0], blumi[1]])
-                    elif blumi[0] > alumi[0] and blumi[1] >= alumi[1] and blumi[0] <= alumi[1]: # overlaps end
-                        lumiList.append([blumi[0], alumi[1]])
-
-
-            if lumiList:
-                unique = [lumiList[0]]
-            for pair in lumiList[1:]:
-                if pair[0] == unique[-1][1]+1:
-                    unique[-1][1] = copy.deepcopy(pair[1])
-                else:
-                    unique.append(copy.deepcopy(pair))
-
-            result[run] = unique
+            result[run] = _intersectRanges(sorted(self.compactList[run]),
+                                           sorted(other.compactList[run]))
         return LumiList(compactList = result)
 
 
     def __or__(self, other):
         result = {}
-        aruns = self.compactList.keys()
-        bruns = other.compactList.keys()
-        runs = set(aruns + bruns)
-        for run in runs:
-            overlap = sorted(self.compactList.get(run, []) + other.compactList.get(run, []))
-            unique = [overlap[0]]
-            for pair in overlap[1:]:
-                if pair[0] >= unique[-1][0] and pair[0] <= unique[-1][1]+1 and pair[1] > unique[-1][1]:
-                    unique[-1][1] = copy.deepcopy(pair[1])
-                elif pair[0] > unique[-1][1]:
-                    unique.append(copy.deepcopy(pair))
-            result[run] = unique
+        aruns = set(self.compactList.keys())
+        bruns = set(other.compactList.keys())
+        for run in aruns | bruns:
+            result[run] = _mergeRanges(sorted(self.compactList.get(run, [])),
+                                       sorted(other.compactList.get(run, [])))
         return LumiList(compactList = result)
 
 
@@ -237,11 +250,13 @@ class LumiList(object):
         """
         filteredList = []
         for (run, lumi) in lumiList:
-            runsInLumi = self.compactList.get(str(run), [[0, -1]])
-            for (first, last) in runsInLumi:
-                if lumi >= first and lumi <= last:
-                    filteredList.append((run, lumi))
-                    break
+            lumiRangeList = self.compactList.get(str(run), None)
+            if not lumiRangeList:
+                continue
+            # Last range starting at or before lumi
+            idx = bisect.bisect_right(lumiRangeList, [lumi, _MAX_LUMI])
+            if idx and lumi <= lumiRangeList[idx - 1][1]:
+                filteredList.append((run, lumi))
         return filteredList
 
 
@@ -389,17 +404,15 @@ class LumiList(object):
         if not lumiRangeList:
             # the run isn't there, so no need to look any further
             return False
-        for lumiRange in lumiRangeList:
-            # we want to make this as found if either the lumiSection
-            # is inside the range OR if the lumi section is greater
-            # than or equal to the lower bound of the lumi range and
-            # the upper bound is 0 (which means extends to the end of
-            # the run)
-            if lumiRange[0] <= lumiSection and \
-               (0 == lumiRange[1] or lumiSection <= lumiRange[1]):
-                # got it
-                return True
-        return False
+        # the ranges are sorted, look at the last one starting at or
+        # before the lumi section. We want to make this as found if
+        # either the lumiSection is inside the range OR if the upper
+        # bound is 0 (which means extends to the end of the run)
+        idx = bisect.bisect_right(lumiRangeList, [lumiSection, _MAX_LUMI])
+        if not idx:
+            return False
+        lumiRange = lumiRangeList[idx - 1]
+        return 0 == lumiRange[1] or lumiSection <= lumiRange[1]
 
 
     def __contains__ (self, runTuple):
@@ -9,20 +9,169 @@ container representing a run, and its constituent lumi sections
 
 
 
+import bisect
+
 from WMCore.DataStructs.WMObject import WMObject
 
+class SortedLumis(list):
+    """
+    _SortedLumis_
+
+    List of lumi sections kept sorted and without duplicates, so that
+    membership is a binary search and merging is linear. The hash of
+    the lumis is cached until the list is modified.
+
+    """
+    __slots__ = ['_hash']
+
+    def __init__(self, lumis = ()):
+        list.__init__(self, sorted(set(lumis)))
+        self._hash = None
+
+    def __reduce__(self):
+        return (SortedLumis, (list(self),))
+
+    def _normalize(self):
+        list.__setitem__(self, slice(None), sorted(set(self)))
+        self._hash = None
+
+    def lumiHash(self):
+        """
+        _lumiHash_
+
+        Sum of the hashes of the lumis, cached
+        """
+        if self._hash is None:
+            self._hash = sum(lumi.__hash__() for lumi in self)
+        return self._hash
+
+    def __contains__(self, lumi):
+        idx = bisect.bisect_left(self, lumi)
+        return idx < len(self) and self[idx] == lumi
+
+    def index(self, lumi, *args):
+        idx = bisect.bisect_left(self, lumi)
+        if idx < len(self) and self[idx] == lumi:
+            return idx
+        raise ValueError("%s is not in list" % lumi)
+
+    def count(self, lumi):
+        return int(lumi in self)
+
+    def append(self, lumi):
+        if not self or lumi > self[-1]:
+            list.append(self, lumi)
+        else:
+            idx = bisect.bisect_left(self, lumi)
+            if self[idx] == lumi:
+                return
+            list.insert(self, idx, lumi)
+        self._hash = None
+
+    def insert(self, idx, lumi):
+        self.append(lumi)
+
+    def extend(self, lumis):
+        """
+        _extend_
+
+        Merge the lumis in a single pass over both sorted lists
+        """
+        if not isinstance(lumis, SortedLumis):
+            lumis = sorted(lumis)
+        if not lumis:
+            return
+        if not self or lumis[0] > self[-1]:
+            lastLumi = self[-1] if self else None
+            for lumi in lumis:
+                if lumi != lastLumi:
+                    list.append(self, lumi)
+                    lastLumi = lumi
+            self._hash = None
+            return
+
+        merged = []
+        i = j = 0
+        nself, nlumis = len(self), len(lumis)
+        while i < nself or j < nlumis:
+            if j == nlumis or (i < nself and self[i] <= lumis[j]):
+                lumi = self[i]
+                i += 1
+            else:
+                lumi = lumis[j]
+                j += 1
+            if not merged or lumi != merged[-1]:
+                merged.append(lumi)
+        list.__setitem__(self, slice(None), merged)
+        self._hash = None
+
+    def __iadd__(self, lumis):
+        self.extend(lumis)
+        return self
+
+    def sort(self, *args, **kwargs):
+        """
+        Always sorted, nothing to do
+        """
+        return
+
+    def __setitem__(self, key, value):
+        list.__setitem__(self, key, value)
+        self._normalize()
+
+    def __setslice__(self, i, j, values):
+        list.__setslice__(self, i, j, values)
+        self._normalize()
+
+    def __delitem__(self, key):
+        list.__delitem__(self, key)
+        self._hash = None
+
+    def __delslice__(self, i, j):
+        list.__delslice__(self, i, j)
+        self._hash = None
+
+    def remove(self, lumi):
+        list.remove(self, lumi)
+        self._hash = None
+
+    def pop(self, *args):
+        self._hash = None
+        return list.pop(self, *args)
+
 class Run(WMObject):
     """
     _Run_
 
-    Run container, is a list of lumi sections
+    Run container, is a sorted list of unique lumi sections
 
     """
     def __init__(self, runNumber = None, *newLumis):
         WMObject.__init__(self)
         self.run = runNumber
-        self.lumis = []
-        self.lumis.extend(newLumis)
+        self._lumis = SortedLumis(newLumis)
+
+    def _getLumis(self):
+        return self._lumis
+
+    def _setLumis(self, lumis):
+        self._lumis = SortedLumis(lumis)
+
+    lumis = property(_getLumis, _setLumis)
+
+    def __getstate__(self):
+        """
+        Pickle the lumis as a plain list, the format of older pickles
+        """
+        return {"run": self.run, "lumis": list(self._lumis)}
+
+    def __setstate__(self, state):
+        """
+        Also used for pickles of runs stored as a plain list of lumis
+        """
+        WMObject.__init__(self, state.get("config", {}))
+        self.run = state["run"]
+        self.lumis = state["lumis"]
 
     def __str__(self):
         return "Run%s:%s" % (self.run, list(self.lumis))
@@ -31,12 +180,12 @@ class Run(WMObject):
     def __lt__(self, rhs):
         if self.run != rhs.run:
             return self.run < rhs.run
-        return list(self.lumis) < list(rhs.lumis)
+        return list.__lt__(self.lumis, rhs.lumis)
 
     def __gt__(self, rhs):
         if self.run != rhs.run:
             return self.run > rhs.run
-        return list(self.lumis) > list(rhs.lumis)
+        return list.__gt__(self.lumis, rhs.lumis)
 
 
     def extend(self, items):
@@ -63,9 +212,7 @@ class Run(WMObject):
             msg += "Run %s does not equal Run %s" % (self.run, rhs.run)
             raise RuntimeError(msg)
 
-        #newRun = Run(self.run, *self)
-        #[ newRun.append(x) for x in rhs if x not in newRun ]
-        [ self.lumis.append(x) for x in rhs.lumis if x not in self.lumis ]
+        self.lumis.extend(rhs.lumis)
 
         return self
     def __iter__(self):
@@ -75,6 +222,8 @@ class Run(WMObject):
         return self.lumis.__next__()
     def __len__(self):
         return self.lumis.__len__()
+    def __contains__(self, lumi):
+        return self.lumis.__contains__(lumi)
     def __getitem__(self,key):
         return self.lumis.__getitem__(key)
     def __setitem__(self,key,value):
@@ -87,18 +236,13 @@ class Run(WMObject):
             return False
         if self.run != rhs.run:
             return False
-        return list(self.lumis) == list(rhs.lumis)
+        return list.__eq__(self.lumis, rhs.lumis)
 
     def __ne__(self, rhs):
         return not self.__eq__(rhs)
 
     def __hash__(self):
-
-        value = self.run.__hash__()
-        self.lumis.sort()
-        for lumi in self.lumis:
-            value += lumi.__hash__()
-        return value
+        return self.run.__hash__() + self.lumis.lumiHash()
 
     def json(self):
         """
@@ -107,7 +251,7 @@ class Run(WMObject):
         Convert to JSON friendly format.  Include some information for the
         thunker so that we can convert back.
         """
-        return {"Run" : self.run, "Lumis" : self.lumis,
+        return {"Run" : self.run, "Lumis" : list(self.lumis),
                 "thunker_encoded_json": True, "type": "WMCore.DataStructs.Run.Run"}
 
     def __to_json__(self, thunker = None):
@@ -18,6 +18,8 @@ import re
 import hashlib
 import base64
 import logging
+import threading
+import socket
 from httplib import HTTPException
 from datetime import timedelta, datetime
 
@@ -150,6 +152,178 @@ class CouchDBRequests(JSONRequests):
 
         return
 
+class WriteBehindQueue(object):
+    """
+    Documents waiting to be written to a Database by a background thread.
+
+    The thread posts the documents in batches of at most batchSize documents,
+    as soon as a batch is full or the oldest waiting document has been queued
+    for interval seconds.  put() blocks while maxBacklog documents are
+    waiting, so a producer can't get too far ahead of the database.
+
+    Batches that fail because couch can't be reached or has a server error are
+    put back and retried after interval seconds for as long as it takes, the
+    error is raised by the next flush().  When couch rejects a batch its
+    documents are posted one at a time instead, so that only the rejected
+    documents are dropped, the error of the last one is raised by the next
+    flush().
+    """
+    def __init__(self, database, batchSize = 1000, interval = 5, maxBacklog = 10000):
+        self.database = database
+        self.batchSize = batchSize
+        self.interval = interval
+        self.maxBacklog = max(maxBacklog, batchSize)
+
+        self.condition = threading.Condition()
+        # (document, callback) pairs in the order they were queued
+        self.pending = []
+        self.inFlight = 0
+        self.oldest = None
+        self.flushing = 0
+        self.stopping = False
+        self.error = None
+        # error of the last rejected document, kept until a flush() raises it
+        self.rejectError = None
+
+        self.thread = threading.Thread(target = self._run,
+                                       name = "CouchWriteBehind-%s" % database.name)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def put(self, doc, callback = None):
+        """
+        Add a document to the queue, waiting while the backlog is full
+        """
+        with self.condition:
+            while len(self.pending) + self.inFlight >= self.maxBacklog and self.thread.is_alive():
+                self.condition.wait(self.interval)
+            if not self.pending:
+                # wake the thread up to time the new batch
+                self.oldest = time.time()
+                self.condition.notify_all()
+            self.pending.append((doc, callback))
+            if len(self.pending) >= self.batchSize:
+                self.condition.notify_all()
+
+    def flush(self):
+        """
+        Wait until all the queued documents are written to the database,
+        raise the error of the last failed batch if they couldn't be or of
+        the last document rejected since the previous flush()
+        """
+        with self.condition:
+            self.error = None
+            self.flushing += 1
+            self.condition.notify_all()
+            try:
+                while self.pending or self.inFlight:
+                    if self.error is not None:
+                        raise self.error
+                    if not self.thread.is_alive():
+                        raise RuntimeError("write behind thread of %s is not running" % self.database.name)
+                    self.condition.wait(self.interval)
+                if self.rejectError is not None:
+                    error, self.rejectError = self.rejectError, None
+                    raise error
+            finally:
+                self.flushing -= 1
+
+    def stop(self):
+        """
+        Write the queued documents and stop the background thread
+        """
+        try:
+            self.flush()
+        finally:
+            with self.condition:
+                self.stopping = True
+                self.condition.notify_all()
+            self.thread.join()
+
+    def _ready(self):
+        """
+        Whether a batch should be written now, called with the lock held
+        """
+        if not self.pending:
+            return False
+        if self.error is not None and time.time() - self.oldest < self.interval:
+            # wait before retrying a failed batch, flush() clears the error
+            return False
+        return len(self.pending) >= self.batchSize or self.flushing > 0 or \
+               self.stopping or time.time() - self.oldest >= self.interval
+
+    @staticmethod
+    def _transient(ex):
+        """
+        Whether a failed commit is worth retrying as it is, rather than
+        caused by the documents themselves
+        """
+        if isinstance(ex, (socket.error, IOError, HTTPException,
+                           CouchUnauthorisedError, CouchInternalServerError)):
+            return True
+        return isinstance(ex, CouchError) and (ex.status or 0) >= 500
+
+    def _commitSingly(self, batch):
+        """
+        Post the documents of a rejected batch one at a time, dropping the
+        ones couch rejects.  Return the documents not posted yet and the error
+        that stopped the posting if couch failed again.
+        """
+        for i, item in enumerate(batch):
+            try:
+                self.database._commitBatch([item])
+            except Exception as ex:
+                if self._transient(ex):
+                    logging.error("Write behind commit of %i documents to %s failed: %s",
+                                  len(batch) - i, self.database.name, str(ex))
+                    return batch[i:], ex
+                logging.error("Dropping document %s rejected by %s: %s",
+                              item[0].get("_id"), self.database.name, str(ex))
+                with self.condition:
+                    self.rejectError = ex
+        return [], None
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self._ready():
+                    if self.stopping:
+                        return
+                    if self.pending:
+                        timeout = max(self.oldest + self.interval - time.time(), 0.01)
+                    else:
+                        timeout = None
+                    self.condition.wait(timeout)
+                batch = self.pending[:self.batchSize]
+                del self.pending[:self.batchSize]
+                self.inFlight = len(batch)
+                if self.pending:
+                    self.oldest = time.time()
+
+            error = None
+            try:
+                self.database._commitBatch(batch)
+            except Exception as ex:
+                if self._transient(ex):
+                    logging.error("Write behind commit of %i documents to %s failed: %s",
+                                  len(batch), self.database.name, str(ex))
+                    error = ex
+                else:
+                    logging.warning("%s rejected a batch of %i documents, posting them one at a time: %s",
+                                    self.database.name, len(batch), str(ex))
+                    batch, error = self._commitSingly(batch)
+
+            with self.condition:
+                self.inFlight = 0
+                if error is not None:
+                    self.pending[0:0] = batch
+                    self.oldest = time.time()
+                    self.error = error
+                    if self.stopping:
+                        self.condition.notify_all()
+                        return
+                self.condition.notify_all()
+
 class Database(CouchDBRequests):
     """
     Object representing a connection to a CouchDB Database instance.
@@ -168,6 +342,7 @@ class Database(CouchDBRequests):
         self._reset_queue()
 
         self._queue_size = size
+        self._writeBehind = None
         self.threads = []
         self.last_seq = 0
 
@@ -177,6 +352,59 @@ class Database(CouchDBRequests):
         """
         self._queue = []
 
+    def startWriteBehind(self, batchSize = None, interval = 5, maxBacklog = None):
+        """
+        Switch to write behind mode: queued documents are written by a
+        background thread in batches of batchSize documents (the queue size by
+        default) at least every interval seconds, queue() blocks while
+        maxBacklog documents (ten batches by default) are waiting.  Documents
+        already in the queue are written first.  Batches are retried until
+        couch is back, documents it rejects are dropped one by one and the
+        error raised by the next flush().
+
+        Conflicts are passed to the callback given to queue() for each
+        document, its return value is discarded.  Use flush() or commit() to
+        wait for the documents to be written.
+        """
+        if self._writeBehind is not None:
+            return
+        self.commit()
+        batchSize = batchSize or self._queue_size
+        self._writeBehind = WriteBehindQueue(self, batchSize, interval,
+                                             maxBacklog or 10 * batchSize)
+
+    def stopWriteBehind(self):
+        """
+        Write the queued documents and return to synchronous commits
+        """
+        if self._writeBehind is None:
+            return
+        writeBehind = self._writeBehind
+        self._writeBehind = None
+        writeBehind.stop()
+
+    def flush(self):
+        """
+        Wait until all the queued documents are in the database
+        """
+        if self._writeBehind is not None:
+            self._writeBehind.flush()
+        else:
+            self.commit()
+
+    def _commitBatch(self, batch):
+        """
+        Bulk post a list of (document, callback) pairs from the write behind
+        queue, calling the callback of the documents that conflict
+        """
+        data = {'docs': [doc for doc, _ in batch]}
+        retval = self.post('/%s/_bulk_docs/' % self.name, data)
+        for idx, result in enumerate(retval):
+            callback = batch[idx][1]
+            if callback and result.get('error', None) == 'conflict':
+                callback(self, data, result)
+        return retval
+
     def timestamp(self, data, label=''):
         """
         Time stamp each doc in a list
@@ -203,7 +431,9 @@ class Database(CouchDBRequests):
         """
         if timestamp:
             self.timestamp(doc, timestamp)
-        #TODO: Thread this off so that it's non blocking...
+        if self._writeBehind is not None:
+            self._writeBehind.put(doc, callback)
+            return
         if len(self._queue) >= self._queue_size:
             print('queue larger than %s records, committing' % self._queue_size)
             self.commit(viewlist=viewlist, callback = callback)
@@ -256,9 +486,21 @@ class Database(CouchDBRequests):
 
         TODO: restore support for returndocs and viewlist
 
+        In write behind mode the document is queued with the callback and
+        commit waits for the queue to be written, nothing is returned.
+
         Returns a list of good documents
             throws an exception otherwise
         """
+        if self._writeBehind is not None:
+            if doc:
+                self.queue(doc, timestamp, callback = callback)
+            self._writeBehind.flush()
+            for v in viewlist:
+                design, view = v.split('/')
+                self.loadView(design, view, {'limit': 0})
+            return
+
         if (doc):
             self.queue(doc, timestamp, viewlist)
 
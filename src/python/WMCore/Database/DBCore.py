@@ -10,7 +10,7 @@ Core Database APIs
 
 
 from WMCore.DataStructs.WMObject import WMObject
-from WMCore.Database.ResultSet import ResultSet
+from WMCore.Database.ResultSet import ResultSet, StreamingResultSet
 from copy import copy
 import WMCore.WMLogging
 
@@ -121,13 +121,42 @@ class DBInterface(WMObject):
         return self.engine.connect()
 
 
+    def streamData(self, sqlstmt, binds={}, conn=None, size=1000):
+        """
+        _streamData_
+
+        Run one or more select statements and return a list holding a single
+        StreamingResultSet, the rows are fetched in batches of size as they
+        are read instead of all at once.  Takes the same statements and binds
+        as processData.  No transaction is opened, a stream is read only.
+        With MySQL no other statement can run on the connection until the
+        stream has been read or closed.
+        """
+        sqlstmt = self.makelist(sqlstmt)
+        binds = self.makelist(binds)
+        if len(binds) == 0 or binds[0] == {} or binds[0] == None:
+            statements = [(s, None) for s in sqlstmt]
+        elif len(binds) > len(sqlstmt) and len(sqlstmt) == 1:
+            statements = [(sqlstmt[0], b) for b in binds]
+        elif len(binds) == len(sqlstmt):
+            statements = list(zip(sqlstmt, binds))
+        else:
+            raise Exception("""DBInterface.streamData Nothing executed, problem with your arguments
+            Probably mismatched sizes for sql (%i) and binds (%i)""" % (len(sqlstmt), len(binds)))
+
+        return [StreamingResultSet(self, statements, conn=conn, size=size)]
+
     def processData(self, sqlstmt, binds={}, conn=None,
-                    transaction=False, returnCursor=False):
+                    transaction=False, returnCursor=False, stream=False):
         """
         set conn if you already have an active connection to reuse
         set transaction = True if you already have an active transaction
+        set stream = True to read the rows of a select in batches, see streamData
 
         """
+        if stream:
+            return self.streamData(sqlstmt, binds, conn=conn)
+
         connection = None
         try:
             if not conn:
@@ -68,17 +68,17 @@ class DBFormatter(WMObject):
         """
         dictOut = []
         for r in result:
-            descriptions = r.keys
+            # WARNING: Oracle returns table names in CAP!
+            descriptions = [str(x.lower()) for x in r.keys]
             for i in r.fetchall():
                 #WARNING: this can generate errors for some stupid reason
                 # in both oracle and mysql.
                 entry = {}
                 for index in xrange(0,len(descriptions)):
-                    # WARNING: Oracle returns table names in CAP!
                     if type(i[index]) == unicode:
-                        entry[str(descriptions[index].lower())] = str(i[index])
+                        entry[descriptions[index]] = str(i[index])
                     else:
-                        entry[str(descriptions[index].lower())] = i[index]
+                        entry[descriptions[index]] = i[index]
 
                 dictOut.append(entry)
 
@@ -86,6 +86,45 @@ class DBFormatter(WMObject):
 
         return dictOut
 
+    def iterKeys(self, result):
+        """
+        _iterKeys_
+
+        Return the lower case column names of a result as a tuple, it's
+        shared by all the rows that iterFormat returns.
+        """
+        for r in result:
+            if r.keys:
+                return tuple([str(x.lower()) for x in r.keys])
+        return ()
+
+    def iterFormat(self, result):
+        """
+        _iterFormat_
+
+        Generator version of format, yields each record as a tuple while the
+        result is read.  Use it with processData(..., stream = True) to go
+        through large results without holding them in memory, the column
+        names are given by iterKeys.
+        """
+        for r in result:
+            try:
+                for row in r:
+                    yield tuple(row)
+            finally:
+                r.close()
+
+    def iterFormatDict(self, result):
+        """
+        _iterFormatDict_
+
+        Generator version of formatDict, yields a dictionary for each record
+        while the result is read.
+        """
+        keys = self.iterKeys(result)
+        for row in self.iterFormat(result):
+            yield dict(zip(keys, [str(x) if type(x) == unicode else x for x in row]))
+
     def formatOneDict(self, result):
         """
         Return a dictionary representing the first record
@@ -95,10 +134,11 @@ class DBFormatter(WMObject):
 
         r = result[0]
         description = map(lambda x: str(x).lower(), r.keys)
-        if len(r.data) < 1:
+        row = r.fetchone()
+        if len(row) < 1:
             return {}
 
-        return dict(list(zip(description, r.fetchone())))
+        return dict(list(zip(description, row)))
 
 
     def formatCursor(self, cursor, size=10):
@@ -128,6 +168,35 @@ class DBFormatter(WMObject):
         return result
 
 
+    def processInClause(self, sql, values, conn = None, transaction = False,
+                        chunkSize = 500, binds = None):
+        """
+        _processInClause_
+
+        Run a query that selects on a list of values with an IN clause, so
+        many values only take a few queries instead of one query each.
+        The sql must have a %s in place of the list, the values are bound
+        as :in_0, :in_1, ...  The values are split in chunks of chunkSize,
+        Oracle doesn't allow more than 1000 expressions in a list.
+        binds holds any other bind variables of the sql.
+        """
+        values = list(values)
+        sqlList = []
+        bindList = []
+        for start in xrange(0, len(values), chunkSize):
+            chunk = values[start:start + chunkSize]
+            names = ["in_%i" % i for i in xrange(len(chunk))]
+            sqlList.append(sql % ", ".join([":%s" % x for x in names]))
+            chunkBinds = dict(zip(names, chunk))
+            if binds:
+                chunkBinds.update(binds)
+            bindList.append(chunkBinds)
+
+        if not sqlList:
+            return []
+        return self.dbi.processData(sqlList, bindList, conn = conn,
+                                    transaction = transaction)
+
     def getBinds(self, **kwargs):
         binds = {}
         for i in kwargs.keys():
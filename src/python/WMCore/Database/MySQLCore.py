@@ -6,6 +6,7 @@ Handle bind variable parsing for MySQL.
 """
 
 import copy
+import operator
 
 from WMCore.Database.DBCore import DBInterface
 from WMCore.Database.ResultSet import ResultSet
@@ -39,6 +40,19 @@ def stringLengthCompare(a, b):
         return 1
 
 class MySQLInterface(DBInterface):
+    """
+    _MySQLInterface_
+
+    DBInterface that rewrites the Oracle style :bind_name variables for
+    MySQL.  The rewritten SQL and bind order are kept per statement and set
+    of bind names, the same statements are run over and over.
+    """
+    maxSubstitutionPlans = 1000
+
+    def __init__(self, logger, engine):
+        DBInterface.__init__(self, logger, engine)
+        self.substitutionPlans = {}
+
     def substitute(self, origSQL, origBindsList):
         """
         _substitute_
@@ -65,6 +79,26 @@ class MySQLInterface(DBInterface):
         origBindsList = self.makelist(origBindsList)
         origBind = origBindsList[0]
 
+        key = (origSQL, frozenset(origBind.keys()))
+        plan = self.substitutionPlans.get(key)
+        if plan is None:
+            plan = self.buildSubstitutionPlan(origSQL, origBind.keys())
+            if len(self.substitutionPlans) >= self.maxSubstitutionPlans:
+                self.substitutionPlans.clear()
+            self.substitutionPlans[key] = plan
+
+        updatedSQL, getBindVars = plan
+        return (updatedSQL, map(getBindVars, origBindsList))
+
+    def buildSubstitutionPlan(self, origSQL, bindVarNames):
+        """
+        _buildSubstitutionPlan_
+
+        Rewrite the :bind_name variables in the SQL as %s and work out the
+        order the bind values have to be passed in.  Returns the rewritten
+        SQL and a function that turns a bind dictionary into a tuple of
+        values in that order.
+        """
         bindVarPositionList = []
         updatedSQL = copy.copy(origSQL)
 
@@ -73,16 +107,17 @@ class MySQLInterface(DBInterface):
         # variables: RELEASE_VERSION and RELEASE_VERSION_ID the former will
         # match against the latter, causing problems.  We'll sort the variable
         # names by length to guard against this.
-        bindVarNames = origBind.keys()
+        bindVarNames = list(bindVarNames)
         bindVarNames.sort(stringLengthCompare)
 
+        lowerSQL = origSQL.lower()
         bindPositions = {}
         for bindName in bindVarNames:
             searchPosition = 0
 
             while True:
-                bindPosition = origSQL.lower().find(":%s" % bindName.lower(),
-                                                    searchPosition)
+                bindPosition = lowerSQL.find(":%s" % bindName.lower(),
+                                             searchPosition)
                 if bindPosition == -1:
                     break
 
@@ -104,16 +139,17 @@ class MySQLInterface(DBInterface):
                 updatedSQL = left + "%s" + right
 
         bindVarPositionList.sort(bindVarCompare)
+        bindOrder = [x[0] for x in bindVarPositionList]
 
-        mySQLBindVarsList = []
-        for origBind in origBindsList:
-            mySQLBindVars = []
-            for bindVarPosition in bindVarPositionList:
-                mySQLBindVars.append(origBind[bindVarPosition[0]])
-
-            mySQLBindVarsList.append(tuple(mySQLBindVars))
+        if len(bindOrder) == 0:
+            getBindVars = lambda bind: ()
+        elif len(bindOrder) == 1:
+            bindName = bindOrder[0]
+            getBindVars = lambda bind: (bind[bindName],)
+        else:
+            getBindVars = operator.itemgetter(*bindOrder)
 
-        return (updatedSQL, mySQLBindVarsList)
+        return (updatedSQL, getBindVars)
 
     def executebinds(self, s = None, b = None, connection = None,
                      returnCursor = False):
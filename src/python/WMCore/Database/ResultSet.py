@@ -4,6 +4,9 @@ _ResultSet_
 A class to read in a SQLAlchemy result proxy and hold the data, such that the
 SQLAlchemy result sets (aka cursors) can be closed. Make this class look as much
 like the SQLAlchemy class to minimise the impact of adding this class.
+
+StreamingResultSet keeps the result proxies open instead and reads the rows
+in batches, for results too large to hold in memory.
 """
 
 
@@ -28,6 +31,9 @@ class ResultSet:
     def fetchall(self):
         return self.data
 
+    def __iter__(self):
+        return iter(self.data)
+
     def add(self, resultproxy):
 
         myThread = threading.currentThread()
@@ -41,3 +47,124 @@ class ResultSet:
                 self.data.append(r)
 
         return
+
+
+class StreamingResultSet(object):
+    """
+    _StreamingResultSet_
+
+    Read the rows of one or more select statements in fetchmany batches
+    instead of copying them all into a list.  The statements are run one
+    after the other as the rows are read and must return the same columns.
+    If no connection is given one is taken from the pool when the first
+    statement runs and returned when the last row has been read or the
+    result set is closed.  The statements run with the stream_results
+    execution option, so drivers like MySQLdb use a server side cursor
+    instead of buffering the whole result on the client.
+    """
+    def __init__(self, dbi, statements, conn = None, size = 1000):
+        self.dbi = dbi
+        self.statements = iter(statements)
+        self.conn = conn
+        self.size = size
+        self.connection = None
+        self.streamConnection = None
+        self.proxy = None
+        self.closed = False
+        self._keys = None
+
+    def _nextProxy(self):
+        """
+        _nextProxy_
+
+        Run the next statement, return False when there are none left.
+        """
+        if self.proxy is not None:
+            self.proxy.close()
+            self.proxy = None
+
+        for sql, binds in self.statements:
+            proxy = self.dbi.executebinds(sql, binds, connection = self._streamConnection(),
+                                          returnCursor = True)
+            if proxy.closed or not proxy.returns_rows:
+                proxy.close()
+                continue
+            if self._keys is None:
+                if isinstance(proxy.keys, list):
+                    self._keys = list(proxy.keys)
+                else:
+                    self._keys = list(proxy.keys())
+            self.proxy = proxy
+            return True
+
+        self.close()
+        return False
+
+    def _streamConnection(self):
+        """
+        _streamConnection_
+
+        The connection to run the statements on, asking for streamed results
+        where SQLAlchemy supports execution options.
+        """
+        if self.streamConnection is None:
+            if self.connection is None:
+                self.connection = self.conn or self.dbi.connection()
+            if hasattr(self.connection, "execution_options"):
+                self.streamConnection = self.connection.execution_options(stream_results = True)
+            else:
+                self.streamConnection = self.connection
+        return self.streamConnection
+
+    @property
+    def keys(self):
+        if self._keys is None and not self.closed:
+            if not self._nextProxy():
+                return []
+        return self._keys or []
+
+    def fetchmany(self, size = None):
+        """
+        _fetchmany_
+
+        Return the next batch of rows, an empty list once they have all
+        been read.
+        """
+        size = size or self.size
+        while not self.closed:
+            if self.proxy is None and not self._nextProxy():
+                break
+            rows = self.proxy.fetchmany(size)
+            if rows:
+                return rows
+            self.proxy.close()
+            self.proxy = None
+        return []
+
+    def __iter__(self):
+        while True:
+            rows = self.fetchmany()
+            if not rows:
+                return
+            for row in rows:
+                yield row
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        if rows:
+            return rows[0]
+        return []
+
+    def fetchall(self):
+        return list(self)
+
+    def close(self):
+        if self.proxy is not None:
+            self.proxy.close()
+            self.proxy = None
+        if self.connection is not None and self.conn is None:
+            self.connection.close()
+        self.connection = None
+        self.streamConnection = None
+        self.closed = True
+        return
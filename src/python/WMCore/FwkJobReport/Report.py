@@ -22,6 +22,7 @@ from WMCore.DataStructs.File import File
 from WMCore.DataStructs.Run import Run
 
 from WMCore.FwkJobReport.FileInfo import FileInfo
+from WMCore.FwkJobReport.ReportFormat import dumpReport, loadReport, isCompactReport
 from WMCore.WMException           import WMException
 from WMCore.WMExceptions import WM_JOB_ERROR_CODES
 
@@ -81,9 +82,9 @@ def addRunInfoToFile(fileSection, runInfo):
     """
     if not isinstance(runInfo, Run):
         for singleRun in runInfo:
-            setattr(fileSection.runs, str(singleRun.run), singleRun.lumis)
+            setattr(fileSection.runs, str(singleRun.run), list(singleRun.lumis))
     else:
-        setattr(fileSection.runs, str(runInfo.run), runInfo.lumis)
+        setattr(fileSection.runs, str(runInfo.run), list(runInfo.lumis))
     return
 
 def addAttributesToFile(fileSection, **attributes):
@@ -105,6 +106,7 @@ class Report:
         self.data = ConfigSection("FrameworkJobReport")
         self.data.steps = []
         self.data.workload = "Unknown"
+        self.partial = False
 
         if reportname:
             self.addStep(reportname=reportname)
@@ -342,22 +344,39 @@ class Report:
         """
         _persist_
 
-        Pickle this object and save it to disk.
+        Save this report to disk in the compact report format.
+        A report that was only partially loaded can't be saved.
         """
-        handle = open(filename, 'w')
-        cPickle.dump(self.data, handle)
-        handle.close()
+        if self.partial:
+            msg = "Report was loaded with only some of its sections, refusing to save it to %s" % filename
+            raise FwkJobReportException(msg)
+
+        handle = open(filename, 'wb')
+        try:
+            dumpReport(self.data, handle)
+        finally:
+            handle.close()
         return
 
-    def unpersist(self, filename, reportname=None):
+    def unpersist(self, filename, reportname=None, sections=None):
         """
         _unpersist_
 
-        Load a pickled FWJR from disk.
+        Load a FWJR from disk, either in the compact report format or
+        a legacy pickle.  If sections is a list of step section names
+        (errors, output, input, performance...) only those are loaded
+        from a compact report, the step attributes are always loaded.
         """
-        handle = open(filename, 'r')
-        self.data = cPickle.load(handle)
-        handle.close()
+        handle = open(filename, 'rb')
+        try:
+            if isCompactReport(handle):
+                self.data = loadReport(handle, sections)
+                self.partial = sections is not None
+            else:
+                self.data = cPickle.load(handle)
+                self.partial = False
+        finally:
+            handle.close()
 
         # old self.report (if it existed) became unattached
         if reportname:
@@ -675,13 +694,13 @@ class Report:
         reportSection = getattr(self.data, step, None)
         return reportSection
 
-    def load(self, filename):
+    def load(self, filename, sections=None):
         """
         _load_
 
         This just maps to unpersist
         """
-        self.unpersist(filename)
+        self.unpersist(filename, sections=sections)
         return
 
     def save(self, filename):
@@ -1352,6 +1371,21 @@ class Report:
 
         return
 
+    def setStepPSS(self, stepName, min, max, average):
+        """
+        _setStepPSS_
+
+        Set the Performance PSS information
+        """
+
+        reportStep = self.retrieveStep(stepName)
+        reportStep.performance.section_('PSSMemory')
+        reportStep.performance.PSSMemory.min = min
+        reportStep.performance.PSSMemory.max = max
+        reportStep.performance.PSSMemory.average = average
+
+        return
+
     def setStepPMEM(self, stepName, min, max, average):
         """
         _setStepPMEM_
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+"""
+_ReportFormat_
+
+Compact on-disk format for framework job reports.
+
+The report ConfigSection tree is flattened into plain tuples, so none of
+the ConfigSection bookkeeping (settings and children sets, parent
+references, class references) ends up in the file.  Each section directly
+below a step (errors, output, input, performance, ...) is stored as an
+independently compressed segment, and an index at the top of the file
+describes the report, the steps and where the segments are.  This makes
+it possible to materialise only the sections that are needed, for
+instance only the errors of every step.
+
+File layout:
+
+  MAGIC | version (1 byte) | index codec (1 byte) | index length (4 bytes)
+        | index | segments
+
+Files that do not start with MAGIC are legacy pickled reports.
+"""
+
+import cPickle
+import marshal
+import struct
+import zlib
+
+from WMCore.Configuration import ConfigSection
+
+MAGIC = "\x93WMFWJR"
+VERSION = 1
+
+_header = struct.Struct(">BcI")
+
+_MARSHAL = "m"
+_PICKLE = "p"
+
+
+class ReportFormatException(Exception):
+    """
+    _ReportFormatException_
+
+    The file is not a compact report or it is corrupt.
+    """
+    pass
+
+
+def flattenSection(section):
+    """
+    _flattenSection_
+
+    Turn a ConfigSection tree into nested tuples of
+    (name, documentation, docstrings, settings, children)
+    """
+    settings = []
+    children = []
+    for attr in section._internal_settings:
+        value = getattr(section, attr)
+        if attr in section._internal_children:
+            children.append((attr, flattenSection(value)))
+        else:
+            settings.append((attr, value))
+
+    return (section._internal_name, section._internal_documentation,
+            section._internal_docstrings, settings, children)
+
+
+def buildSection(flatSection, parent=None):
+    """
+    _buildSection_
+
+    Rebuild a ConfigSection tree from the output of flattenSection.
+    The attributes are set directly, they were already checked when the
+    report was written.
+    """
+    name, documentation, docstrings, settings, children = flatSection
+
+    section = ConfigSection.__new__(ConfigSection)
+    content = section.__dict__
+    content.update(settings)
+    childNames = set()
+    for childName, flatChild in children:
+        content[childName] = buildSection(flatChild, section)
+        childNames.add(childName)
+
+    content["_internal_documentation"] = documentation
+    content["_internal_name"] = name
+    content["_internal_settings"] = set(key for key, _ in settings) | childNames
+    content["_internal_docstrings"] = docstrings
+    content["_internal_children"] = childNames
+    content["_internal_parent_ref"] = parent
+    return section
+
+
+def _encode(value):
+    """
+    _encode_
+
+    Serialise and compress a flattened section. marshal is used unless the
+    section holds something marshal cannot handle (callables).
+    """
+    try:
+        return _MARSHAL, zlib.compress(marshal.dumps(value, 2))
+    except ValueError:
+        return _PICKLE, zlib.compress(cPickle.dumps(value, cPickle.HIGHEST_PROTOCOL))
+
+
+def _decode(codec, payload):
+    """
+    _decode_
+
+    Reverse of _encode
+    """
+    payload = zlib.decompress(payload)
+    if codec == _MARSHAL:
+        return marshal.loads(payload)
+    return cPickle.loads(payload)
+
+
+def dumpReport(data, handle):
+    """
+    _dumpReport_
+
+    Write the report ConfigSection data to the open file handle.
+    """
+    name, documentation, docstrings, settings, _ = flattenSection(data)
+    root = (name, documentation, docstrings, settings, [])
+
+    steps = []
+    segments = []
+    offset = 0
+    for stepName in data._internal_children:
+        step = getattr(data, stepName)
+        sectionName, stepDoc, stepDocstrings, stepSettings, stepChildren = flattenSection(step)
+        segmentIndex = []
+        for childName, flatChild in stepChildren:
+            codec, payload = _encode(flatChild)
+            segmentIndex.append((childName, codec, offset, len(payload)))
+            segments.append(payload)
+            offset += len(payload)
+        steps.append((stepName, (sectionName, stepDoc, stepDocstrings, stepSettings, []),
+                      segmentIndex))
+
+    codec, index = _encode((root, steps))
+
+    handle.write(MAGIC)
+    handle.write(_header.pack(VERSION, codec, len(index)))
+    handle.write(index)
+    for payload in segments:
+        handle.write(payload)
+    return
+
+
+def isCompactReport(handle):
+    """
+    _isCompactReport_
+
+    Check whether the open file starts with the compact report header.
+    The file position is restored.
+    """
+    position = handle.tell()
+    magic = handle.read(len(MAGIC))
+    handle.seek(position)
+    return magic == MAGIC
+
+
+def loadReport(handle, sections=None):
+    """
+    _loadReport_
+
+    Read a compact report from the open file handle and return the report
+    ConfigSection data. If sections is given only those sections of each
+    step are materialised, the step attributes (status, times, ...) are
+    always available.
+    """
+    if handle.read(len(MAGIC)) != MAGIC:
+        raise ReportFormatException("File is not a compact job report")
+    try:
+        version, codec, indexLength = _header.unpack(handle.read(_header.size))
+    except struct.error:
+        raise ReportFormatException("Truncated job report header")
+    if version > VERSION:
+        raise ReportFormatException("Unsupported job report format version %i" % version)
+
+    try:
+        root, steps = _decode(codec, handle.read(indexLength))
+    except (zlib.error, ValueError, EOFError, cPickle.UnpicklingError):
+        raise ReportFormatException("Corrupt job report index")
+    dataStart = handle.tell()
+
+    data = buildSection(root)
+    content = data.__dict__
+    for stepName, flatStep, segmentIndex in steps:
+        step = buildSection(flatStep, data)
+        stepContent = step.__dict__
+        for childName, codec, offset, length in segmentIndex:
+            if sections is not None and childName not in sections:
+                continue
+            handle.seek(dataStart + offset)
+            try:
+                flatChild = _decode(codec, handle.read(length))
+            except (zlib.error, ValueError, EOFError, cPickle.UnpicklingError):
+                raise ReportFormatException("Corrupt section %s.%s in job report" % (stepName, childName))
+            stepContent[childName] = buildSection(flatChild, step)
+            step._internal_children.add(childName)
+            step._internal_settings.add(childName)
+
+        content[stepName] = step
+        data._internal_children.add(stepName)
+        data._internal_settings.add(stepName)
+
+    return data
@@ -11,22 +11,80 @@ from __future__ import print_function
 
 import os
 import re
+import copy
 import logging
 import xml.parsers.expat
 
 from WMCore.FwkJobReport import Report
 from WMCore.DataStructs.Run import Run
-from WMCore.Algorithms.ParseXMLFile import Node, xmlFileToNode, coroutine
+from WMCore.Algorithms.ParseXMLFile import Node, expat_parse, coroutine
 
-def reportBuilder(nodeStruct, report, target):
+# Elements under a File or InputFile whose children are not kept as nodes,
+# the lumi sections of each run are collected straight into a list and the
+# branch names are not used.
+COLLECTED_ELEMENTS = {"Runs": "Run", "Branches": None}
+
+@coroutine
+def reportStreamer(report, target):
     """
-    _reportBuilder_
+    _reportStreamer_
 
-    Driver for coroutine pipe for building reports from the Node
-    structure.
+    Fed with the expat events from expat_parse, builds the Node structure
+    of one element of the FrameworkJobReport at a time and sends it to the
+    target as soon as the element is closed, so the full document is never
+    held in memory. Lumi sections are gathered into the lumis list of their
+    Run node instead of being turned into nodes.
     """
-    for node in nodeStruct.children:
-        target.send((report, node))
+    nodeStack = []
+    charCache = []
+    while True:
+        event, value = (yield)
+        if event == "start":
+            charCache = []
+            name, attrs = value
+            depth = len(nodeStack)
+            parent = nodeStack[-1] if nodeStack else None
+            if depth == 0:
+                if name != "FrameworkJobReport":
+                    print("Not Handling: ", name)
+                    #TODO: throw
+                    nodeStack.append(None)
+                else:
+                    nodeStack.append(Node(name, {}))
+            elif parent is None:
+                # Inside an element we are not interested in
+                nodeStack.append(None)
+            elif getattr(parent, "lumis", None) is not None:
+                if "ID" in attrs:
+                    parent.lumis.append(int(str(attrs["ID"])))
+                nodeStack.append(None)
+            elif getattr(parent, "collected", False):
+                if COLLECTED_ELEMENTS[parent.name] == name:
+                    newnode = Node(name, attrs)
+                    newnode.lumis = []
+                    parent.children.append(newnode)
+                    nodeStack.append(newnode)
+                else:
+                    nodeStack.append(None)
+            else:
+                newnode = Node(name, attrs)
+                if depth == 2 and name in COLLECTED_ELEMENTS and \
+                       parent.name in ("File", "InputFile"):
+                    newnode.collected = True
+                if depth > 1:
+                    parent.children.append(newnode)
+                nodeStack.append(newnode)
+
+        elif event == "text":
+            charCache.append(value)
+
+        else: # end
+            node = nodeStack.pop()
+            if node is not None:
+                node.text = str(''.join(charCache)).strip()
+                if len(nodeStack) == 1:
+                    target.send((report, node))
+            charCache = []
 
 @coroutine
 def reportDispatcher(targets):
@@ -38,30 +96,11 @@ def reportDispatcher(targets):
     """
     while True:
         report, node = (yield)
-        if node.name != "FrameworkJobReport":
-            print("Not Handling: ", node.name)
-            #TODO: throw
-            continue
-
-        for subnode in node.children:
-            if subnode.name == "File":
-                targets['File'].send( (report, subnode) )
-            elif subnode.name == "InputFile":
-                targets['InputFile'].send( (report, subnode) )
-            elif subnode.name == "AnalysisFile":
-                targets['AnalysisFile'].send( (report, subnode) )
-            elif subnode.name == "PerformanceReport":
-                targets['PerformanceReport'].send( (report, subnode))
-            elif subnode.name == "FrameworkError":
-                targets['FrameworkError'].send( (report, subnode) )
-            elif subnode.name == "SkippedFile":
-                targets['SkippedFile'].send( (report, subnode) )
-            elif subnode.name == "FallbackAttempt":
-                targets['FallbackAttempt'].send( (report, subnode) )
-            elif subnode.name == "SkippedEvent":
-                targets['SkippedEvent'].send( (report, subnode) )
-            else:
-                setattr(report.report.parameters, subnode.name, subnode.text)
+        handler = targets.get(node.name, None)
+        if handler is None:
+            setattr(report.report.parameters, node.name, node.text)
+        else:
+            handler.send( (report, node) )
 
 @coroutine
 def fileHandler(targets):
@@ -75,22 +114,24 @@ def fileHandler(targets):
     while True:
         report, node = (yield)
         moduleName = None
-        moduleNode = [ x for x in node.children if x.name == "ModuleLabel"][0]
-        moduleName = moduleNode.text
-
-        moduleRef = report.addOutputModule(moduleName)
-        fileRef = report.addOutputFile(moduleName)
         fileAttrs = {}
+        subnodes = []
         for subnode in node.children:
-            if subnode.name == "Inputs":
-                targets['Inputs'].send( (fileRef, subnode) )
-            elif subnode.name == "Runs":
-                targets['Runs'].send( (fileRef, subnode) )
-            elif subnode.name == "Branches":
-                targets['Branches'].send( (fileRef, subnode) )
+            if subnode.name in targets:
+                subnodes.append(subnode)
             else:
+                if subnode.name == "ModuleLabel" and moduleName is None:
+                    moduleName = subnode.text
                 fileAttrs[subnode.name] = subnode.text
 
+        if moduleName is None:
+            moduleName = fileAttrs["ModuleLabel"]
+
+        report.addOutputModule(moduleName)
+        fileRef = report.addOutputFile(moduleName)
+        for subnode in subnodes:
+            targets[subnode.name].send( (fileRef, subnode) )
+
         Report.addAttributesToFile(fileRef, lfn = fileAttrs["LFN"],
                                    pfn = fileAttrs["PFN"], catalog = fileAttrs["Catalog"],
                                    module_label = fileAttrs["ModuleLabel"],
@@ -99,8 +140,6 @@ def fileHandler(targets):
                                    events = int(fileAttrs["TotalEvents"]),
                                    branch_hash = fileAttrs["BranchHash"])
 
-        [fileRef]
-
 @coroutine
 def inputFileHandler(targets):
     """
@@ -113,20 +152,24 @@ def inputFileHandler(targets):
     while True:
         report, node = (yield)
         moduleName = None
-        moduleNode = [ x for x in node.children if x.name == "ModuleLabel"][0]
-        moduleName = moduleNode.text
-
-        moduleRef = report.addInputSource(moduleName)
-        fileRef = report.addInputFile(moduleName)
         fileAttrs = {}
+        subnodes = []
         for subnode in node.children:
-            if subnode.name == "Runs":
-                targets['Runs'].send( (fileRef, subnode) )
-            elif subnode.name == "Branches":
-                targets['Branches'].send( (fileRef, subnode) )
+            if subnode.name in ("Runs", "Branches"):
+                subnodes.append(subnode)
             else:
+                if subnode.name == "ModuleLabel" and moduleName is None:
+                    moduleName = subnode.text
                 fileAttrs[subnode.name] = subnode.text
 
+        if moduleName is None:
+            moduleName = fileAttrs["ModuleLabel"]
+
+        report.addInputSource(moduleName)
+        fileRef = report.addInputFile(moduleName)
+        for subnode in subnodes:
+            targets[subnode.name].send( (fileRef, subnode) )
+
         Report.addAttributesToFile(fileRef, lfn = fileAttrs["LFN"],
                                    pfn = fileAttrs["PFN"], catalog = fileAttrs["Catalog"],
                                    module_label = fileAttrs["ModuleLabel"],
@@ -134,8 +177,6 @@ def inputFileHandler(targets):
                                    input_source_class = fileAttrs["InputSourceClass"],
                                    events = int(fileAttrs["EventsRead"]))
 
-        [fileRef]
-
 @coroutine
 def analysisFileHandler(targets):
     """
@@ -220,23 +261,18 @@ def runHandler():
 
     Create a WMCore.DataStructs.Run object for each run and call the
     addRunInfoToFile() function to add the run information to the file
-    section.
+    section. The lumi sections of each run are collected by the
+    reportStreamer in the lumis list of the Run node.
     """
     while True:
         fileSection, node = (yield)
         for subnode in node.children:
-            if subnode.name == "Run":
-                runId = subnode.attrs.get("ID", None)
-                if runId == None: continue
-
-                lumis = [ int(lumi.attrs['ID'])
-                          for lumi in subnode.children
-                          if "ID" in lumi.attrs]
+            runId = subnode.attrs.get("ID", None)
+            if runId == None: continue
 
-                runInfo = Run(runNumber = runId)
-                runInfo.lumis.extend(lumis)
+            runInfo = Run(runId, *subnode.lumis)
 
-                Report.addRunInfoToFile(fileSection, runInfo)
+            Report.addRunInfoToFile(fileSection, runInfo)
 
 @coroutine
 def branchHandler():
@@ -285,6 +321,12 @@ def inputAssocHandler():
               for subnode in inputnode.children]
             Report.addInputToFile(fileSection, data["LFN"], data['PFN'])
 
+# Performance metric to (handler, report section)
+PERFORMANCE_METRICS = {"Timing": ("CPU", "cpu"),
+                       "SystemMemory": ("Memory", "memory"),
+                       "ApplicationMemory": ("Memory", "memory"),
+                       "StorageStatistics": ("Storage", "storage")}
+
 @coroutine
 def perfRepHandler(targets):
     """
@@ -302,15 +344,8 @@ def perfRepHandler(targets):
         perfRep.section_("storage")
         for subnode in node.children:
             metric = subnode.attrs.get('Metric', None)
-            if metric == "Timing":
-                targets['CPU'].send( (perfRep.cpu, subnode) )
-            elif metric == "SystemMemory" or metric == "ApplicationMemory":
-                targets['Memory'].send( (perfRep.memory, subnode) )
-            elif metric == "StorageStatistics":
-                targets['Storage'].send( (perfRep.storage, subnode) )
-            else:
-                targets['PerformanceSummary'].send( (perfRep.summaries,
-                                                     subnode) )
+            target, section = PERFORMANCE_METRICS.get(metric, ('PerformanceSummary', 'summaries'))
+            targets[target].send( (getattr(perfRep, section), subnode) )
 
 
 
@@ -490,10 +525,11 @@ def xmlToJobReport(reportInstance, xmlFile):
     parse the XML file and insert the information into the
     Report instance provided
 
-    """
-    # read XML, build node structure
-    node = xmlFileToNode(xmlFile)
+    The XML is streamed and each element of the report is handled as soon
+    as it has been read, if the XML turns out to be malformed the report
+    is restored to what it was before parsing.
 
+    """
     #  //
     # // Set up coroutine pipeline
     #//
@@ -522,12 +558,18 @@ def xmlToJobReport(reportInstance, xmlFile):
         }
 
     #  //
-    # // Feed pipeline with node structure and report result instance
+    # // Feed pipeline with the XML events and report result instance
     #//
-    reportBuilder(
-        node, reportInstance,
-        reportDispatcher(dispatchers)
-        )
+    reportData = copy.deepcopy(reportInstance.data)
+    with open(xmlFile, 'r') as reportFile:
+        try:
+            expat_parse(reportFile,
+                        reportStreamer(reportInstance,
+                                       reportDispatcher(dispatchers)))
+        except xml.parsers.expat.ExpatError:
+            reportInstance.data = reportData
+            if hasattr(reportInstance, "reportname"):
+                reportInstance.report = getattr(reportData, reportInstance.reportname)
+            raise
 
     return
-childrenMatching = lambda node, nname: [x for x in node.children if x.name == nname]
@@ -9,7 +9,7 @@ import threading
 
 from WMCore.DataStructs.WMObject import WMObject
 from WMCore.Services.UUID        import makeUUID
-from WMCore.WMBS.File            import File as WMBSFile
+from WMCore.WMBS.File            import loadFilesByID
 from WMCore.DAOFactory           import DAOFactory
 
 
@@ -322,8 +322,6 @@ class JobFactory(WMObject):
             if isinstance(keys, set):
                 # If it's a set, handle it
                 keys = list(keys)
-        files       = set()
-
 
         while len(rawResults) < size and len(self.proxies) > 0:
             length = size - len(rawResults)
@@ -342,25 +340,12 @@ class JobFactory(WMObject):
         fileIDs = list(set([x['fileid'] for x in fileList]))
 
         myThread = threading.currentThread()
-        fileInfoAct  = self.daoFactory(classname = "Files.GetForJobSplittingByID")
-        fileInfoDict = fileInfoAct.execute(file = fileIDs,
-                                           conn = myThread.transaction.conn,
-                                           transaction = True)
-
-        getLocAction = self.daoFactory(classname = "Files.GetLocationBulk")
-        getLocDict   = getLocAction.execute(files = fileIDs,
-                                            conn = myThread.transaction.conn,
-                                            transaction = True)
-
-        for fID in fileIDs:
-            fl = WMBSFile(id = fID)
-            fl.update(fileInfoDict[fID])
-            locations = getLocDict.get((fID), [])
-            for loc in locations:
-                fl.setLocation(loc, immediateSave = False)
-            files.add(fl)
-
-        return files
+        fileDict = loadFilesByID(self.daoFactory, fileIDs, loadChecksums = False,
+                                 doingJobSplitting = True, loadLocations = True,
+                                 conn = myThread.transaction.conn,
+                                 transaction = True)
+
+        return set(fileDict.values())
 
     def formatDict(self, results, keys):
         """
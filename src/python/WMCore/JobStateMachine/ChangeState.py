@@ -57,6 +57,67 @@ def discardConflictingDocument(couchDbInstance, data, result):
         logging.error("Error: %s" % str(ex))
         return result
 
+def addStateTransition(jobDocument, transition):
+    """
+    _addStateTransition_
+
+    Append a state transition to a job document, this does the same as the
+    stateTransition update handler in the JobDump couchapp.
+    """
+    states = jobDocument.setdefault("states", {})
+    maxKey = 0
+    for key in states.keys():
+        maxKey = max(maxKey, int(key))
+    states[str(maxKey + 1)] = transition
+    return jobDocument
+
+def bulkStateTransition(couchDbInstance, transitions, batchSize = 500, maxRetries = 3):
+    """
+    _bulkStateTransition_
+
+    Record state transitions for documents that already exist in couch.
+    transitions is a dictionary with the couch document id as key and the
+    transition dictionary as value. The documents are fetched through
+    _all_docs and written back through _bulk_docs in batches of batchSize,
+    documents that conflict are fetched and updated again up to maxRetries
+    times. Return the list of document ids that could not be updated.
+    """
+    uri = '/%s/_bulk_docs/' % couchDbInstance.name
+    pending = transitions
+    failed = []
+
+    for _ in range(maxRetries + 1):
+        if not pending:
+            break
+
+        conflicts = {}
+        docIDs = pending.keys()
+        for start in range(0, len(docIDs), batchSize):
+            batchIDs = docIDs[start:start + batchSize]
+            result = couchDbInstance.allDocs(options = {"include_docs": True},
+                                             keys = batchIDs)
+            docs = []
+            for row in result["rows"]:
+                jobDocument = row.get("doc", None)
+                if jobDocument is None:
+                    # Missing or deleted document, the update handler
+                    # creates it from scratch
+                    jobDocument = {"_id": row["key"], "states": {}}
+                docs.append(addStateTransition(jobDocument, pending[row["key"]]))
+
+            retval = couchDbInstance.post(uri, {"docs": docs})
+            for docResult in retval:
+                if docResult.get("error", None) == "conflict":
+                    conflicts[docResult["id"]] = pending[docResult["id"]]
+                elif "error" in docResult:
+                    logging.error("Couldn't record state transition for document %s: %s" % (docResult["id"],
+                                                                                             docResult.get("reason", docResult["error"])))
+                    failed.append(docResult["id"])
+        pending = conflicts
+
+    failed.extend(pending.keys())
+    return failed
+
 
 class ChangeState(WMObject, WMConnectionBase):
     """
@@ -94,6 +155,9 @@ class ChangeState(WMObject, WMConnectionBase):
         self.updateLocationDAO = self.daofactory("Jobs.UpdateLocation")
 
         self.maxUploadedInputFiles = getattr(self.config.JobStateMachine, 'maxFWJRInputFiles', 1000)
+        self.bulkTransitions = getattr(self.config.JobStateMachine, 'bulkStateTransition', False)
+        self.transitionBatchSize = getattr(self.config.JobStateMachine, 'stateTransitionBatchSize', 500)
+        self.transitionRetries = getattr(self.config.JobStateMachine, 'stateTransitionRetries', 3)
         return
 
     def _connectDatabases(self):
@@ -202,6 +266,7 @@ class ChangeState(WMObject, WMConnectionBase):
 
         timestamp = int(time.time())
         couchRecordsToUpdate = []
+        transitionsToRecord = {}
 
         for job in jobs:
             couchDocID = job.get("couch_record", None)
@@ -265,6 +330,11 @@ class ChangeState(WMObject, WMConnectionBase):
                 couchRecordsToUpdate.append({"jobid": job["id"],
                                              "couchid": jobDocument["_id"]})
                 self.jobsdatabase.queue(jobDocument, callback = discardConflictingDocument)
+            elif self.bulkTransitions:
+                transitionsToRecord[couchDocID] = {"oldstate": oldstate,
+                                                   "newstate": newstate,
+                                                   "location": jobLocation,
+                                                   "timestamp": timestamp}
             else:
                 # We send a PUT request to the stateTransition update handler.
                 # Couch expects the parameters to be passed as arguments to in
@@ -427,6 +497,14 @@ class ChangeState(WMObject, WMConnectionBase):
                                      conn = self.getDBConn(),
                                      transaction = self.existingTransaction())
 
+        if len(transitionsToRecord) > 0:
+            failedDocs = bulkStateTransition(self.jobsdatabase, transitionsToRecord,
+                                             batchSize = self.transitionBatchSize,
+                                             maxRetries = self.transitionRetries)
+            if len(failedDocs) > 0:
+                logging.error("Failed to record the %s -> %s transition for %i jobs in couch" % (oldstate, newstate,
+                                                                                                len(failedDocs)))
+
         self.jobsdatabase.commit(callback = discardConflictingDocument)
         self.fwjrdatabase.commit(callback = discardConflictingDocument)
         self.jsumdatabase.commit()
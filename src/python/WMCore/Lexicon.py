@@ -5,6 +5,10 @@ _Lexicon_
 A set of regular expressions  and other tests that we can use to validate input
 to other classes. If a test fails an AssertionError should be raised, and
 handled appropriately by the client methods, on success returns True.
+
+The regular expressions are compiled once and kept in a registry, use
+validateMany to check many candidates at once without an exception for
+each failure.
 """
 
 import re
@@ -44,6 +48,36 @@ userProcDSParts = {
 
 STORE_RESULTS_LFN = '/store/results/%(physics_group)s/%(era)s/%(primDS)s/%(tier)s/%(secondary)s' % lfnParts
 
+# compiled regular expressions by pattern
+_compiledPatterns = {}
+
+# parsed LFN and LFN base parts, cleared when they get too many
+_parsedLFNParts = {}
+_parsedLFNBases = {}
+_maxParsed = 10000
+
+
+def compiled(regexp):
+    """
+    _compiled_
+
+    The compiled regular expression, compiled on first use
+    """
+    try:
+        return _compiledPatterns[regexp]
+    except KeyError:
+        pattern = _compiledPatterns[regexp] = re.compile(regexp)
+        return pattern
+
+
+def anyOf(regexps):
+    """
+    _anyOf_
+
+    A regular expression matching what any of regexps matches
+    """
+    return '|'.join('(?:%s)' % regexp for regexp in regexps)
+
 
 def DBSUser(candidate):
     """
@@ -267,6 +301,40 @@ def hnName(candidate):
     return check(validName, candidate)
 
 
+# the regular expressions an LFN can match, lfn tries them in this order
+LFN_REGEXPS = [
+    '/([a-z]+)/([a-z0-9]+)/([a-zA-Z0-9\-_]+)/([a-zA-Z0-9\-_]+)/([A-Z\-_]+)/([a-zA-Z0-9\-_]+)((/[0-9]+){3}){0,1}/([0-9]+)/([a-zA-Z0-9\-_]+).root',
+    '/([a-z]+)/([a-z0-9]+)/([a-z0-9]+)/([a-zA-Z0-9\-_]+)/([a-zA-Z0-9\-_]+)/([A-Z\-_]+)/([a-zA-Z0-9\-_]+)((/[0-9]+){3}){0,1}/([0-9]+)/([a-zA-Z0-9\-_]+).root',
+    '/store/(temp/)*(user|group)/(%(hnName)s|%(physics_group)s)/%(primDS)s/%(secondary)s/%(version)s/%(counter)s/%(root)s' % lfnParts,
+    '/store/(temp/)*(user|group)/(%(hnName)s|%(physics_group)s)/%(primDS)s/(%(subdir)s/)+%(root)s' % lfnParts,
+    # tier0
+    '/store/(backfill/[0-9]/){0,1}(t0temp/|unmerged/){0,1}(data|express|hidata)/%(era)s/%(primDS)s/%(tier)s/%(version)s/%(counter)s/%(counter)s/%(counter)s(/%(counter)s)?/%(root)s' % lfnParts,
+    # old style tier0
+    '/store/data/%(era)s/%(primDS)s/%(tier)s/%(version)s/%(counter)s/%(counter)s/%(counter)s/%(root)s' % lfnParts,
+    # store mc
+    '/store/mc/([a-zA-Z0-9\-_]+)/([a-zA-Z0-9\-_]+)/([a-zA-Z0-9\-_]+)/([a-zA-Z0-9\-_]+)(/([a-zA-Z0-9\-_]+))*/([a-zA-Z0-9\-_]+).root',
+    # LHE files
+    '/store/lhe/([0-9]+)/([a-zA-Z0-9\-_]+).lhe(.xz){0,1}',
+    # This is for future lhe LFN structure. Need to be tested.
+    '/store/lhe/%(primDS)s/%(secondary)s/([0-9]+)/([a-zA-Z0-9\-_]+).lhe(.xz){0,1}' % lfnParts,
+    # store results
+    '/store/results/%(physics_group)s/%(primDS)s/%(secondary)s/%(primDS)s/%(tier)s/%(secondary)s/%(counter)s/%(root)s' % lfnParts,
+    "%s/%s" % (STORE_RESULTS_LFN, '%(counter)s/%(root)s' % lfnParts)
+]
+
+# the regular expressions an LFN base can match, lfnBase tries them in this order
+LFNBASE_REGEXPS = [
+    '/([a-z]+)/([a-z0-9]+)/([a-zA-Z0-9\-_]+)/([a-zA-Z0-9\-_]+)/([A-Z\-_]+)/([a-zA-Z0-9\-_]+)',
+    '/([a-z]+)/([a-z0-9]+)/([a-z0-9]+)/([a-zA-Z0-9\-_]+)/([a-zA-Z0-9\-_]+)/([A-Z\-_]+)/([a-zA-Z0-9\-_]+)((/[0-9]+){3}){0,1}',
+    '/(store)/(temp/)*(user|group)/(%(hnName)s|%(physics_group)s)/%(primDS)s/%(secondary)s/%(version)s' % lfnParts,
+    # tier0
+    '/store/(backfill/[0-9]/){0,1}(t0temp/|unmerged/){0,1}(data|express|hidata)/%(era)s/%(primDS)s/%(tier)s/%(version)s/%(counter)s/%(counter)s/%(counter)s' % lfnParts,
+    STORE_RESULTS_LFN
+]
+
+_LFN_RE = compiled(anyOf(LFN_REGEXPS))
+_LFNBASE_RE = compiled(anyOf(LFNBASE_REGEXPS))
+
 def lfn(candidate):
     """
     Should be of the following form:
@@ -279,74 +347,10 @@ def lfn(candidate):
 
     Add for LHE files: /data/lhe/...
     """
-    regexp1 = '/([a-z]+)/([a-z0-9]+)/([a-zA-Z0-9\-_]+)/([a-zA-Z0-9\-_]+)/([A-Z\-_]+)/([a-zA-Z0-9\-_]+)((/[0-9]+){3}){0,1}/([0-9]+)/([a-zA-Z0-9\-_]+).root'
-    regexp2 = '/([a-z]+)/([a-z0-9]+)/([a-z0-9]+)/([a-zA-Z0-9\-_]+)/([a-zA-Z0-9\-_]+)/([A-Z\-_]+)/([a-zA-Z0-9\-_]+)((/[0-9]+){3}){0,1}/([0-9]+)/([a-zA-Z0-9\-_]+).root'
-    regexp3 = '/store/(temp/)*(user|group)/(%(hnName)s|%(physics_group)s)/%(primDS)s/%(secondary)s/%(version)s/%(counter)s/%(root)s' % lfnParts
-    regexp4 = '/store/(temp/)*(user|group)/(%(hnName)s|%(physics_group)s)/%(primDS)s/(%(subdir)s/)+%(root)s' % lfnParts
-
-    oldStyleTier0LFN = '/store/data/%(era)s/%(primDS)s/%(tier)s/%(version)s/%(counter)s/%(counter)s/%(counter)s/%(root)s' % lfnParts
-    tier0LFN = '/store/(backfill/[0-9]/){0,1}(t0temp/|unmerged/){0,1}(data|express|hidata)/%(era)s/%(primDS)s/%(tier)s/%(version)s/%(counter)s/%(counter)s/%(counter)s(/%(counter)s)?/%(root)s' % lfnParts
-
-    storeMcLFN = '/store/mc/([a-zA-Z0-9\-_]+)/([a-zA-Z0-9\-_]+)/([a-zA-Z0-9\-_]+)/([a-zA-Z0-9\-_]+)(/([a-zA-Z0-9\-_]+))*/([a-zA-Z0-9\-_]+).root'
-
-    storeResults2LFN = '/store/results/%(physics_group)s/%(primDS)s/%(secondary)s/%(primDS)s/%(tier)s/%(secondary)s/%(counter)s/%(root)s' % lfnParts
-
-    storeResultRootPart = '%(counter)s/%(root)s' % lfnParts
-    storeResultsLFN = "%s/%s" % (STORE_RESULTS_LFN, storeResultRootPart)
-
-    lheLFN1 = '/store/lhe/([0-9]+)/([a-zA-Z0-9\-_]+).lhe(.xz){0,1}'
-    # This is for future lhe LFN structure. Need to be tested.
-    lheLFN2 = '/store/lhe/%(primDS)s/%(secondary)s/([0-9]+)/([a-zA-Z0-9\-_]+).lhe(.xz){0,1}' % lfnParts
-
-    try:
-        return check(regexp1, candidate)
-    except AssertionError:
-        pass
-
-    try:
-        return check(regexp2, candidate)
-    except AssertionError:
-        pass
-
-    try:
-        return check(regexp3, candidate)
-    except AssertionError:
-        pass
-
-    try:
-        return check(regexp4, candidate)
-    except AssertionError:
-        pass
-
-    try:
-        return check(tier0LFN, candidate)
-    except AssertionError:
-        pass
-
-    try:
-        return check(oldStyleTier0LFN, candidate)
-    except AssertionError:
-        pass
-
-    try:
-        return check(storeMcLFN, candidate)
-    except AssertionError:
-        pass
-
-    try:
-        return check(lheLFN1, candidate)
-    except AssertionError:
-        pass
-
-    try:
-        return check(lheLFN2, candidate)
-    except AssertionError:
-        pass
-
-    try:
-        return check(storeResults2LFN, candidate)
-    except AssertionError:
-        return check(storeResultsLFN, candidate)
+    if _LFN_RE.match(candidate) is None:
+        # the error of the last of the regular expressions, as it always was
+        return check(LFN_REGEXPS[-1], candidate)
+    return True
 
 
 def lfnBase(candidate):
@@ -354,31 +358,9 @@ def lfnBase(candidate):
     As lfn above, but for doing the lfnBase
     i.e., for use in spec generation and parsing
     """
-    regexp1 = '/([a-z]+)/([a-z0-9]+)/([a-zA-Z0-9\-_]+)/([a-zA-Z0-9\-_]+)/([A-Z\-_]+)/([a-zA-Z0-9\-_]+)'
-    regexp2 = '/([a-z]+)/([a-z0-9]+)/([a-z0-9]+)/([a-zA-Z0-9\-_]+)/([a-zA-Z0-9\-_]+)/([A-Z\-_]+)/([a-zA-Z0-9\-_]+)((/[0-9]+){3}){0,1}'
-    regexp3 = '/(store)/(temp/)*(user|group)/(%(hnName)s|%(physics_group)s)/%(primDS)s/%(secondary)s/%(version)s' % lfnParts
-
-    tier0LFN = '/store/(backfill/[0-9]/){0,1}(t0temp/|unmerged/){0,1}(data|express|hidata)/%(era)s/%(primDS)s/%(tier)s/%(version)s/%(counter)s/%(counter)s/%(counter)s' % lfnParts
-
-    try:
-        return check(regexp1, candidate)
-    except AssertionError:
-        pass
-
-    try:
-        return check(regexp2, candidate)
-    except AssertionError:
-        pass
-
-    try:
-        return check(regexp3, candidate)
-    except AssertionError:
-        pass
-
-    try:
-        return check(tier0LFN, candidate)
-    except AssertionError:
-        return check(STORE_RESULTS_LFN, candidate)
+    if _LFNBASE_RE.match(candidate) is None:
+        return check(LFNBASE_REGEXPS[-1], candidate)
+    return True
 
 
 def userLfn(candidate):
@@ -430,50 +412,66 @@ def check(regexp, candidate, maxLength=None):
     if maxLength != None:
         assert len(candidate) <= maxLength, \
             "%s is longer then max length (%s) allowed" % (candidate, maxLength)
-    assert re.compile(regexp).match(candidate) != None, \
+    assert compiled(regexp).match(candidate) != None, \
         "'%s' does not match regular expression %s" % (candidate, regexp)
     return True
 
 
-def parseLFN(candidate):
+def validateMany(kind, candidates):
     """
-    _parseLFN_
+    _validateMany_
 
-    Take an LFN, return the component parts
+    Validate many candidates with one of the checks in this module, given by
+    name or as a function.  Returns a list of (candidate, error message)
+    for the candidates that failed, nothing is raised for them.
+    """
+    if callable(kind):
+        validator = kind
+    else:
+        validator = globals().get(kind)
+        if kind.startswith('_') or not callable(validator):
+            raise ValueError("No %s check in Lexicon" % kind)
+
+    failures = []
+    if validator in _fastValidators:
+        # one match for the valid ones, the check error for the others
+        pattern = _fastValidators[validator]
+        for candidate in candidates:
+            if pattern.match(candidate) is None:
+                try:
+                    validator(candidate)
+                except AssertionError as ex:
+                    failures.append((candidate, str(ex)))
+        return failures
+
+    for candidate in candidates:
+        try:
+            validator(candidate)
+        except AssertionError as ex:
+            failures.append((candidate, str(ex)))
+    return failures
+
+
+def _splitLFN(candidate, userFields, fields, baseLengths):
+    """
+    _splitLFN_
+
+    Split an LFN or LFN base in its parts, the base location is two or three
+    directories, followed by the given fields.  Returns the dictionary of the
+    parts and whether the fields took up all of the LFN.
     """
-
-    # First, make sure what we've gotten is a real LFN
-    lfn(candidate)
-
     parts = candidate.split('/')
-    final = {}
-
     if parts[0] == '':
         parts.remove('')
+
     if 'user' in parts[1:3] or 'group' in parts[1:3]:
+        fields = userFields
         if parts[1] in ['user', 'group']:
-            final['baseLocation'] = '/%s' % string.join(parts[:2], '/')
-            parts = parts[2:]
+            baseLength = 2
         else:
-            final['baseLocation'] = '/%s' % string.join(parts[:3], '/')
-            parts = parts[3:]
-
-        final['hnName'] = parts[0]
-        final['primaryDataset'] = parts[1]
-        final['secondaryDataset'] = parts[2]
-        final['processingVersion'] = parts[3]
-        final['lfnCounter'] = parts[4]
-        final['filename'] = parts[5]
-
-        return final
-
-    if len(parts) == 8:
-        # Then we have only two locations
-        final['baseLocation'] = '/%s' % string.join(parts[:2], '/')
-        parts = parts[2:]
-    elif len(parts) == 9:
-        final['baseLocation'] = '/%s' % string.join(parts[:3], '/')
-        parts = parts[3:]
+            baseLength = 3
+    elif len(parts) in baseLengths:
+        baseLength = baseLengths[len(parts)]
     else:
         # How did we end up here?
         # Something just went wrong
@@ -484,12 +482,46 @@ def parseLFN(candidate):
         msg += "Candidate: %s" % candidate
         raise WMException(msg)
 
-    final['acquisitionEra'] = parts[0]
-    final['primaryDataset'] = parts[1]
-    final['dataTier'] = parts[2]
-    final['processingVersion'] = parts[3]
-    final['lfnCounter'] = parts[4]
-    final['filename'] = parts[5]
+    final = {'baseLocation': '/%s' % string.join(parts[:baseLength], '/')}
+    for index, field in enumerate(fields):
+        final[field] = parts[baseLength + index]
+    return final, baseLength + len(fields) == len(parts)
+
+
+def parseLFN(candidate):
+    """
+    _parseLFN_
+
+    Take an LFN, return the component parts.  The parts before the counter
+    and file name are the same for all the files of a dataset, they are
+    remembered.
+    """
+
+    # First, make sure what we've gotten is a real LFN
+    lfn(candidate)
+
+    prefix, counter, filename = candidate.rsplit('/', 2)
+    if prefix in _parsedLFNParts:
+        final = dict(_parsedLFNParts[prefix])
+        final['lfnCounter'] = counter
+        final['filename'] = filename
+        return final
+
+    final, complete = _splitLFN(candidate,
+                                ['hnName', 'primaryDataset', 'secondaryDataset',
+                                 'processingVersion', 'lfnCounter', 'filename'],
+                                ['acquisitionEra', 'primaryDataset', 'dataTier',
+                                 'processingVersion', 'lfnCounter', 'filename'],
+                                {8: 2, 9: 3})
+    if complete:
+        # the counter and file name are the last parts, the others only
+        # depend on the prefix
+        if len(_parsedLFNParts) >= _maxParsed:
+            _parsedLFNParts.clear()
+        prefixParts = dict(final)
+        del prefixParts['lfnCounter']
+        del prefixParts['filename']
+        _parsedLFNParts[prefix] = prefixParts
 
     return final
 
@@ -500,53 +532,22 @@ def parseLFNBase(candidate):
 
     Return a meaningful dictionary with info from an LFNBase
     """
+    if candidate in _parsedLFNBases:
+        return dict(_parsedLFNBases[candidate])
 
     # First, make sure what we've gotten is a real LFNBase
     lfnBase(candidate)
 
-    parts = candidate.split('/')
-    final = {}
-
-    if parts[0] == '':
-        parts.remove('')
-
-    if 'user' in parts[1:3] or 'group' in parts[1:3]:
-        if parts[1] in ['user', 'group']:
-            final['baseLocation'] = '/%s' % string.join(parts[:2], '/')
-            parts = parts[2:]
-        else:
-            final['baseLocation'] = '/%s' % string.join(parts[:3], '/')
-            parts = parts[3:]
-
-        final['hnName'] = parts[0]
-        final['primaryDataset'] = parts[1]
-        final['secondaryDataset'] = parts[2]
-        final['processingVersion'] = parts[3]
-
-        return final
-
-    if len(parts) == 6:
-        # Then we have only two locations
-        final['baseLocation'] = '/%s' % string.join(parts[:2], '/')
-        parts = parts[2:]
-    elif len(parts) == 7:
-        final['baseLocation'] = '/%s' % string.join(parts[:3], '/')
-        parts = parts[3:]
-    else:
-        # How did we end up here?
-        # Something just went wrong
-        msg = """CRITICAL!  This machine has experienced a complete logic failure while parsing LFNs.\n
-        If you are a developer this indicates that you have changed the Lexicon LFN regexp functions without changing the parsing.\n
-        If you are an operator, this indicates that this machine is likely unstable.\n
-        All data should be backed up and the machine removed from production for examination.\n"""
-        msg += "Candidate: %s" % candidate
-        raise WMException(msg)
-
-    final['acquisitionEra'] = parts[0]
-    final['primaryDataset'] = parts[1]
-    final['dataTier'] = parts[2]
-    final['processingVersion'] = parts[3]
+    final, _ = _splitLFN(candidate,
+                         ['hnName', 'primaryDataset', 'secondaryDataset',
+                          'processingVersion'],
+                         ['acquisitionEra', 'primaryDataset', 'dataTier',
+                          'processingVersion'],
+                         {6: 2, 7: 3})
 
+    if len(_parsedLFNBases) >= _maxParsed:
+        _parsedLFNBases.clear()
+    _parsedLFNBases[candidate] = dict(final)
     return final
 
 
@@ -607,3 +608,10 @@ def primaryDatasetType(candidate):
         return True
     # to sync with the check() exception when it doesn't match
     raise AssertionError("Invalid primary dataset type : %s should be 'mc' or 'data' or 'test'" % candidate)
+
+
+# checks that are a single regular expression match for the valid candidates
+_fastValidators = {lfn: _LFN_RE,
+                   lfnBase: _LFNBASE_RE,
+                   dataset: compiled(DATASET_RE),
+                   searchdataset: compiled(SEARCHDATASET_RE)}
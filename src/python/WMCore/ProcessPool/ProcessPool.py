@@ -14,6 +14,10 @@ import os
 import threading
 import traceback
 import cPickle
+import marshal
+import struct
+import time
+import collections
 
 from logging.handlers import RotatingFileHandler
 
@@ -35,6 +39,152 @@ class ProcessPoolException(WMException):
     """
 
 
+class JSONCodec(object):
+    """
+    _JSONCodec_
+
+    Encode work with the Services.Requests JSONizer, which handles
+    __to_json__ calls.
+    """
+    codecId = "j"
+
+    def __init__(self):
+        self.jsonHandler = JSONRequests()
+
+    def encode(self, item):
+        return self.jsonHandler.encode(item)
+
+    def decode(self, data):
+        return self.jsonHandler.decode(data)
+
+
+class PickleCodec(object):
+    """
+    _PickleCodec_
+
+    Pickle work with protocol 2, the objects arrive as they were sent.
+    """
+    codecId = "p"
+
+    def encode(self, item):
+        return cPickle.dumps(item, 2)
+
+    def decode(self, data):
+        return cPickle.loads(data)
+
+
+class MarshalCodec(object):
+    """
+    _MarshalCodec_
+
+    Compact binary encoding for work made of plain python types only
+    (strings, numbers, lists, dicts...).
+    """
+    codecId = "m"
+
+    def encode(self, item):
+        return marshal.dumps(item, 2)
+
+    def decode(self, data):
+        return marshal.loads(data)
+
+
+class RawCodec(object):
+    """
+    _RawCodec_
+
+    Send strings as they are, without any encoding.
+    """
+    codecId = "r"
+
+    def encode(self, item):
+        if not isinstance(item, str):
+            raise ProcessPoolException("Raw codec can only send strings, not %s" % type(item))
+        return item
+
+    def decode(self, data):
+        return data
+
+
+CODECS = {"json": JSONCodec,
+          "pickle": PickleCodec,
+          "marshal": MarshalCodec,
+          "raw": RawCodec}
+
+# Frame header: codec id, number of items, number of work items the frame
+# completes, sender pid and the time the sender spent decoding its input
+# and encoding this frame.
+_frameHeader = struct.Struct(">cIIidd")
+# Every item in the frame is prefixed by its length
+_itemLength = struct.Struct(">I")
+
+
+def encodeFrame(codec, items, pid=0, decodeTime=0.0, completed=None):
+    """
+    _encodeFrame_
+
+    Encode the items in a single frame with the codec.  completed is the
+    number of work items the frame answers for, the number of items by
+    default.  Returns the frame and the time spent encoding.
+    """
+    startTime = time.time()
+    chunks = []
+    for item in items:
+        payload = codec.encode(item)
+        chunks.append(_itemLength.pack(len(payload)))
+        chunks.append(payload)
+    encodeTime = time.time() - startTime
+
+    if completed is None:
+        completed = len(items)
+    frame = _frameHeader.pack(codec.codecId, len(items), completed, pid, decodeTime, encodeTime)
+    return frame + "".join(chunks), encodeTime
+
+
+def decodeFrame(frame, codecs):
+    """
+    _decodeFrame_
+
+    Decode a frame built by encodeFrame.  codecs maps the codec ids to
+    codec instances.  Returns the items and the header as a tuple of
+    (codec id, sender pid, sender decode time, sender encode time,
+    completed work items).
+    """
+    try:
+        codecId, nItems, completed, pid, decodeTime, encodeTime = _frameHeader.unpack_from(frame)
+    except struct.error:
+        raise ProcessPoolException("Received a truncated ProcessPool frame")
+    if codecId not in codecs:
+        raise ProcessPoolException("Received a ProcessPool frame with unknown codec %s" % codecId)
+    codec = codecs[codecId]
+
+    items = []
+    offset = _frameHeader.size
+    for _ in range(nItems):
+        try:
+            (length,) = _itemLength.unpack_from(frame, offset)
+        except struct.error:
+            raise ProcessPoolException("Received a truncated ProcessPool frame")
+        offset += _itemLength.size
+        if offset + length > len(frame):
+            raise ProcessPoolException("Received a truncated ProcessPool frame")
+        items.append(codec.decode(frame[offset:offset + length]))
+        offset += length
+    if offset != len(frame):
+        raise ProcessPoolException("ProcessPool frame length does not match its items")
+
+    return items, (codecId, pid, decodeTime, encodeTime, completed)
+
+
+def codecsById():
+    """
+    _codecsById_
+
+    Instantiate all the codecs, keyed by codec id.
+    """
+    return dict((codecClass.codecId, codecClass()) for codecClass in CODECS.values())
+
+
 class ProcessPoolWorker:
     """
     _ProcessPoolWorker_
@@ -61,7 +211,8 @@ class ProcessPoolWorker:
 class ProcessPool:
     def __init__(self, slaveClassName, totalSlaves, componentDir,
                  config, namespace='WMComponent', inPort='5555',
-                 outPort='5558'):
+                 outPort='5558', codec='json', batchSize=1,
+                 maxRunningWork=None):
         """
         __init__
 
@@ -75,13 +226,34 @@ class ProcessPool:
         parameters.  It is not passed to the slave class.  The slaveInit
         parameter will be serialized and passed to the slave class's
         constructor.
+
+        Work is sent to the slaves in frames of up to batchSize items
+        encoded with the codec (json, pickle, marshal or raw).  The slaves
+        answer with the same codec and one frame per batch, which may hold
+        any number of results.  If maxRunningWork is set, enqueue collects
+        results from the slaves before sending more work once that many
+        items are being processed.
         """
         self.enqueueIndex = 0
         self.dequeueIndex = 0
         self.runningWork = 0
 
-        # Use the Services.Requests JSONizer, which handles __to_json__ calls
-        self.jsonHandler = JSONRequests()
+        if codec not in CODECS:
+            msg = "Unknown ProcessPool codec %s, use one of %s" % (codec, sorted(CODECS.keys()))
+            raise ProcessPoolException(msg)
+        self.codec = CODECS[codec]()
+        self.codecs = codecsById()
+        self.batchSize = max(1, batchSize)
+        self.maxRunningWork = maxRunningWork
+
+        # Results received from the slaves but not dequeued yet
+        self.resultBuffer = collections.deque()
+
+        # Counters for the frames going through the pool
+        self.stats = {"framesSent": 0, "itemsSent": 0, "bytesSent": 0, "encodeTime": 0.0,
+                      "framesReceived": 0, "itemsReceived": 0, "bytesReceived": 0,
+                      "decodeTime": 0.0}
+        self.slaveStats = {}
 
         # heartbeat should be registered at this point
         if getattr(config.Agent, "useHeartbeat", True):
@@ -201,7 +373,7 @@ class ProcessPool:
         """
         for i in range(self.nSlaves):
             try:
-                encodedWork = self.jsonHandler.encode('STOP')
+                encodedWork, _ = encodeFrame(self.codec, ['STOP'])
                 self.sender.send(encodedWork)
             except Exception as ex:
                 # Might be already failed.  Nothing you can
@@ -240,7 +412,8 @@ class ProcessPool:
         __enqeue__
 
         Assign work to the workers processes.  The work parameters must be a
-        list where each item in the list can be serialized into JSON.
+        list where each item in the list can be serialized with the codec.
+        Items are sent batchSize at a time.
 
         If list is True, the entire list is sent as one piece of work
         """
@@ -250,28 +423,71 @@ class ProcessPool:
             logging.error(msg)
             raise ProcessPoolException(msg)
 
-        if not list:
-            for w in work:
-                encodedWork = self.jsonHandler.encode(w)
-                self.sender.send(encodedWork)
-                self.runningWork += 1
+        if list:
+            batches = [[work]]
         else:
-            encodedWork = self.jsonHandler.encode(work)
+            batches = [work[i:i + self.batchSize] for i in range(0, len(work), self.batchSize)]
+
+        for batch in batches:
+            if self.maxRunningWork:
+                # Back-pressure: let the slaves catch up first
+                while self.runningWork > 0 and self.runningWork + len(batch) > self.maxRunningWork:
+                    self._receiveFrame()
+
+            encodedWork, encodeTime = encodeFrame(self.codec, batch)
             self.sender.send(encodedWork)
-            self.runningWork += 1
+            self.runningWork += len(batch)
+
+            self.stats["framesSent"] += 1
+            self.stats["itemsSent"] += len(batch)
+            self.stats["bytesSent"] += len(encodedWork)
+            self.stats["encodeTime"] += encodeTime
 
         return
 
+    def _receiveFrame(self):
+        """
+        _receiveFrame_
+
+        Block until a frame of results arrives from a slave and add its items
+        to the result buffer.  The running work is reduced by the number of
+        work items the frame completes, not by the number of results in it.
+        """
+        output = self.sink.recv()
+        startTime = time.time()
+        items, header = decodeFrame(output, self.codecs)
+        decodeTime = time.time() - startTime
+        _, pid, slaveDecodeTime, slaveEncodeTime, completed = header
+
+        self.resultBuffer.extend(items)
+        self.runningWork = max(0, self.runningWork - completed)
+
+        self.stats["framesReceived"] += 1
+        self.stats["itemsReceived"] += len(items)
+        self.stats["bytesReceived"] += len(output)
+        self.stats["decodeTime"] += decodeTime
+
+        slaveStats = self.slaveStats.setdefault(pid, {"frames": 0, "items": 0, "bytes": 0,
+                                                      "decodeTime": 0.0, "encodeTime": 0.0})
+        slaveStats["frames"] += 1
+        slaveStats["items"] += len(items)
+        slaveStats["bytes"] += len(output)
+        slaveStats["decodeTime"] += slaveDecodeTime
+        slaveStats["encodeTime"] += slaveEncodeTime
+        return
+
     def dequeue(self, totalItems=1):
         """
         __dequeue__
 
         Retrieve completed work from the slave workers.  This method will block
-        until enough work has been completed.
+        until enough work has been completed or until all the running work
+        has been answered for.  A work item can give any number of results,
+        so fewer items than requested may come back.
         """
         completedWork = []
 
-        if totalItems > self.runningWork:
+        if not self.runningWork and totalItems > len(self.resultBuffer):
             msg = "Asked to dequeue more work then is running!\n"
             msg += "Failing"
             logging.error(msg)
@@ -279,8 +495,12 @@ class ProcessPool:
 
         while totalItems > 0:
             try:
-                output = self.sink.recv()
-                decode = self.jsonHandler.decode(output)
+                while not self.resultBuffer and self.runningWork > 0:
+                    self._receiveFrame()
+                if not self.resultBuffer:
+                    logging.error("All work completed with fewer results than requested")
+                    break
+                decode = self.resultBuffer.popleft()
                 if isinstance(decode, dict) and decode.get('type', None) == 'ERROR':
                     # Then we had some kind of error
                     msg = decode.get('msg', 'Unknown Error in ProcessPool')
@@ -289,7 +509,6 @@ class ProcessPool:
                     self.close()
                     raise ProcessPoolException(msg)
                 completedWork.append(decode)
-                self.runningWork -= 1
                 totalItems -= 1
             except Exception as ex:
                 msg = "Exception while getting slave outputin ProcessPool.\n"
@@ -299,6 +518,20 @@ class ProcessPool:
 
         return completedWork
 
+    def getStatistics(self):
+        """
+        _getStatistics_
+
+        Return the number of items queued or being processed, the number of
+        results waiting to be dequeued, the counters of this side of the
+        pool and the counters of each slave, keyed by the slave pid.  The
+        slave times are the time spent decoding work and encoding results.
+        """
+        return {"queueDepth": self.runningWork,
+                "buffered": len(self.resultBuffer),
+                "pool": dict(self.stats),
+                "slaves": dict((pid, dict(stats)) for pid, stats in self.slaveStats.items())}
+
     def restart(self):
         """
         _restart_
@@ -338,8 +571,11 @@ def setupDB(config, wmInit):
     """
     _setupDB_
 
-    Create the database connections.
+    Create the database connections.  Slaves without a CoreDatabase
+    section in their config run without one.
     """
+    if not hasattr(config, "CoreDatabase"):
+        return
     socket = getattr(config.CoreDatabase, 'socket', None)
     connectUrl = config.CoreDatabase.connectUrl
     dialect = config.CoreDatabase.dialect
@@ -397,8 +633,8 @@ if __name__ == "__main__":
     wmInit = WMInit()
     setupDB(config, wmInit)
 
-    # Create JSON handler
-    jsonHandler = JSONRequests()
+    codecs = codecsById()
+    pid = os.getpid()
 
     wmFactory = WMFactory(name="slaveFactory", namespace=namespace)
     slaveClass = wmFactory.loadObject(classname=slaveClassName, args=config)
@@ -409,47 +645,60 @@ if __name__ == "__main__":
         encodedInput = receiver.recv()
 
         try:
-            input = jsonHandler.decode(encodedInput)
+            startTime = time.time()
+            inputs, header = decodeFrame(encodedInput, codecs)
+            decodeTime = time.time() - startTime
         except Exception as ex:
             logging.error("Error decoding: %s" % str(ex))
             break
 
-        if input == "STOP":
+        # Answer with the codec the work was sent with
+        codec = codecs[header[0]]
+
+        if inputs == ["STOP"]:
             break
 
-        try:
-            logging.error(input)
-            output = slaveClass(input)
-        except Exception as ex:
-            crashMessage = "Slave process crashed with exception: " + str(ex)
-            crashMessage += "\nStacktrace:\n"
+        outputs = []
+        failed = False
+        for input in inputs:
+            try:
+                logging.debug(input)
+                output = slaveClass(input)
+            except Exception as ex:
+                crashMessage = "Slave process crashed with exception: " + str(ex)
+                crashMessage += "\nStacktrace:\n"
 
-            stackTrace = traceback.format_tb(sys.exc_info()[2], None)
-            for stackFrame in stackTrace:
-                crashMessage += stackFrame
+                stackTrace = traceback.format_tb(sys.exc_info()[2], None)
+                for stackFrame in stackTrace:
+                    crashMessage += stackFrame
 
-            logging.error(crashMessage)
-            try:
-                output = {'type': 'ERROR', 'msg': crashMessage}
-                encodedOutput = jsonHandler.encode(output)
-                sender.send(encodedOutput)
-                logging.error("Sent error message and now breaking")
+                logging.error(crashMessage)
+                outputs.append({'type': 'ERROR', 'msg': crashMessage})
+                failed = True
                 break
-            except Exception as ex:
-                logging.error("Failed to send error message")
-                logging.error(str(ex))
-                del jsonHandler
-                sys.exit(1)
-
-        if output != None:
-            if isinstance(output, list):
-                for item in output:
-                    encodedOutput = jsonHandler.encode(item)
-                    sender.send(encodedOutput)
-            else:
-                encodedOutput = jsonHandler.encode(output)
-                sender.send(encodedOutput)
+
+            if output != None:
+                if isinstance(output, list):
+                    outputs.extend(output)
+                else:
+                    outputs.append(output)
+
+        # Always answer, even without results, so that the pool can account
+        # for every work item it sent in this frame
+        try:
+            encodedOutput, _ = encodeFrame(codec, outputs, pid, decodeTime, len(inputs))
+        except Exception as ex:
+            logging.error("Failed to encode slave output: %s" % str(ex))
+            crashMessage = "Slave process failed to encode its output: " + str(ex)
+            encodedOutput, _ = encodeFrame(codecs[JSONCodec.codecId],
+                                           [{'type': 'ERROR', 'msg': crashMessage}], pid, decodeTime,
+                                           len(inputs))
+            failed = True
+        sender.send(encodedOutput)
+
+        if failed:
+            logging.error("Sent error message and now breaking")
+            break
 
     logging.info("Process with PID %s finished" % (os.getpid()))
-    del jsonHandler
     sys.exit(0)
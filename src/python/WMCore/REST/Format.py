@@ -1,4 +1,5 @@
-import re, cherrypy, cjson, types, hashlib, xml.sax.saxutils, zlib, json
+import re, cherrypy, cjson, types, hashlib, xml.sax.saxutils, zlib, bz2, json, threading
+from multiprocessing.pool import ThreadPool
 from WMCore.REST.Error import RESTError, ExecutionError, report_rest_error
 from traceback import format_exc
 try:
@@ -364,48 +365,131 @@ def _stream_compress_identity(reply, *args):
     """Streaming compressor which returns original data unchanged."""
     return reply
 
-def _stream_compress_deflate(reply, compress_level, max_chunk):
-    """Streaming compressor for the 'deflate' method. Generates output that
-    is guaranteed to expand at the exact same chunk boundaries as original
-    reply stream."""
+#: ZLIB flush modes by compression flush policy. 'full' resets the
+#: compression state at every chunk, 'sync' only aligns the output so
+#: the chunk can be decompressed in full, 'none' doesn't flush at all
+#: and gives the best ratio, but chunks no longer expand at the exact
+#: boundaries of the original reply.
+_zlib_flush = {
+  'full': zlib.Z_FULL_FLUSH,
+  'sync': zlib.Z_SYNC_FLUSH,
+  'none': zlib.Z_NO_FLUSH
+}
 
-    # Create zlib compression object, with raw data stream (negative window size)
-    z = zlib.compressobj(compress_level, zlib.DEFLATED, -zlib.MAX_WBITS,
-                         zlib.DEF_MEM_LEVEL, 0)
+def zlib_compressor(wbits):
+    """Return a compressor factory for ZLIB streams with `wbits` window
+    bits: negative for raw 'deflate' data, 16 added for 'gzip' format.
+
+    A compressor factory is called with the compression level and flush
+    policy, and returns a function which takes a block of data and a flag
+    telling if it is the last one, and returns the compressed output."""
+    def factory(compress_level, flush):
+        z = zlib.compressobj(compress_level, zlib.DEFLATED, wbits,
+                             zlib.DEF_MEM_LEVEL, 0)
+        mode = _zlib_flush[flush]
+        def compress(data, last):
+            if last:
+                return z.compress(data) + z.flush(zlib.Z_FINISH)
+            elif mode == zlib.Z_NO_FLUSH:
+                return z.compress(data)
+            else:
+                return z.compress(data) + z.flush(mode)
+        return compress
+    return factory
+
+def bz2_compressor(compress_level, flush):
+    """Compressor factory for 'bzip2' streams. BZIP2 can only be flushed
+    at the end, so the output never follows the chunk boundaries."""
+    b = bz2.BZ2Compressor(compress_level)
+    def compress(data, last):
+        if last:
+            return b.compress(data) + b.flush()
+        return b.compress(data)
+    return compress
+
+#: Stream compression methods, compressor factories by "Content-Encoding".
+_stream_compressor = {
+  'identity': None,
+  'deflate': zlib_compressor(-zlib.MAX_WBITS),
+  'gzip': zlib_compressor(16 + zlib.MAX_WBITS),
+  'bzip2': bz2_compressor
+}
 
-    # Data pending compression. We only take entire chunks from original
-    # reply. Then process reply one chunk at a time. Whenever we have enough
-    # data to compress, spit it out flushing the zlib engine entirely, so we
-    # respect original chunk boundaries.
+def register_compressor(encoding, factory):
+    """Register compressor `factory` for the "Content-Encoding" `encoding`,
+    see :func:`zlib_compressor` for the factory interface. The encoding is
+    used for responses if the API lists it among accepted compression
+    methods and the client asks for it."""
+    _stream_compressor[encoding] = factory
+
+#: Thread pools compressing output while the response thread generates
+#: more of it, by number of threads, shared by all the responses using
+#: that number and created on first use.
+_compress_pools = {}
+_compress_pool_lock = threading.Lock()
+
+def _compression_pool(workers):
+    """Return the compression thread pool with `workers` threads."""
+    with _compress_pool_lock:
+        if workers not in _compress_pools:
+            _compress_pools[workers] = ThreadPool(workers)
+        return _compress_pools[workers]
+
+def _blocks(reply, max_chunk):
+    """Generator coalescing the `reply` chunks into blocks of at least
+    `max_chunk` bytes, except for the last one."""
     npending = 0
     pending = []
     for chunk in reply:
         pending.append(chunk)
         npending += len(chunk)
         if npending >= max_chunk:
-            part = z.compress("".join(pending)) + z.flush(zlib.Z_FULL_FLUSH)
+            yield "".join(pending)
             pending = []
             npending = 0
-            yield part
-
-    # Crank the compressor one more time for remaining output.
     if npending:
-        yield z.compress("".join(pending)) + z.flush(zlib.Z_FINISH)
+        yield "".join(pending)
+
+def _stream_compress(reply, compress, max_chunk, workers):
+    """Streaming compressor. Takes entire chunks from the original reply
+    up to `max_chunk` size and compresses them with `compress`, so with
+    the 'full' and 'sync' flush policies the output respects the original
+    chunk boundaries. With `workers` the blocks are compressed in the
+    thread pool, while the next block is being generated, one at a time
+    as the compressor is not thread safe."""
+    if workers:
+        pool = _compression_pool(workers)
+        result = None
+        for block in _blocks(reply, max_chunk):
+            if result:
+                part = result.get()
+                if part:
+                    yield part
+            result = pool.apply_async(compress, (block, False))
+        if result:
+            part = result.get()
+            if part:
+                yield part
+    else:
+        for block in _blocks(reply, max_chunk):
+            part = compress(block, False)
+            if part:
+                yield part
 
-#: Stream compression methods.
-_stream_compressor = {
-  'identity': _stream_compress_identity,
-  'deflate': _stream_compress_deflate
-}
+    # Crank the compressor one more time for remaining output.
+    yield compress("", True)
 
-def stream_compress(reply, available, compress_level, max_chunk):
+def stream_compress(reply, available, compress_level, max_chunk,
+                    flush = 'full', workers = 0):
     """If compression has been requested via Accept-Encoding request header,
     and is granted for this response via `available` compression methods,
     convert the streaming `reply` into another streaming response which is
     compressed at the exact chunk boundaries of the original response,
     except that individual chunks may be coalesced up to `max_chunk` size.
     The `compression_level` tells how hard to compress, zero disables the
-    compression entirely."""
+    compression entirely. The `flush` policy tells how the compressor is
+    flushed at the end of each chunk, see :data:`_zlib_flush`. If `workers`
+    is non-zero, the compression is done in a pool of that many threads."""
 
     global _stream_compressor
     for enc in cherrypy.request.headers.elements('Accept-Encoding'):
@@ -420,7 +504,11 @@ def stream_compress(reply, available, compress_level, max_chunk):
             if 'Content-Length' in cherrypy.response.headers:
                 del cherrypy.response.headers['Content-Length']
             cherrypy.response.headers['Content-Encoding'] = enc.value
-            return _stream_compressor[enc.value](reply, compress_level, max_chunk)
+            factory = _stream_compressor[enc.value]
+            if factory is None:
+                return _stream_compress_identity(reply)
+            return _stream_compress(reply, factory(compress_level, flush),
+                                    max_chunk, workers)
 
     return reply
 
@@ -452,7 +540,7 @@ def _etag_tail(head, tail, etag):
     if etagval:
         cherrypy.response.headers["ETag"] = etagval
 
-def stream_maybe_etag(size_limit, etag, reply):
+def stream_maybe_etag(size_limit, etag, reply, store = None):
     """Maybe generate ETag header for the response, and handle If-Match
     and If-None-Match request headers. Consumes the reply until at most
     `size_limit` bytes. If the response fits into that size, adds the
@@ -470,7 +558,12 @@ def stream_maybe_etag(size_limit, etag, reply):
 
     Note that if this function is fed the output from `stream_compress()`
     as it normally would be, the `size_limit` constrains the compressed
-    size, and chunk boundaries correspond to compressed chunks."""
+    size, and chunk boundaries correspond to compressed chunks.
+
+    If `store` is given, it is called with the body of a fully buffered
+    successful response once its ETag and Content-Length headers are set,
+    before matching the request conditions, so the response can be kept
+    and later replayed with `stream_cached()`."""
 
     req = cherrypy.request
     res = cherrypy.response
@@ -515,10 +608,27 @@ def stream_maybe_etag(size_limit, etag, reply):
     etagval = etag.value()
     if etagval:
         res.headers['ETag'] = etagval
-        _etag_match(res.status or 200, etagval, match, nomatch)
-
-    # OK, respond with the buffered reply as a plain string.
     res.headers['Content-Length'] = size
     result = "".join(result)
     assert len(result) == size
+    if store:
+        store(result)
+    if etagval:
+        _etag_match(res.status or 200, etagval, match, nomatch)
+
+    # OK, respond with the buffered reply as a plain string.
     return result
+
+def stream_cached(headers, body):
+    """Replay a response kept by the `store` callback of `stream_maybe_etag()`.
+    Restores the saved response `headers`, matches the saved ETag against any
+    If-Match / If-None-Match request headers, and returns the `body` string."""
+    req = cherrypy.request
+    res = cherrypy.response
+    res.headers.update(headers)
+    etagval = headers.get('ETag', None)
+    if etagval:
+        match = [str(x) for x in (req.headers.elements('If-Match') or [])]
+        nomatch = [str(x) for x in (req.headers.elements('If-None-Match') or [])]
+        _etag_match(res.status or 200, etagval, match, nomatch)
+    return body
@@ -2,7 +2,7 @@ import os, re, hashlib, signal, cherrypy, traceback, random, string, inspect, ti
 from cherrypy import engine, expose, request, response, HTTPError, HTTPRedirect, tools
 from threading import Thread, Condition, Lock
 from rfc822 import formatdate as rfc822_date
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from traceback import format_exc
 from functools import wraps
 from WMCore.REST.Error import *
@@ -346,6 +346,143 @@ class RESTFrontPage:
         URL arguments; they are not used here."""
         return self._serve([self._frontpage])
 
+######################################################################
+######################################################################
+class ResponseCache:
+    """Server side cache of complete GET responses.
+
+    Keeps the formatted and compressed response body with its headers and
+    ETag, so repeated requests for the same data are answered, including
+    If-None-Match validation, without calling the API method and without
+    touching the database. Only the API methods which ask for it with the
+    ``cache`` keyword argument to :func:`restcall` are cached, and only
+    responses small enough to be fully buffered, see :attr:`etag_limit`
+    of :class:`~.MiniRESTApi`.
+
+    Responses are keyed by the API name, the URL path, the query arguments,
+    the response format, the "Accept-Encoding" request header and the roles
+    of the authenticated user. APIs whose output depends on the identity of
+    the user rather than on the roles should not be cached.
+
+    Entries expire after the time-to-live given to :meth:`put`, and the least
+    recently used entries are evicted when the cached bodies would exceed
+    `max_size` bytes. :class:`~.MiniRESTApi` calls :meth:`invalidate` for
+    every PUT, POST and DELETE request.
+
+    .. attribute:: size
+
+       Total size of the cached response bodies in bytes.
+
+    .. attribute:: hits, misses
+
+       Number of requests answered from the cache and otherwise.
+
+    :arg int max_size: Maximum total size of the cached bodies in bytes."""
+
+    #: Response headers kept with the body and restored on a cache hit.
+    HEADERS = ('Content-Type', 'Content-Encoding', 'Content-Length', 'ETag',
+               'Vary', 'Cache-Control', 'Pragma', 'Expires', 'X-REST-Status')
+
+    def __init__(self, max_size = 64 * 1024 * 1024):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._generations = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def key(api, path, kwargs, format, encoding, user):
+        """Make the cache key for a request.
+
+        :arg str api: The API name.
+        :arg str path: The URL path, including the API name and arguments.
+        :arg dict kwargs: The query arguments, values are strings or lists.
+        :arg str format: The response format.
+        :arg str encoding: The "Accept-Encoding" request header.
+        :arg dict user: The authenticated user as set by the authz tools.
+        :returns: A hashable key."""
+        kwargs = tuple(sorted((k, isinstance(v, list) and tuple(v) or v)
+                              for k, v in kwargs.iteritems()))
+        roles = tuple(sorted((r, tuple(sorted(a.get('group', []))),
+                              tuple(sorted(a.get('site', []))))
+                             for r, a in ((user and user.get('roles')) or {}).iteritems()))
+        return (api, path, kwargs, format, encoding, roles)
+
+    def get(self, key):
+        """Look up `key`, returning *(expires, headers, body)* or None
+        if there is no entry or it has expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry and entry[0] < now:
+                self.size -= len(entry[2])
+                entry = None
+            if entry:
+                self._entries[key] = entry
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry
+
+    def generation(self, api):
+        """Return the invalidation generation of `api`, to be given back
+        to :meth:`put` once the response has been computed."""
+        with self._lock:
+            return (self._generation, self._generations.get(api, 0))
+
+    def put(self, key, generation, ttl, headers, body):
+        """Keep response `headers` and `body` under `key` for `ttl` seconds.
+
+        The response is dropped if the API was invalidated since `generation`
+        was obtained from :meth:`generation`, as it may have been computed
+        from data which has since changed.
+
+        :returns: True if the response was stored, False otherwise."""
+        size = len(body)
+        if size > self.max_size:
+            return False
+
+        with self._lock:
+            if generation != (self._generation, self._generations.get(key[0], 0)):
+                return False
+            self._drop(key)
+            while self._entries and self.size + size > self.max_size:
+                self._drop(next(iter(self._entries)))
+            self._entries[key] = (time.time() + ttl, headers, body)
+            self.size += size
+            return True
+
+    def invalidate(self, api = None):
+        """Drop all the entries for `api`, or all entries if `api` is None."""
+        with self._lock:
+            if api is None:
+                self._generation += 1
+                self._entries.clear()
+                self.size = 0
+            else:
+                self._generations[api] = self._generations.get(api, 0) + 1
+                for key in [k for k in self._entries if k[0] == api]:
+                    self._drop(key)
+
+    def stats(self):
+        """Return a dictionary of the number of entries, the size of the
+        cached bodies, the hits, misses and hit ratio."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return { "entries": len(self._entries), "size": self.size,
+                     "max_size": self.max_size, "hits": self.hits,
+                     "misses": self.misses,
+                     "hit_ratio": (lookups and float(self.hits) / lookups) or 0.0 }
+
+    def _drop(self, key):
+        """Remove `key` if present. Must be called with the lock held."""
+        entry = self._entries.pop(key, None)
+        if entry:
+            self.size -= len(entry[2])
+
 ######################################################################
 ######################################################################
 class MiniRESTApi:
@@ -492,6 +629,17 @@ class MiniRESTApi:
     These can be tuned per API with ``cherrypy.tools.expires(secs=n)``, or
     ``expires`` and ``expires_opts`` :func:`restcall` keyword arguments.
 
+    API methods whose GET responses are polled repeatedly, for example by
+    monitoring pages, can in addition ask for server side caching with the
+    ``cache`` :func:`restcall` keyword argument, giving the time in seconds
+    to keep the responses. Fully buffered responses are then kept, already
+    formatted and compressed, in :attr:`response_cache`, and requests with
+    the same arguments, format, encoding and user roles are answered from
+    it without invoking the API, If-None-Match validation included. PUT,
+    POST and DELETE requests drop the cached responses of their API, and of
+    any other APIs listed in their ``invalidates`` :func:`restcall` keyword
+    argument. The response carries "X-REST-Cache: hit" or "miss" header.
+
     .. rubric:: Notes
 
     .. note:: Only GET and HEAD requests are allowed to have a query string.
@@ -574,7 +722,8 @@ class MiniRESTApi:
 
        A list of accepted compression mechanisms to be matched against the
        "Accept-Encoding" HTTP request header. Currently supported values are
-       ``deflate`` and ``identity``. Using ``identity`` or emptying the list
+       ``deflate``, ``gzip``, ``bzip2`` and ``identity``, more can be added with
+       :func:`~.register_compressor`. Using ``identity`` or emptying the list
        disables compression. The default is ``['deflate']``. Change this only
        for API mount points which are known to generate incompressible output,
        using ``compression`` keyword argument to :func:`restcall`.
@@ -601,6 +750,27 @@ class MiniRESTApi:
        The API can override this value with ``compression_chunk`` keyword
        argument to :func:`restcall`.
 
+    .. attribute:: compression_flush
+
+       String, how the compressor is flushed after each chunk. ``sync`` makes
+       each chunk decompressable in full while keeping the compression state,
+       ``full`` also resets the state, which costs compression ratio, and
+       ``none`` gives the best ratio but the compressed chunks no longer follow
+       the original chunk boundaries. The default is ``sync``. The API can
+       override this value with ``compression_flush`` keyword argument to
+       :func:`restcall`.
+
+    .. attribute:: compression_workers
+
+       Integer, the number of threads compressing output while the response
+       thread generates the next chunk. All the responses using the same
+       number share one pool of that many threads, so it caps the concurrent
+       compression of the whole server and should be sized for the server,
+       not for one response. The default is zero, which compresses in each
+       response thread, in parallel as ZLIB releases the interpreter lock.
+       The API can override this value with ``compression_workers`` keyword
+       argument to :func:`restcall`.
+
     .. attribute:: default_expires
 
        Number, default expire time for GET / HEAD responses in seconds. The
@@ -615,6 +785,12 @@ class MiniRESTApi:
        object can override this value with ``expires_opts`` keyword argument
        to :func:`restcall`. The default is an empty list.
 
+    .. attribute:: response_cache
+
+       The :class:`~.ResponseCache` of GET responses for the APIs which opt
+       in with ``cache`` keyword argument to :func:`restcall`. Its ``stats()``
+       give the hit ratio and the memory used. The default keeps up to 64 MB.
+
     .. rubric:: Constructor arguments
 
     :arg app: The main application :class:`~.RESTMain` object.
@@ -627,12 +803,15 @@ class MiniRESTApi:
         self.etag_limit = 8 * 1024 * 1024
         self.compression_level = 9
         self.compression_chunk = 64 * 1024
+        self.compression_flush = 'sync'
+        self.compression_workers = 0
         self.compression = ['deflate']
         self.formats = [ ('application/json', JSONFormat()),
                          ('application/xml', XMLFormat(self.app.appname)) ]
         self.methods = {}
         self.default_expires = 3600
         self.default_expires_opts = []
+        self.response_cache = ResponseCache()
 
     def _addAPI(self, method, api, callable, args, validation, **kwargs):
         """Add an API method.
@@ -766,14 +945,49 @@ class MiniRESTApi:
             format_names = ', '.join(f[0] for f in formats)
             raise NotAcceptable('Available types: %s' % format_names)
 
+        # If the API asked for server side caching, reply from the cache if
+        # we can. This is done before validation as the validators may also
+        # acquire resources such as database connections.
+        store = None
+        cache_ttl = request.method == 'GET' and apiobj.get('cache', None)
+        if cache_ttl:
+            cache = self.response_cache
+            cache_key = cache.key(api, request.path_info, param.kwargs, format,
+                                  request.headers.get('Accept-Encoding', ''),
+                                  getattr(request, 'user', None))
+            entry = cache.get(cache_key)
+            if entry:
+                response.headers['X-REST-Cache'] = 'hit'
+                return stream_cached(entry[1], entry[2])
+
+            response.headers['X-REST-Cache'] = 'miss'
+            cache_generation = cache.generation(api)
+            def store(body):
+                if httputil.valid_status(response.status or 200)[0] == 200:
+                    headers = dict((h, response.headers[h]) for h in cache.HEADERS
+                                   if h in response.headers)
+                    cache.put(cache_key, cache_generation, cache_ttl, headers, body)
+
         # Validate arguments. May convert arguments too, e.g. str->int.
         safe = RESTArgs([], {})
         for v in apiobj['validation']:
             v(apiobj, request.method, api, param, safe)
         validate_no_more_input(param)
 
-        # Invoke the method.
-        obj = apiobj['call'](*safe.args, **safe.kwargs)
+        # Invoke the method. Modifications invalidate cached responses both
+        # right away and once the response has been generated, in case the
+        # API makes the changes as it streams out the response.
+        if request.method in ('PUT', 'POST', 'DELETE'):
+            def invalidate():
+                for name in [api] + list(apiobj.get('invalidates', [])):
+                    self.response_cache.invalidate(name)
+            request.hooks.attach('on_end_request', invalidate, failsafe = True)
+            try:
+                obj = apiobj['call'](*safe.args, **safe.kwargs)
+            finally:
+                invalidate()
+        else:
+            obj = apiobj['call'](*safe.args, **safe.kwargs)
 
         # Add Vary: Accept header.
         vary_by('Accept')
@@ -807,8 +1021,11 @@ class MiniRESTApi:
         reply = stream_compress(fmthandler(obj, etagger),
                                 apiobj.get('compression', self.compression),
                                 apiobj.get('compression_level', self.compression_level),
-                                apiobj.get('compression_chunk', self.compression_chunk))
-        return stream_maybe_etag(apiobj.get('etag_limit', self.etag_limit), etagger, reply)
+                                apiobj.get('compression_chunk', self.compression_chunk),
+                                apiobj.get('compression_flush', self.compression_flush),
+                                apiobj.get('compression_workers', self.compression_workers))
+        return stream_maybe_etag(apiobj.get('etag_limit', self.etag_limit),
+                                 etagger, reply, store)
 
     def _precall(self, param):
         """Point for derived classes to hook into prior to peeking at URL.
@@ -2316,6 +2533,10 @@ def restcall(func=None, args=None, generate="result", **kwargs):
     compression         "Accept-Encoding" methods, empty disables compression.
     compression_level   ZLIB compression level for output (0 .. 9).
     compression_chunk   Approximate amount of output to compress at once.
+    compression_flush   Compressor flush after each chunk: sync, full or none.
+    compression_workers Threads compressing output, zero to not use threads.
+    cache               Seconds to keep GET responses in the server cache.
+    invalidates         Other APIs whose cached responses a write drops.
     =================== ======================================================
 
     :returns: The original function suitably enriched with attributes if
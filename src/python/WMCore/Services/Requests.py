@@ -21,6 +21,8 @@ import tempfile
 import shutil
 import stat
 import sys
+import threading
+import time
 import traceback
 
 try:
@@ -48,9 +50,140 @@ def check_server_url(srvurl):
         raise ValueError(msg)
 
 
+class ConnectionPool(object):
+    """
+    Process wide pool of httplib2 openers, shared by all the Requests
+    objects so the keep-alive connections of an opener are reused across
+    them instead of doing a TCP and SSL handshake per Requests object.
+
+    An opener is only used by one request at a time: it's checked out of
+    the pool for the request and put back afterwards.  Openers are pooled
+    by (scheme and host, key, cert, cache path, timeout), up to
+    maxIdlePerKey per key and maxSize in total, and closed once they have
+    been idle for more than maxIdle seconds.
+
+    Requests objects without a configured cache directory put their cache
+    in a per host directory under cacheDir(), so their openers can be
+    shared as well.
+    """
+    def __init__(self, maxIdle = 60, maxIdlePerKey = 4, maxSize = 64):
+        self.maxIdle = maxIdle
+        self.maxIdlePerKey = maxIdlePerKey
+        self.maxSize = maxSize
+        self.lock = threading.Lock()
+        self.idle = {}
+        self.size = 0
+        self.requests = 0
+        self.reused = 0
+        self.handshakes = 0
+        self.tempCacheDir = None
+
+    def _close(self, opener):
+        """Close the connections of an opener"""
+        for conn in opener.connections.values():
+            try:
+                conn.close()
+            except Exception:
+                pass
+        opener.connections = {}
+
+    def _expire(self, now):
+        """Remove the openers that have been idle for too long"""
+        expired = []
+        for key in self.idle.keys():
+            openers = self.idle[key]
+            fresh = [x for x in openers if now - x[0] <= self.maxIdle]
+            if len(fresh) < len(openers):
+                expired.extend([x[1] for x in openers if now - x[0] > self.maxIdle])
+                self.size -= len(openers) - len(fresh)
+                if fresh:
+                    self.idle[key] = fresh
+                else:
+                    del self.idle[key]
+        return expired
+
+    def checkout(self, key, factory):
+        """
+        Take an idle opener for key out of the pool, or make a new one
+        with factory
+        """
+        with self.lock:
+            expired = self._expire(time.time())
+            self.requests += 1
+            opener = None
+            openers = self.idle.get(key)
+            if openers:
+                opener = openers.pop()[1]
+                self.size -= 1
+                self.reused += 1
+                if not openers:
+                    del self.idle[key]
+            else:
+                self.handshakes += 1
+        for expiredOpener in expired:
+            self._close(expiredOpener)
+        if opener is None:
+            opener = factory()
+        return opener
+
+    def checkin(self, key, opener):
+        """Put an opener back in the pool after a successful request"""
+        with self.lock:
+            openers = self.idle.setdefault(key, [])
+            if len(openers) < self.maxIdlePerKey and self.size < self.maxSize:
+                openers.append((time.time(), opener))
+                self.size += 1
+                return
+            if not openers:
+                del self.idle[key]
+        self._close(opener)
+
+    def cacheDir(self):
+        """
+        Process wide temporary cache directory, removed on exit
+        """
+        with self.lock:
+            if self.tempCacheDir is None:
+                self.tempCacheDir = TempDirectory(tempfile.mkdtemp(prefix='.wmcore_cache_'))
+            return self.tempCacheDir.dir
+
+    def discard(self, opener):
+        """Close an opener that failed instead of putting it back"""
+        self._close(opener)
+
+    def countHandshake(self):
+        """Count a reconnection that didn't go through checkout"""
+        with self.lock:
+            self.handshakes += 1
+
+    def clear(self):
+        """Close all the idle openers"""
+        with self.lock:
+            idle = self.idle
+            self.idle = {}
+            self.size = 0
+        for openers in idle.values():
+            for _, opener in openers:
+                self._close(opener)
+
+    def statistics(self):
+        """Requests, reused openers, handshakes and the reuse ratio"""
+        with self.lock:
+            return {"requests": self.requests,
+                    "reused": self.reused,
+                    "handshakes": self.handshakes,
+                    "idle": self.size,
+                    "reuseRatio": float(self.reused) / self.requests if self.requests else 0.0}
+
+connectionPool = ConnectionPool()
+
+
 class Requests(dict):
     """
     Generic class for sending different types of HTTP Request to a given URL
+
+    httplib requests use the process wide connectionPool, unless the
+    incoming dict sets pool to False or brings its own conn opener.
     """
 
     def __init__(self, url = 'http://localhost', idict=None):
@@ -96,9 +229,12 @@ class Requests(dict):
         self.setdefault("timeout", 300)
         self.setdefault("logger", logging)
 
+        self.setdefault("pool", True)
+
         check_server_url(self['host'])
-        # and then get the URL opener
-        self.setdefault("conn", self._getURLOpener())
+        # and then get the URL opener, pooled ones are taken per request
+        if not self['pool'] or 'conn' in self:
+            self.setdefault("conn", self._getURLOpener())
 
 
     def get(self, uri=None, data={}, incoming_headers={},
@@ -240,31 +376,49 @@ class Requests(dict):
             "Data in makeRequest is %s and not encoded to a string" \
                 % type(encoded_data)
 
+        pooled = 'conn' not in self
+        if pooled:
+            poolKey = self._poolKey()
+            opener = connectionPool.checkout(poolKey, self._getURLOpener)
+        else:
+            opener = self['conn']
+
         # httplib2 will allow sockets to close on remote end without retrying
         # try to send request - if this fails try again - should then succeed
         try:
-            response, result = self['conn'].request(uri, method = verb,
-                                    body = encoded_data, headers = headers)
-            if response.status == 408: # timeout can indicate a socket error
-                response, result = self['conn'].request(uri, method = verb,
-                                    body = encoded_data, headers = headers)
-        except (socket.error, AttributeError):
-            # AttributeError implies initial connection error - need to close
-            # & retry. httplib2 doesn't clear httplib state before next request
-            # if this is threaded this may spoil things
-            # only have one endpoint so don't need to determine which to shut
-            [conn.close() for conn in self['conn'].connections.values()]
-            self['conn'] = self._getURLOpener()
-            # ... try again... if this fails propagate error to client
             try:
-                response, result = self['conn'].request(uri, method = verb,
-                                    body = encoded_data, headers = headers)
-            except AttributeError as ex:
-                msg = traceback.format_exc()
-                # socket/httplib really screwed up - nuclear option
-                self['conn'].connections = {}
-                raise socket.error('Error contacting: %s: %s' \
-                        % (self.getDomainName(), msg))
+                response, result = opener.request(uri, method = verb,
+                                        body = encoded_data, headers = headers)
+                if response.status == 408: # timeout can indicate a socket error
+                    response, result = opener.request(uri, method = verb,
+                                        body = encoded_data, headers = headers)
+            except (socket.error, AttributeError):
+                # AttributeError implies initial connection error - need to close
+                # & retry. httplib2 doesn't clear httplib state before next request
+                # if this is threaded this may spoil things
+                # only have one endpoint so don't need to determine which to shut
+                [conn.close() for conn in opener.connections.values()]
+                opener = self._getURLOpener()
+                if pooled:
+                    connectionPool.countHandshake()
+                else:
+                    self['conn'] = opener
+                # ... try again... if this fails propagate error to client
+                try:
+                    response, result = opener.request(uri, method = verb,
+                                        body = encoded_data, headers = headers)
+                except AttributeError as ex:
+                    msg = traceback.format_exc()
+                    # socket/httplib really screwed up - nuclear option
+                    opener.connections = {}
+                    raise socket.error('Error contacting: %s: %s' \
+                            % (self.getDomainName(), msg))
+        except:
+            if pooled:
+                connectionPool.discard(opener)
+            raise
+        if pooled:
+            connectionPool.checkin(poolKey, opener)
         if response.status >= 400:
             e = HTTPException()
             setattr(e, 'req_data', encoded_data)
@@ -326,6 +480,8 @@ class Requests(dict):
           o If passed in take that
           o Is the environment variable "SERVICE_NAME"_CACHE_DIR defined?
           o Is WMCORE_CACHE_DIR set
+          o Use the temporary directory of the connection pool for pooled
+            openers, so they don't get a cache path of their own
           o Generate a temporary directory
           """
         if given_path:
@@ -339,6 +495,8 @@ class Requests(dict):
                 firstbit = os.environ[var]
                 break
         else:
+            if dict.get(self, 'pool', True) and 'conn' not in self:
+                return connectionPool.cacheDir()
             idir = tempfile.mkdtemp(prefix='.wmcore_cache_')
             # object to store temporary directory - cleaned up on destruction
             self['deleteCacheOnExit'] = TempDirectory(idir)
@@ -354,6 +512,20 @@ class Requests(dict):
         """Parse netloc to get user"""
         return self['endpoint_components'].username
 
+    def _poolKey(self):
+        """
+        Openers can be shared by the requests that go to the same host with
+        the same credentials, cache and timeout
+        """
+        key, cert = None, None
+        if self['endpoint_components'].scheme == 'https':
+            try:
+                key, cert = self.getKeyCert()
+            except Exception:
+                pass
+        return (self['endpoint_components'].scheme, self['endpoint_components'].netloc,
+                key, cert, self['req_cache_path'], self['timeout'])
+
     def _getURLOpener(self):
         """
         method getting a secure (HTTPS) connection
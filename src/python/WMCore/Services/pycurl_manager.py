@@ -65,6 +65,8 @@ class RequestHandler(object):
         self.connecttimeout = config.get('connecttimeout', 30)
         self.followlocation = config.get('followlocation', 1)
         self.maxredirs = config.get('maxredirs', 5)
+        self.multiconnections = config.get('multiconnections', 10)
+        self.retries = config.get('retries', 0)
         self.logger = logger if logger else logging.getLogger()
 
     def set_opts(self, curl, url, params, headers,
@@ -174,24 +176,28 @@ class RequestHandler(object):
                 data = self.parse_body(bbuf.getvalue(), decode)
         else:
             data = bbuf.getvalue()
-            msg = 'url=%s, code=%s, reason=%s, headers=%s' \
-                    % (url, header.status, header.reason, header.header)
-            exc = httplib.HTTPException(msg)
-            setattr(exc, 'req_data', params)
-            setattr(exc, 'req_headers', headers)
-            setattr(exc, 'url', url)
-            setattr(exc, 'result', data)
-            setattr(exc, 'status', header.status)
-            setattr(exc, 'reason', header.reason)
-            setattr(exc, 'headers', header.header)
             bbuf.flush()
             hbuf.flush()
-            raise exc
+            raise self.http_error(url, params, headers, header, data)
 
         bbuf.flush()
         hbuf.flush()
         return header, data
 
+    def http_error(self, url, params, headers, header, data):
+        """Build the exception raised for an unsuccessful response"""
+        msg = 'url=%s, code=%s, reason=%s, headers=%s' \
+                % (url, header.status, header.reason, header.header)
+        exc = httplib.HTTPException(msg)
+        setattr(exc, 'req_data', params)
+        setattr(exc, 'req_headers', headers)
+        setattr(exc, 'url', url)
+        setattr(exc, 'result', data)
+        setattr(exc, 'status', header.status)
+        setattr(exc, 'reason', header.reason)
+        setattr(exc, 'headers', header.header)
+        return exc
+
     def getdata(self, url, params, headers=None, verb='GET',
                 verbose=0, ckey=None, cert=None, doseq=True):
         """Fetch data for given set of parameters"""
@@ -207,40 +213,90 @@ class RequestHandler(object):
         return header
 
     def multirequest(self, url, parray, headers=None,
-                ckey=None, cert=None, verbose=None):
-        """Fetch data for given set of parameters"""
+                ckey=None, cert=None, verbose=None, capath=None, cainfo=None):
+        """
+        Fetch data for given set of parameters.
+
+        Up to self.multiconnections requests run at the same time over a
+        pool of curl handles, which keep their connections open between
+        requests. The results are yielded as the requests complete, so not
+        in the order of parray. Requests that fail with a connection error,
+        a timeout or a 5xx code are retried up to self.retries times.
+        """
+        pending = [(params, 0) for params in parray]
+        pending.reverse()
+        if  not pending:
+            return
         multi = pycurl.CurlMulti()
-        for params in parray:
-            curl = pycurl.Curl()
-            bbuf, hbuf = \
-                self.set_opts(curl, url, params, headers, ckey, cert, verbose)
-            multi.add_handle(curl)
-            while True:
-                ret, num_handles = multi.perform()
-                if  ret != pycurl.E_CALL_MULTI_PERFORM:
-                    break
-            while num_handles:
-                ret = multi.select(1.0)
-                if  ret == -1:
-                    continue
+        free = [pycurl.Curl() for _ in range(max(1, min(self.multiconnections, len(pending))))]
+        active = {}
+        try:
+            while pending or active:
+                while pending and free:
+                    params, attempt = pending.pop()
+                    curl = free.pop()
+                    curl.reset()
+                    bbuf, hbuf = self.set_opts(curl, url, params, headers,
+                            ckey, cert, capath, verbose, cainfo=cainfo)
+                    active[curl] = (params, attempt, bbuf, hbuf)
+                    multi.add_handle(curl)
+
                 while True:
-                    ret, num_handles = multi.perform()
+                    ret, _num_handles = multi.perform()
                     if  ret != pycurl.E_CALL_MULTI_PERFORM:
                         break
-            _numq, response, _err = multi.info_read()
-            for _cobj in response:
-                data = json.loads(bbuf.getvalue())
-                if  isinstance(data, dict):
-                    data.update(params)
-                    yield data
-                if  isinstance(data, list):
-                    for item in data:
-                        if  isinstance(item, dict):
-                            item.update(params)
-                            yield item
-                        else:
-                            err = 'Unsupported data format: data=%s, type=%s'\
-                                % (item, type(item))
-                            raise Exception(err)
-                bbuf.flush()
-                hbuf.flush()
+
+                done = []
+                while True:
+                    numq, ok_list, err_list = multi.info_read()
+                    done.extend([(curl, None) for curl in ok_list])
+                    done.extend([(curl, (errno, errmsg)) for curl, errno, errmsg in err_list])
+                    if  not numq:
+                        break
+                if  not done:
+                    multi.select(1.0)
+                    continue
+
+                for curl, error in done:
+                    multi.remove_handle(curl)
+                    params, attempt, bbuf, hbuf = active.pop(curl)
+                    free.append(curl)
+                    status = None
+                    if  error is None:
+                        status = curl.getinfo(pycurl.RESPONSE_CODE)
+                    if  error is not None or status >= 500:
+                        if  attempt < self.retries:
+                            self.logger.warning("Retrying %s with %s, attempt %s failed: %s",
+                                                url, params, attempt + 1, error or status)
+                            pending.append((params, attempt + 1))
+                            continue
+                        if  error is not None:
+                            raise pycurl.error(*error)
+                    if  status >= 300:
+                        header = self.parse_header(hbuf.getvalue())
+                        header.status = status
+                        raise self.http_error(url, params, headers, header, bbuf.getvalue())
+                    for item in self.multi_items(bbuf.getvalue(), params):
+                        yield item
+        finally:
+            for curl in active:
+                multi.remove_handle(curl)
+            for curl in free + active.keys():
+                curl.close()
+            multi.close()
+
+    def multi_items(self, body, params):
+        """Decode a multirequest response and add the request parameters"""
+        data = json.loads(body)
+        if  isinstance(data, dict):
+            data.update(params)
+            yield data
+        if  isinstance(data, list):
+            for item in data:
+                if  isinstance(item, dict):
+                    item.update(params)
+                    yield item
+                else:
+                    err = 'Unsupported data format: data=%s, type=%s'\
+                        % (item, type(item))
+                    raise Exception(err)
@@ -635,3 +635,58 @@ def addFilesToWMBSInBulk(filesetId, workflowName, files, isDBS = True,
                              transaction = transaction)
 
     return len(lfnsToCreate)
+
+
+def loadFilesByID(daofactory, fileIDs, loadChecksums = True,
+                  doingJobSplitting = False, loadLocations = False,
+                  loadRunLumis = False, conn = None, transaction = None):
+    """
+    _loadFilesByID_
+
+    Load the meta data and checksums of many files with a few bulk queries
+    instead of a couple of queries per file.  The locations and the runs
+    and lumis of the files are loaded as well if asked for.  Returns a
+    dictionary of file id to File object.
+    """
+    if len(fileIDs) == 0:
+        return {}
+
+    if doingJobSplitting:
+        fileInfoAct = daofactory(classname = "Files.GetForJobSplittingByID")
+    else:
+        fileInfoAct = daofactory(classname = "Files.GetByID")
+    fileInfoDict = fileInfoAct.execute(file = list(fileIDs), conn = conn,
+                                       transaction = transaction)
+
+    checksums = {}
+    if loadChecksums:
+        checksumAct = daofactory(classname = "Files.GetBulkChecksum")
+        checksums = checksumAct.execute(files = fileIDs, conn = conn,
+                                        transaction = transaction)
+
+    fileBinds = [{"id": fileID} for fileID in fileIDs]
+
+    locations = {}
+    if loadLocations:
+        locationAct = daofactory(classname = "Files.GetBulkLocation")
+        locations = locationAct.execute(files = fileBinds, conn = conn,
+                                        transaction = transaction)
+
+    runLumis = {}
+    if loadRunLumis:
+        runLumiAct = daofactory(classname = "Files.GetBulkRunLumi")
+        runLumis = runLumiAct.execute(files = fileBinds, conn = conn,
+                                      transaction = transaction)
+
+    files = {}
+    for fileID in fileIDs:
+        fl = File(id = fileID)
+        if fileID in checksums:
+            fl["checksums"] = checksums[fileID]
+        fl.update(fileInfoDict[fileID])
+        fl["locations"] = set(locations.get(fileID, []))
+        for run, lumis in runLumis.get(fileID, {}).items():
+            fl.addRun(run = Run(run, *lumis))
+        files[fileID] = fl
+
+    return files
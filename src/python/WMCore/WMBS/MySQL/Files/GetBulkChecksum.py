@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+"""
+_GetBulkChecksum_
+
+MySQL implementation of Files.GetBulkChecksum
+"""
+
+from WMCore.Database.DBFormatter import DBFormatter
+
+class GetBulkChecksum(DBFormatter):
+    """
+    Load the checksums of many files at once, returns a dictionary of
+    file id to a dictionary of checksum type to checksum.  Files without
+    checksums are not in the result.
+    """
+    sql = """SELECT fcs.fileid AS id, cst.type AS cktype, fcs.cksum AS cksum
+               FROM wmbs_file_checksums fcs
+               INNER JOIN wmbs_checksum_type cst ON fcs.typeid = cst.id
+               WHERE fcs.fileid IN (%s)"""
+
+    def format(self, result):
+        checksums = {}
+        for entry in self.formatDict(result):
+            checksums.setdefault(entry['id'], {})[entry['cktype']] = entry['cksum']
+        return checksums
+
+    def execute(self, files = None, conn = None, transaction = False):
+        """
+        files is a list of file ids
+        """
+        result = self.processInClause(self.sql, set(files),
+                                      conn = conn, transaction = transaction)
+        return self.format(result)
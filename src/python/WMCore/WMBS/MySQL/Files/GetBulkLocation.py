@@ -11,18 +11,14 @@ MySQL implementation of File.GetBulkLocation
 from WMCore.Database.DBFormatter import DBFormatter
 
 class GetBulkLocation(DBFormatter):
-    sql = """SELECT wls.se_name as pnn, :id as id
+    sql = """SELECT wls.se_name as pnn, wfl.fileid as id
                FROM wmbs_location_senames wls
                INNER JOIN wmbs_file_location wfl ON wfl.location = wls.location
-               WHERE wfl.fileid = :id
+               WHERE wfl.fileid IN (%s)
     """
 
     def getBinds(self, files=None):
-        binds = []
-        files = list(files)
-        for f in files:
-            binds.append({'id': f['id']})
-        return binds
+        return set([f['id'] for f in files])
 
     def format(self, unformattedResult):
         #We need to assemble file:location pairs so that we have a dict
@@ -45,9 +41,9 @@ class GetBulkLocation(DBFormatter):
         if len(files) == 0:
             return {}
 
-        binds = self.getBinds(files)
+        fileIDs = self.getBinds(files)
 
-        result = self.dbi.processData(self.sql, binds,
-                         conn = conn, transaction = transaction)
+        result = self.processInClause(self.sql, fileIDs,
+                                      conn = conn, transaction = transaction)
 
         return self.format(result)
@@ -15,15 +15,11 @@ class GetBulkRunLumi(DBFormatter):
     """
     sql = """SELECT flr.run AS run, flr.lumi AS lumi, flr.fileid AS id
                FROM wmbs_file_runlumi_map flr
-               WHERE flr.fileid = :id
+               WHERE flr.fileid IN (%s)
     """
 
     def getBinds(self, files = None):
-        binds = []
-        files = self.dbi.makelist(files)
-        for f in files:
-            binds.append({'id': f['id']})
-        return binds
+        return set([f['id'] for f in self.dbi.makelist(files)])
 
     def format(self, result):
         "Return a list of Run/Lumi Set"
@@ -43,8 +39,8 @@ class GetBulkRunLumi(DBFormatter):
         return finalResult
 
     def execute(self, files = None, conn = None, transaction = False):
-        binds = self.getBinds(files)
+        fileIDs = self.getBinds(files)
 
-        result = self.dbi.processData(self.sql, binds,
-                         conn = conn, transaction = transaction)
+        result = self.processInClause(self.sql, fileIDs,
+                                      conn = conn, transaction = transaction)
         return self.format(result)
@@ -7,6 +7,9 @@ class GetByID(DBFormatter):
     sql = """SELECT id, lfn, filesize, events, first_event, merged
              FROM wmbs_file_details WHERE id = :fileid"""
 
+    bulkSql = """SELECT id, lfn, filesize, events, first_event, merged
+                 FROM wmbs_file_details WHERE id IN (%s)"""
+
     def formatOneDict(self, result):
         """
         _formatOneDict_
@@ -65,11 +68,8 @@ class GetByID(DBFormatter):
             if len(file) == 0:
                 #Ignore empty lists
                 return {}
-            binds = []
-            for id in file:
-                binds.append({'fileid': id})
 
-            result = self.dbi.processData(self.sql, binds,
+            result = self.processInClause(self.bulkSql, set(file),
                                           conn = conn, transaction = transaction)
             return self.formatBulkDict(result)
         else:
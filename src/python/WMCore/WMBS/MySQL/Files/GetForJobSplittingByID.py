@@ -15,6 +15,14 @@ class GetForJobSplittingByID(GetByID):
              LEFT OUTER JOIN wmbs_file_runlumi_map wfr ON wfr.fileid = wfd.id
              WHERE id = :fileid"""
 
+    bulkSql = """SELECT wfd.id, wfd.lfn, wfd.filesize, wfd.events, wfd.first_event,
+                        wfd.merged, MIN(wfr.run) AS minrun
+                 FROM wmbs_file_details wfd
+                 LEFT OUTER JOIN wmbs_file_runlumi_map wfr ON wfr.fileid = wfd.id
+                 WHERE wfd.id IN (%s)
+                 GROUP BY wfd.id, wfd.lfn, wfd.filesize, wfd.events, wfd.first_event,
+                          wfd.merged"""
+
 
     def formatBulkDict(self, result):
         """
@@ -23,8 +23,7 @@ class BulkNewReturn(DBFormatter):
 
     returnSQL = """SELECT id AS id, guid AS guid FROM wmbs_jobgroup
                    WHERE subscription = :subscription
-                   AND guid = :guid
-                   AND output = :output"""
+                   AND guid IN (%s)"""
 
     def execute(self, bulkInput = None, conn = None, transaction = False):
         """
@@ -34,21 +33,22 @@ class BulkNewReturn(DBFormatter):
         """
         timestamp = int(time.time())
         insertBinds = []
-        returnBinds = []
+        guids = {}
         for entry in bulkInput:
             insertBinds.append({'subscription': entry['subscription'],
                                 'guid': entry['uid'],
                                 'output': entry['output'],
                                 'timestamp': timestamp})
-            returnBinds.append({'subscription': entry['subscription'],
-                                'guid': entry['uid'],
-                                'output': entry['output']})
-
+            guids.setdefault(entry['subscription'], []).append(entry['uid'])
 
         self.dbi.processData(self.sql, insertBinds, conn = conn,
                              transaction = transaction)
-        result = self.dbi.processData(self.returnSQL, returnBinds,
-                                      conn = conn,
-                                      transaction = transaction)
 
+        # The guids are unique, fetch the new ids a few hundred at a time
+        result = []
+        for subscription, uids in guids.items():
+            result.extend(self.processInClause(self.returnSQL, uids,
+                                               binds = {'subscription': subscription},
+                                               conn = conn,
+                                               transaction = transaction))
         return self.formatDict(result)
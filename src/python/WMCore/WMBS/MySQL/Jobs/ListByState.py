@@ -22,8 +22,15 @@ class ListByState(DBFormatter):
                     wmbs_job.state = wmbs_job_state.id
                  WHERE wmbs_job_state.name = :state"""
 
-    def execute(self, state, conn = None, transaction = False):
+    def execute(self, state, conn = None, transaction = False, stream = False):
+        """
+        With stream = True the jobs are returned by a generator that reads
+        them from the database in batches.
+        """
         result = self.dbi.processData(self.sql, {'state' : state},
                                       conn = conn,
-                                      transaction = transaction)
+                                      transaction = transaction,
+                                      stream = stream)
+        if stream:
+            return self.iterFormatDict(result)
         return self.formatDict(result)
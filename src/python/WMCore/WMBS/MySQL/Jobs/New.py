@@ -24,7 +24,8 @@ class New(DBFormatter):
                (SELECT id FROM wmbs_location WHERE site_name = :location),
                :outcome, :fwjr_path)"""
 
-    getIDsql = """SELECT id as id, name as name FROM wmbs_job WHERE name= :name AND jobgroup= :jobgroup"""
+    getIDsql = """SELECT id as id, name as name, jobgroup as jobgroup
+                  FROM wmbs_job WHERE name IN (%s)"""
 
 
     def getBinds(self, jobList):
@@ -71,13 +72,12 @@ class New(DBFormatter):
 
             self.dbi.processData(self.sql, binds, conn = conn, transaction = transaction)
 
-            binds2 = []
-            for d in binds:
-                binds2.append({'name': d['name'], 'jobgroup': d['jobgroup']})
-
-            #Now we need the IDs
-            result = self.dbi.processData(self.getIDsql, binds2, conn = conn, transaction = transaction)
-            return self.format(result)
+            #Now we need the IDs, names are only unique within a jobgroup
+            jobGroups = dict((d['name'], d['jobgroup']) for d in binds)
+            result = self.processInClause(self.getIDsql, jobGroups.keys(),
+                                          conn = conn, transaction = transaction)
+            return dict((job['name'], job['id']) for job in self.formatDict(result)
+                        if jobGroups[job['name']] == job['jobgroup'])
 
 
 
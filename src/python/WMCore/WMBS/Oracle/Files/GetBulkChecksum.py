@@ -0,0 +1,14 @@
+#!/usr/bin/env python
+"""
+_GetBulkChecksum_
+
+Oracle implementation of Files.GetBulkChecksum
+"""
+
+from WMCore.WMBS.MySQL.Files.GetBulkChecksum import GetBulkChecksum as MySQLGetBulkChecksum
+
+class GetBulkChecksum(MySQLGetBulkChecksum):
+    """
+    Identical to MySQL
+
+    """
@@ -11,9 +11,10 @@ associated to a single fileset and a single workflow.
 from __future__ import print_function
 
 import logging
+import time
 
 from WMCore.WMBS.Fileset  import Fileset
-from WMCore.WMBS.File     import File
+from WMCore.WMBS.File     import File, loadFilesByID
 from WMCore.WMBS.Workflow import Workflow
 from WMCore.WMBS.WMBSBase import WMBSBase
 
@@ -193,21 +194,15 @@ class Subscription(WMBSBase, WMSubscription):
             fileList = action.execute(self["id"], conn = self.getDBConn(),
                                       transaction = self.existingTransaction())
 
-        if doingJobSplitting:
-            fileInfoAct  = self.daofactory(classname = "Files.GetForJobSplittingByID")
-        else:
-            fileInfoAct  = self.daofactory(classname = "Files.GetByID")
-
-        fileInfoDict = fileInfoAct.execute(file = [x["file"] for x in fileList],
-                                           conn = self.getDBConn(),
-                                           transaction = self.existingTransaction())
+        fileDict = loadFilesByID(self.daofactory, [x["file"] for x in fileList],
+                                 loadChecksums = loadChecksums,
+                                 doingJobSplitting = doingJobSplitting,
+                                 conn = self.getDBConn(),
+                                 transaction = self.existingTransaction())
 
         #Run through all files
         for f in fileList:
-            fl = File(id = f['file'])
-            if loadChecksums:
-                fl.loadChecksum()
-            fl.update(fileInfoDict[f['file']])
+            fl = fileDict[f['file']]
             if 'locations' in f.keys():
                 fl.setLocation(f['locations'], immediateSave = False)
             files.add(fl)
@@ -575,6 +570,7 @@ class Subscription(WMBSBase, WMSubscription):
         jobList      = []
         jobGroupList = []
         nameList     = []
+        timing       = []
 
         # You have to do things in this order:
         # 1) First create Filesets, then jobGroups
@@ -591,7 +587,7 @@ class Subscription(WMBSBase, WMSubscription):
 
         # You need to create a number of Filesets equal to the
         # number of jobGroups.
-
+        start = time.time()
         for jobGroup in jobGroups:
             # Make a random name for each fileset
             nameList.append(makeUUID())
@@ -613,13 +609,12 @@ class Subscription(WMBSBase, WMSubscription):
                                 conn = self.getDBConn(),
                                 transaction = self.existingTransaction())
 
+        jgIDs = dict((x['guid'], x['id']) for x in jgIDs)
         for jobGroup in jobGroups:
-            for idUID in jgIDs:
-                # This should assign an ID to the right job
-                if jobGroup.uid == idUID['guid']:
-                    jobGroup.id = idUID['id']
-                    break
+            jobGroup.id = jgIDs.get(jobGroup.uid, jobGroup.id)
+        timing.append(("job groups", time.time() - start))
 
+        start = time.time()
         for jobGroup in jobGroups:
             for job in jobGroup.newjobs:
                 if job["id"] != None:
@@ -640,43 +635,44 @@ class Subscription(WMBSBase, WMSubscription):
         for jobGroup in jobGroups:
             jobGroup.jobs.extend(jobGroup.newjobs)
             jobGroup.newjobs = []
+        timing.append(("jobs", time.time() - start))
 
-        #Use the results of the bulk commit to get the jobIDs
+        #Use the results of the bulk commit to get the jobIDs, and build the
+        #file and mask binds in the same pass
+        start = time.time()
         fileDict = {}
+        fileList = []
+        maskList = []
         for job in jobList:
             job['id'] = result[job['name']]
-            fileDict[job['id']] = []
-            for f in job['input_files']:
-                fileDict[job['id']].append(f['id'])
-
-
-
+            fileDict[job['id']] = [f['id'] for f in job['input_files']]
+            fileList.extend(job['input_files'])
 
-            # Create a list of mask binds
-        maskList = []
-        for job in jobList:
             mask = job['mask']
-            if len(mask['runAndLumis'].keys()) > 0:
+            if len(mask['runAndLumis']) > 0:
                 # Then we have multiple binds
-                binds = mask.produceCommitBinds(jobID = job['id'])
-                maskList.extend(binds)
+                maskList.extend(mask.produceCommitBinds(jobID = job['id']))
             else:
                 mask['jobID'] = job['id']
                 maskList.append(mask)
 
-
         maskAction = self.daofactory(classname = "Masks.Save")
         maskAction.execute(jobid = None, mask = maskList, conn = self.getDBConn(),
                            transaction = self.existingTransaction())
+        timing.append(("masks", time.time() - start))
 
+        start = time.time()
         fileAction = self.daofactory(classname = "Jobs.AddFiles")
         fileAction.execute(jobDict = fileDict, conn = self.getDBConn(),
                            transaction = self.existingTransaction())
+        timing.append(("job files", time.time() - start))
 
-        fileList = []
-        for job in jobList:
-            fileList.extend(job['input_files'])
-
+        start = time.time()
         self.acquireFiles(files = fileList)
         self.commitTransaction(existingTransaction)
+        timing.append(("acquire and commit", time.time() - start))
+
+        logging.info("Committed %i job groups with %i jobs for subscription %s: %s",
+                     len(jobGroups), len(jobList), self['id'],
+                     ", ".join(["%s %.2fs" % x for x in timing]))
         return
@@ -15,10 +15,10 @@ import logging
 import traceback
 import time
 
-import WMCore.Algorithms.SubprocessAlgos as subprocessAlgos
 import WMCore.FwkJobReport.Report        as Report
 
 from WMCore.WMRuntime.Monitors.DashboardMonitor import getStepPID
+from WMCore.WMRuntime.Tools.ProcessSampler      import ProcessSampler
 from WMCore.WMRuntime.Monitors.WMRuntimeMonitor import WMRuntimeMonitor
 from WMCore.WMSpec.Steps.Executor               import getStepSpace
 from WMCore.WMSpec.WMStep                       import WMStepHelper
@@ -45,8 +45,10 @@ class PerformanceMonitor(WMRuntimeMonitor):
     """
     _PerformanceMonitor_
 
-    Monitors the performance by pinging ps and
-    recording data regarding the current step
+    Monitors the performance by sampling /proc for the step process
+    tree and recording data regarding the current step.  The samples are
+    taken on each periodic update, or every sampleInterval seconds by a
+    background thread if it is set.
     """
 
     def __init__(self):
@@ -57,15 +59,12 @@ class PerformanceMonitor(WMRuntimeMonitor):
 
         self.pid              = None
         self.uid              = os.getuid()
-        self.monitorBase      = "ps -p %i -o pid,ppid,rss,vsize,pcpu,pmem,cmd -ww | grep %i"
-        self.monitorCommand   = None
+        self.sampler          = None
         self.currentStepSpace = None
         self.currentStepName  = None
 
-        self.rss   = []
-        self.vsize = []
-        self.pcpu  = []
-        self.pmem  = []
+        self.sampleInterval = None
+        self.bufferSize     = 1000
 
         self.maxRSS      = None
         self.maxVSize    = None
@@ -98,6 +97,9 @@ class PerformanceMonitor(WMRuntimeMonitor):
         self.softTimeout = args.get('softTimeout', None)
         self.hardTimeout = args.get('hardTimeout', None)
 
+        self.sampleInterval = args.get('sampleInterval', None)
+        self.bufferSize     = args.get('sampleBufferSize', 1000)
+
         self.logPath = os.path.join(logPath)
 
         return
@@ -141,15 +143,41 @@ class PerformanceMonitor(WMRuntimeMonitor):
         Package the information and send it off
         """
 
-        if not self.disableStep:
-            # No information to correlate
-            return
+        if self.sampler is not None:
+            self.sampler.stop()
+            if not self.disableStep and stepReport is not None and \
+                   stepReport.retrieveStep(self.currentStepName) is not None:
+                self.reportPerformance(stepReport)
+            self.sampler = None
 
         self.currentStepName  = None
         self.currentStepSpace = None
 
         return
 
+    def reportPerformance(self, stepReport):
+        """
+        _reportPerformance_
+
+        Add the min, max and average of the samples to the step report
+        """
+        setters = {'RSS'   : stepReport.setStepRSS,
+                   'PSS'   : stepReport.setStepPSS,
+                   'VSize' : stepReport.setStepVSize,
+                   'PCPU'  : stepReport.setStepPCPU,
+                   'PMEM'  : stepReport.setStepPMEM}
+        for metric, setter in setters.items():
+            minimum, maximum, average = self.sampler.summary(metric)
+            if minimum is not None:
+                setter(self.currentStepName, minimum, maximum, average)
+
+        readBytes = self.sampler.last('ReadBytes')
+        writeBytes = self.sampler.last('WriteBytes')
+        if readBytes is not None:
+            logging.info("Step %s read %s bytes and wrote %s bytes" % (self.currentStepName,
+                                                                     readBytes, writeBytes))
+        return
+
 
     def periodicUpdate(self):
         """
@@ -183,23 +211,28 @@ class PerformanceMonitor(WMRuntimeMonitor):
             # Then we have no step PID, we can do nothing
             return
 
-        # Now we run the monitor command and collate the data
-        cmd = self.monitorBase % (stepPID, stepPID)
-        stdout, stderr, retcode = subprocessAlgos.runCommand(cmd)
+        if self.sampler is None or self.sampler.pid != stepPID:
+            if self.sampler is not None:
+                self.sampler.stop()
+            self.sampler = ProcessSampler(stepPID, self.bufferSize)
+            if self.sampleInterval:
+                self.sampler.sample()
+                self.sampler.start(self.sampleInterval)
 
-        output = stdout.split()
-        if not len(output) > 7:
-            # Then something went wrong in getting the ps data
-            msg =  "Error when grabbing output from process ps\n"
-            msg += "output = %s\n" % output
-            msg += "command = %s\n" % self.monitorCommand
+        if self.sampleInterval:
+            sample = dict((metric, self.sampler.last(metric)) for metric in ['RSS', 'VSize', 'PCPU', 'PMEM'])
+        else:
+            sample = self.sampler.sample()
+        if not sample or sample['RSS'] is None:
+            # Then something went wrong in reading /proc
+            msg = "Error when reading the performance of process %s from /proc\n" % stepPID
             logging.error(msg)
             return
-        rss   = float(output[2])
-        vsize = float(output[3])
+        rss   = float(sample['RSS'])
+        vsize = float(sample['VSize'])
         logging.info("Retrieved following performance figures:")
-        logging.info("RSS: %s;  VSize: %s; PCPU: %s; PMEM: %s" % (output[2], output[3],
-                                                                  output[4], output[5]))
+        logging.info("RSS: %s;  VSize: %s; PCPU: %s; PMEM: %s" % (sample['RSS'], sample['VSize'],
+                                                                  sample.get('PCPU'), sample.get('PMEM')))
 
         msg = 'Error in CMSSW step %s\n' % self.currentStepName
         if self.maxRSS != None and rss >= self.maxRSS:
@@ -3,11 +3,18 @@
     _SandboxCreator_
 
     Given a path, workflow and task, create a sandbox within the path
+
+    The WMCore, PSetTweaks and Utils packages are the same for every
+    workload, they are packaged once in a layer named after the hash of
+    their content and copied from there into each sandbox.
 """
 
 
 import os
 import re
+import time
+import hashlib
+import logging
 import tarfile
 import tempfile
 import WMCore.WMSpec.WMTask as WMTask
@@ -33,10 +40,42 @@ def tarballExclusion(path):
             return True
     return False
 
+def packageFiles(path):
+    """
+    _packageFiles_
+
+    The files of a package that go in the sandbox, sorted
+    """
+    files = []
+    for (root, dirnames, filenames) in os.walk(path):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if not tarballExclusion(filename):
+                files.append(os.path.join(root, filename))
+    return files
+
 class SandboxCreator:
 
-    def __init__(self):
+    # compression mode to archive file extension
+    extensions = {'bz2' : '.tar.bz2', 'gz' : '.tar.gz', '' : '.tar'}
+
+    # content hash of the packaged code by file names, sizes and times,
+    # shared by all the creators in the process
+    _layerHashes = {}
+
+    def __init__(self, compression = 'bz2', compressLevel = 9, layerCache = None):
+        """
+        compression is bz2, gz or empty for an uncompressed tar, the WMCore
+        layer is zipped anyway.  The layers are kept in layerCache, by
+        default the sandboxLayers directory of the build area.
+        """
+        if compression not in self.extensions:
+            raise ValueError("Unknown sandbox compression %s" % compression)
         self.packageWMCore = True
+        self.compression = compression
+        self.compressLevel = compressLevel
+        self.layerCache = layerCache
+        self.buildStats = {}
 
     def disableWMCorePackaging(self):
         """
@@ -59,6 +98,106 @@ class SandboxCreator:
         archive.close()
 
 
+    def _packagePaths(self):
+        """
+        Archive name and path of the packages that go in the WMCore layer
+        """
+        return [('WMCore', os.path.realpath(os.path.join(os.path.dirname(__file__), '..'))),
+                ('PSetTweaks', PSetTweaks.__path__[0]),
+                ('Utils', Utils.__path__[0])]
+
+    def layerHash(self):
+        """
+        _layerHash_
+
+        Hash of the content of the packages in the WMCore layer.  The files
+        are only read again when their names, sizes or times changed.
+        """
+        signature = hashlib.sha1()
+        packages = []
+        for name, path in self._packagePaths():
+            files = packageFiles(path)
+            packages.append((name, path, files))
+            for filename in files:
+                stat = os.stat(filename)
+                signature.update("%s %i %i\n" % (filename, stat.st_size, stat.st_mtime))
+        signature = signature.hexdigest()
+
+        if signature not in self._layerHashes:
+            content = hashlib.sha1()
+            for name, path, files in packages:
+                for filename in files:
+                    content.update("%s/%s\n" % (name, filename[len(path):]))
+                    with open(filename, 'rb') as fileHandle:
+                        content.update(fileHandle.read())
+            self._layerHashes[signature] = content.hexdigest()
+        return self._layerHashes[signature]
+
+    def buildLayer(self, layerPath):
+        """
+        _buildLayer_
+
+        Write the uncompressed layer tarball with the WMCore zipball and the
+        PSetTweaks and Utils packages
+        """
+        packages = dict(self._packagePaths())
+        wmcorePath = packages['WMCore']
+
+        (layerHandle, tmpPath) = tempfile.mkstemp(dir = os.path.dirname(layerPath))
+        os.close(layerHandle)
+        layer = tarfile.open(tmpPath, 'w')
+
+        # package up the WMCore distribution in a zip file
+        # fixes #2943
+        (zipHandle, zipPath)  = tempfile.mkstemp()
+        os.close(zipHandle)
+        zipFile               = zipfile.ZipFile( zipPath,
+                                                 mode = 'w',
+                                                 compression = zipfile.ZIP_DEFLATED )
+
+        for filename in packageFiles(wmcorePath):
+            zipFile.write( filename = filename,
+                           # the name in the archive is the path relative to WMCore/
+                           arcname  = filename[len(wmcorePath) - len('WMCore/') + 1:])
+
+        # Add a dummy module for zipimport testing
+        zipFile.writestr('WMCore/ZipImportTestModule.py',
+                         "#!/usr/bin/env python\n"
+                         "# This file should only appear in zipimports, used for testing\n")
+
+        zipFile.close()
+        layer.add(zipPath, '/WMCore.zip')
+        os.unlink( zipPath )
+
+        layer.add(packages['PSetTweaks'], '/PSetTweaks',
+                  exclude = tarballExclusion)
+        layer.add(packages['Utils'], '/Utils',
+                  exclude = tarballExclusion)
+        layer.close()
+
+        # another process may be building the same layer
+        os.rename(tmpPath, layerPath)
+
+    def getLayer(self, buildItHere):
+        """
+        _getLayer_
+
+        Path to the WMCore layer for the current code, built if needed
+        """
+        layerCache = self.layerCache or os.path.join(buildItHere, "sandboxLayers")
+        if not os.path.isdir(layerCache):
+            try:
+                os.makedirs(layerCache)
+            except OSError:
+                if not os.path.isdir(layerCache):
+                    raise
+
+        layerPath = os.path.join(layerCache, "WMCore-%s.tar" % self.layerHash())
+        self.buildStats['layerReused'] = os.path.exists(layerPath)
+        if not self.buildStats['layerReused']:
+            self.buildLayer(layerPath)
+        return layerPath
+
     def _makePathonPackage(self, path):
         os.makedirs( path )
         initHandle = open(path + "/__init__.py", 'w')
@@ -78,11 +217,14 @@ class SandboxCreator:
         pileupCachePath = "%s/pileupCache" % buildItHere
         path = "%s/%s/WMSandbox" % (buildItHere, workloadName)
         workloadFile = os.path.join(path, "WMWorkload.pkl")
-        archivePath = os.path.join(buildItHere, "%s/%s-Sandbox.tar.bz2" % (workloadName, workloadName))
+        archivePath = os.path.join(buildItHere, "%s/%s-Sandbox%s" % (workloadName, workloadName,
+                                                                     self.extensions[self.compression]))
         # check if already built
         if os.path.exists(archivePath) and os.path.exists(workloadFile):
             workload.setSpecUrl(workloadFile) # point to sandbox spec
             return archivePath
+        startTime = time.time()
+        self.buildStats = {}
         if os.path.exists(path):
             shutil.rmtree(path)
         #  //
@@ -143,49 +285,25 @@ class SandboxCreator:
         #                                              buildItHere)
 
         pythonHandle = open(archivePath, 'w+b')
-        archive = tarfile.open(None,'w:bz2', pythonHandle)
+        if self.compression:
+            archive = tarfile.open(None, 'w:%s' % self.compression, pythonHandle,
+                                   compresslevel = self.compressLevel)
+        else:
+            archive = tarfile.open(None, 'w', pythonHandle)
         archive.add("%s/%s/" % (buildItHere, workloadName), '/',
                     exclude = tarballExclusion)
 
         if (self.packageWMCore):
-            # package up the WMCore distribution in a zip file
-            # fixes #2943
-            
-            wmcorePath = os.path.realpath(os.path.join(os.path.dirname(__file__), '..'))
-
-            (zipHandle, zipPath)  = tempfile.mkstemp()
-            os.close(zipHandle)
-            zipFile               = zipfile.ZipFile( zipPath,
-                                                     mode = 'w',
-                                                     compression = zipfile.ZIP_DEFLATED )
-
-            for ( root, dirnames, filenames ) in os.walk(wmcorePath):
-                for filename in filenames:
-                    if not tarballExclusion( filename ):
-                        zipFile.write( filename = os.path.join( root, filename ),
-                                       # the name in the archive is the path relative to WMCore/
-                                       arcname  = os.path.join( root, filename )[len(wmcorePath) - len('WMCore/') + 1:])
-
-            # Add a dummy module for zipimport testing
-            (handle, dummyModulePath) = tempfile.mkstemp()
-            os.write( handle, "#!/usr/bin/env python\n")
-            os.write( handle, "# This file should only appear in zipimports, used for testing\n")
-            os.close( handle )
-            zipFile.write( filename = dummyModulePath, arcname = 'WMCore/ZipImportTestModule.py')
-
-            # Add the wmcore zipball to the sandbox
-            zipFile.close()
-            archive.add(zipPath, '/WMCore.zip')
-            os.unlink( zipPath )
-            os.unlink( dummyModulePath )
-
-            psetTweaksPath = PSetTweaks.__path__[0]
-            archive.add(psetTweaksPath, '/PSetTweaks',
-                        exclude = tarballExclusion)
-            
-            utilsPath = Utils.__path__[0]
-            archive.add(utilsPath, '/Utils',
-                        exclude = tarballExclusion)
+            # copy the prebuilt WMCore layer into the sandbox
+            layerPath = self.getLayer(buildItHere)
+            layer = tarfile.open(layerPath, 'r')
+            for member in layer:
+                if member.isfile():
+                    archive.addfile(member, layer.extractfile(member))
+                else:
+                    archive.addfile(member)
+            layer.close()
+            self.buildStats['layer'] = layerPath
 
         for sb in userSandboxes:
             splitResult = urlparse.urlsplit(sb)
@@ -195,6 +313,9 @@ class SandboxCreator:
         archive.close()
         pythonHandle.close()
 
-
+        self.buildStats['time'] = time.time() - startTime
+        self.buildStats['size'] = os.path.getsize(archivePath)
+        logging.info("Built sandbox %s in %.2f s, %i bytes", archivePath,
+                     self.buildStats['time'], self.buildStats['size'])
 
         return archivePath
@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+"""
+_ProcessSampler_
+
+Sample the memory, CPU and IO use of a process and all its children by
+reading /proc, without forking ps.
+
+Sizes are in kB like ps reports them, PCPU is the percentage of one core
+used by the whole process tree since the previous sample, so it goes above
+100 for multicore jobs.
+"""
+
+import os
+import threading
+import time
+import logging
+
+
+PAGE_KB = os.sysconf("SC_PAGE_SIZE") // 1024
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+METRICS = ["RSS", "PSS", "VSize", "PCPU", "PMEM", "ReadBytes", "WriteBytes"]
+
+
+def readProcFile(pid, name):
+    """
+    _readProcFile_
+
+    Contents of /proc/<pid>/<name>, or of /proc/<name> if pid is None,
+    None if the process is gone or the file can't be read.
+    """
+    if pid is None:
+        path = "/proc/%s" % name
+    else:
+        path = "/proc/%i/%s" % (pid, name)
+    try:
+        with open(path) as procFile:
+            return procFile.read()
+    except (IOError, OSError):
+        return None
+
+
+def parseStat(content):
+    """
+    _parseStat_
+
+    Parent pid and CPU time in clock ticks from /proc/<pid>/stat, the
+    command name can contain spaces so split after the closing bracket.
+    """
+    fields = content[content.rindex(")") + 2:].split()
+    return int(fields[1]), int(fields[11]) + int(fields[12])
+
+
+def parseKeyValues(content):
+    """
+    _parseKeyValues_
+
+    Parse the 'Key: value [kB]' lines of smaps_rollup, io and meminfo
+    """
+    values = {}
+    for line in content.splitlines():
+        key, _, value = line.partition(":")
+        value = value.split()
+        if value and value[0].isdigit():
+            values[key] = int(value[0])
+    return values
+
+
+def childProcesses(pid):
+    """
+    _childProcesses_
+
+    Direct children of a process, from /proc/<pid>/task/*/children where the
+    kernel has it and from the parent pid of every process otherwise.
+    """
+    try:
+        tasks = os.listdir("/proc/%i/task" % pid)
+    except OSError:
+        return []
+
+    children = []
+    for tid in tasks:
+        content = readProcFile(pid, "task/%s/children" % tid)
+        if content is None:
+            break
+        children.extend(int(x) for x in content.split())
+    else:
+        return children
+
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        content = readProcFile(int(entry), "stat")
+        if content and parseStat(content)[0] == pid:
+            children.append(int(entry))
+    return children
+
+
+def processTree(pid):
+    """
+    _processTree_
+
+    The pid and the pids of all its descendants
+    """
+    pids = [pid]
+    index = 0
+    while index < len(pids):
+        for child in childProcesses(pids[index]):
+            if child not in pids:
+                pids.append(child)
+        index += 1
+    return pids
+
+
+class RingBuffer(object):
+    """
+    _RingBuffer_
+
+    The last size values of a metric, plus the min, max and average of all
+    the values ever added so a long step doesn't grow memory.
+    """
+    def __init__(self, size = 1000):
+        self.size = size
+        self.values = []
+        self.next = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def append(self, value):
+        if len(self.values) < self.size:
+            self.values.append(value)
+        else:
+            self.values[self.next] = value
+        self.next = (self.next + 1) % self.size
+
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def last(self):
+        if not self.values:
+            return None
+        return self.values[self.next - 1]
+
+    def recent(self):
+        """
+        The values in the buffer, oldest first
+        """
+        return self.values[self.next:] + self.values[:self.next]
+
+    def average(self):
+        if not self.count:
+            return None
+        return self.total / self.count
+
+    def summary(self):
+        """
+        min, max and average of all the values
+        """
+        return self.min, self.max, self.average()
+
+
+class ProcessSampler(object):
+    """
+    _ProcessSampler_
+
+    Sample a process tree, by calling sample() or from a background thread
+    started with start(interval).
+    """
+    def __init__(self, pid, bufferSize = 1000):
+        self.pid = pid
+        self.buffers = dict((metric, RingBuffer(bufferSize)) for metric in METRICS)
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopEvent = threading.Event()
+
+        self.cpuTicks = {}
+        self.lastTime = None
+        self.memTotal = None
+        meminfo = readProcFile(None, "meminfo")
+        if meminfo:
+            self.memTotal = parseKeyValues(meminfo).get("MemTotal")
+
+    def readProcess(self, pid):
+        """
+        _readProcess_
+
+        Memory, CPU ticks and IO of one process, None if it's gone
+        """
+        stat = readProcFile(pid, "stat")
+        statm = readProcFile(pid, "statm")
+        if not stat or not statm:
+            return None
+
+        values = {}
+        _, values["ticks"] = parseStat(stat)
+        statm = statm.split()
+        values["VSize"] = int(statm[0]) * PAGE_KB
+        values["RSS"] = int(statm[1]) * PAGE_KB
+
+        smaps = readProcFile(pid, "smaps_rollup")
+        if smaps:
+            values["PSS"] = parseKeyValues(smaps).get("Pss", 0)
+
+        io = readProcFile(pid, "io")
+        if io:
+            io = parseKeyValues(io)
+            values["ReadBytes"] = io.get("read_bytes", 0)
+            values["WriteBytes"] = io.get("write_bytes", 0)
+        return values
+
+    def sample(self):
+        """
+        _sample_
+
+        Take a sample of the whole process tree and add it to the buffers.
+        Returns a dictionary of metric to value, None if the process is gone.
+        """
+        now = time.time()
+        totals = dict.fromkeys(["RSS", "VSize", "PSS", "ReadBytes", "WriteBytes"], 0)
+        hasPSS = hasIO = False
+        cpuTicks = {}
+        usedTicks = 0
+
+        for pid in processTree(self.pid):
+            values = self.readProcess(pid)
+            if values is None:
+                continue
+            for key in totals:
+                totals[key] += values.get(key, 0)
+            hasPSS = hasPSS or "PSS" in values
+            hasIO = hasIO or "ReadBytes" in values
+            cpuTicks[pid] = values["ticks"]
+            # processes that exited since the last sample can't be accounted
+            usedTicks += max(values["ticks"] - self.cpuTicks.get(pid, 0), 0)
+
+        if not cpuTicks:
+            return None
+
+        result = {"RSS": totals["RSS"], "VSize": totals["VSize"]}
+        if hasPSS:
+            result["PSS"] = totals["PSS"]
+        if hasIO:
+            result["ReadBytes"] = totals["ReadBytes"]
+            result["WriteBytes"] = totals["WriteBytes"]
+        if self.memTotal:
+            result["PMEM"] = 100.0 * totals["RSS"] / self.memTotal
+        if self.lastTime is not None and now > self.lastTime:
+            result["PCPU"] = 100.0 * usedTicks / CLOCK_TICKS / (now - self.lastTime)
+
+        with self.lock:
+            self.cpuTicks = cpuTicks
+            self.lastTime = now
+            for metric, value in result.items():
+                self.buffers[metric].append(value)
+        return result
+
+    def last(self, metric):
+        with self.lock:
+            return self.buffers[metric].last()
+
+    def summary(self, metric):
+        """
+        _summary_
+
+        min, max and average of a metric over all the samples
+        """
+        with self.lock:
+            return self.buffers[metric].summary()
+
+    def start(self, interval):
+        """
+        _start_
+
+        Sample every interval seconds, can be below one second, in a
+        background thread until stop() is called or the process is gone
+        """
+        self.stopEvent.clear()
+        self.thread = threading.Thread(target = self._run, args = (interval,),
+                                       name = "ProcessSampler-%i" % self.pid)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stopEvent.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self, interval):
+        while not self.stopEvent.isSet():
+            try:
+                if self.sample() is None:
+                    return
+            except Exception as ex:
+                logging.error("Error sampling process %i: %s", self.pid, str(ex))
+            self.stopEvent.wait(interval)
@@ -199,8 +199,9 @@ def nodeIterator(node):
     Generator function that delivers all nodes in order
 
     """
-    for i in listNodes(node):
-        yield getNode(node, i)
+    yield node
+    for child in nodeChildIterator(node):
+        yield child
 
 def nodeChildIterator(node):
     """
@@ -208,8 +209,9 @@ def nodeChildIterator(node):
 
     iterate over all nodes in order, except for the top node passed to this method
     """
-    for i in listChildNodes(node):
-        yield getNode(node, i)
+    for child in firstGenNodeChildIterator(node):
+        for x in nodeIterator(child):
+            yield x
 
 def firstGenNodeChildIterator(node):
     """
@@ -217,8 +219,8 @@ def firstGenNodeChildIterator(node):
 
     Iterator over all the first generation child nodes.
     """
-    for i in listFirstGenChildNodes(node):
-        yield getNode(node, i)
+    for i in list(listFirstGenChildNodes(node)):
+        yield getattr(node.tree.children, i)
 
 def format(value):
     """
@@ -343,15 +345,15 @@ class TreeHelper:
         """
         generator for processing all subnodes in execution order
         """
-        for i in listNodes(self.data):
-            yield getNode(self.data, i)
+        for node in list(nodeIterator(self.data)):
+            yield node
 
     def nodeChildIterator(self):
         """
         generator for processing all subnodes in execution order
         """
-        for i in listChildNodes(self.data):
-            yield getNode(self.data, i)
+        for node in list(nodeChildIterator(self.data)):
+            yield node
 
     def firstGenNodeChildIterator(self):
         """
@@ -359,8 +361,8 @@ class TreeHelper:
 
         Iterate over all the first generation child nodes.
         """
-        for i in listFirstGenChildNodes(self.data):
-            yield getNode(self.data, i)
+        for node in firstGenNodeChildIterator(self.data):
+            yield node
 
     def pythoniseDict(self, **options):
         """
@@ -43,9 +43,14 @@ class TaskMaker:
     """
 
 
-    def __init__(self, workload = None, workdir = None):
+    def __init__(self, workload = None, workdir = None, sandboxOptions = None):
+        """
+        sandboxOptions are the SandboxCreator arguments (compression,
+        compressLevel, layerCache) used to build the workload sandbox
+        """
         self.workload = None
         self.workdir  = None
+        self.sandboxOptions = sandboxOptions or {}
         self.skipSubscription = False
         self.workflowDict = {}
         self.subDict      = {}
@@ -135,7 +140,7 @@ class TaskMaker:
                 if not self.skipSubscription:
                     subscribeInfo = self.subscribeWMBS(task)
 
-        sandboxCreator = SandboxCreator()
+        sandboxCreator = SandboxCreator(**self.sandboxOptions)
         sandboxCreator.makeSandbox(self.workdir, self.workload)
         logging.info('Done processing workload %s' %(self.workload.name()))
 
@@ -13,12 +13,102 @@ from __future__ import print_function
 
 
 
+import os
 import cPickle
+import threading
 import urllib2
+from collections import OrderedDict
 from urllib2 import urlopen, Request
 from urlparse import urlparse
 import json
 
+
+class SpecCache(object):
+    """
+    _SpecCache_
+
+    Process wide cache of unpickled specs loaded from local files, so
+    components that load the same spec over and over only unpickle it
+    once.  Entries are keyed by path and only used while the file keeps
+    the same modification time and size.  The least recently used specs
+    are evicted once the total size of the cached spec files goes over
+    maxSize bytes.
+
+    The cached data is shared by all the callers, it must not be modified.
+    """
+    def __init__(self, maxSize = 256 * 1024 * 1024):
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def load(self, path):
+        """
+        _load_
+
+        Return the unpickled content of the file, from the cache if the
+        file didn't change since it was cached
+        """
+        fileStat = os.stat(path)
+        key = (fileStat.st_mtime, fileStat.st_size)
+
+        with self.lock:
+            entry = self.entries.pop(path, None)
+            if entry is not None:
+                if entry[0] == key:
+                    # put it back as the most recently used
+                    self.entries[path] = entry
+                    self.hits += 1
+                    return entry[1]
+                self.size -= entry[0][1]
+            self.misses += 1
+
+        handle = open(path, 'rb')
+        try:
+            data = cPickle.load(handle)
+        finally:
+            handle.close()
+
+        with self.lock:
+            if path in self.entries:
+                self.size -= self.entries.pop(path)[0][1]
+            self.entries[path] = (key, data)
+            self.size += key[1]
+            while self.size > self.maxSize and len(self.entries) > 1:
+                _, (oldKey, _) = self.entries.popitem(last = False)
+                self.size -= oldKey[1]
+                self.evictions += 1
+        return data
+
+    def clear(self):
+        """
+        _clear_
+
+        Drop all the cached specs
+        """
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+        return
+
+    def statistics(self):
+        """
+        _statistics_
+
+        Hit, miss and eviction counters plus the current cache content
+        """
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'entries': len(self.entries),
+                    'size': self.size}
+
+
+specCache = SpecCache()
+
+
 class PersistencyHelper:
     """
     _PersistencyHelper_
@@ -48,19 +138,26 @@ class PersistencyHelper:
         handle.close()
         return
 
-    def load(self, filename):
+    def load(self, filename, cache = False):
         """
         _load_
 
         UncPickle data from file
 
+        If cache is True local files are loaded through the process wide
+        spec cache, the data is then shared and must not be modified.
         """
 
         #TODO: currently support both loading from file path or url
         #if there are more things to filter may be separate the load function
 
+        scheme, _, path = urlparse(filename)[:3]
+        if cache and scheme in ('', 'file') and os.path.isfile(path):
+            self.data = specCache.load(path)
+            return
+
         # urllib2 needs a scheme - assume local file if none given
-        if not urlparse(filename)[0]:
+        if not scheme:
             filename = 'file:' + filename
             handle = urlopen(Request(filename, headers = {"Accept" : "*/*"}))
             self.data = cPickle.load(handle)
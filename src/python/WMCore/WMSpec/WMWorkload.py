@@ -6,7 +6,7 @@ Request level processing specification, acts as a container of a set
 of related tasks.
 """
 from WMCore.Configuration import ConfigSection
-from WMCore.WMSpec.ConfigSectionTree import findTop
+from WMCore.WMSpec.ConfigSectionTree import findTop, nodeIterator
 from WMCore.WMSpec.Persistency import PersistencyHelper
 from WMCore.WMSpec.WMWorkloadTools import validateArgumentsUpdate, strToBool, \
     loadSpecClassByType, setAssignArgumentsWithDefault
@@ -60,6 +60,9 @@ class WMWorkloadHelper(PersistencyHelper):
     Methods & Utils for working with a WMWorkload instance.
     """
 
+    # workload data the task index was built for
+    _taskIndexData = None
+
     def __init__(self, wmWorkload=None):
         self.data = wmWorkload
 
@@ -278,6 +281,93 @@ class WMWorkloadHelper(PersistencyHelper):
             return None
         return WMTaskHelper(task)
 
+    def _buildTaskIndex(self):
+        """
+        _buildTaskIndex_
+
+        Index the task nodes of the workload by path and by name.  The index
+        belongs to the current workload data, it is rebuilt if the data is
+        replaced (i.e. by load).
+        """
+        self._taskPaths = {}
+        self._taskNames = {}
+        self._taskIndexData = self.data
+        for taskName in self.data.tasks.tasklist:
+            topTask = getattr(self.data.tasks, taskName, None)
+            if topTask is not None:
+                self._indexTasks(topTask)
+        return
+
+    def _indexTasks(self, taskNode):
+        """
+        _indexTasks_
+
+        Add a task node and all the tasks below it to the index, the first
+        task found in execution order wins
+        """
+        for node in nodeIterator(taskNode):
+            self._taskPaths.setdefault(getattr(node, "pathName", None), node)
+            self._taskNames.setdefault(node._internal_name, node)
+        return
+
+    def _unindexTasks(self, taskNode):
+        """
+        _unindexTasks_
+
+        Drop a task node and all the tasks below it from the index
+        """
+        for node in nodeIterator(taskNode):
+            pathName = getattr(node, "pathName", None)
+            if self._taskPaths.get(pathName) is node:
+                del self._taskPaths[pathName]
+            if self._taskNames.get(node._internal_name) is node:
+                del self._taskNames[node._internal_name]
+        return
+
+    def _taskInWorkload(self, taskNode):
+        """
+        _taskInWorkload_
+
+        Check that the task node is still part of the workload, walking up
+        the task tree. Tasks can be added, removed and moved around through
+        the task helpers without the workload knowing.
+        """
+        node = taskNode
+        while True:
+            parent = node._internal_parent_ref
+            if parent is None or getattr(parent, node._internal_name, None) is not node:
+                return False
+            if parent is self.data.tasks:
+                return node._internal_name in self.data.tasks.tasklist
+            # parent is the tree.children section of the parent task
+            tree = parent._internal_parent_ref
+            if tree is None or tree._internal_parent_ref is None:
+                return False
+            node = tree._internal_parent_ref
+
+    def _lookupTask(self, index, key, keyOf):
+        """
+        _lookupTask_
+
+        Find a task node in one of the task indexes. A hit is only used if
+        the task still has that key and is still in the workload, otherwise
+        the index is rebuilt and the lookup retried once.
+        """
+        if self._taskIndexData is not self.data:
+            self._buildTaskIndex()
+            rebuilt = True
+        else:
+            rebuilt = False
+
+        while True:
+            node = getattr(self, index).get(key)
+            if node is not None and keyOf(node) == key and self._taskInWorkload(node):
+                return node
+            if rebuilt:
+                return None
+            self._buildTaskIndex()
+            rebuilt = True
+
     def getTaskByPath(self, taskPath):
         """
         _getTask_
@@ -285,11 +375,6 @@ class WMWorkloadHelper(PersistencyHelper):
         Get a task instance based on the path name
 
         """
-        mapping = {}
-        for t in self.taskIterator():
-            [mapping.__setitem__(x.getPathName, x.name())
-             for x in t.taskIterator()]
-
         taskList = parseTaskPath(taskPath)
 
         if taskList[0] != self.name():  # should always be workload name first
@@ -303,15 +388,31 @@ class WMWorkloadHelper(PersistencyHelper):
             msg += taskPath
             raise RuntimeError(msg)
 
-        topTask = self.getTask(taskList[1])
+        topTask = getattr(self.data.tasks, taskList[1], None)
         if topTask == None:
             msg = "Task /%s/%s Not Found in Workload" % (taskList[0],
                                                          taskList[1])
             raise RuntimeError(msg)
-        for x in topTask.taskIterator():
-            if x.getPathName() == taskPath:
-                return x
-        return None
+
+        node = self._lookupTask("_taskPaths", taskPath,
+                                lambda x: getattr(x, "pathName", None))
+        if node is None:
+            return None
+        return WMTaskHelper(node)
+
+    def getTaskByName(self, taskName):
+        """
+        _getTaskByName_
+
+        Get a task instance at any level of the workload based on its name,
+        None if there is no such task
+
+        """
+        node = self._lookupTask("_taskNames", taskName,
+                                lambda x: x._internal_name)
+        if node is None:
+            return None
+        return WMTaskHelper(node)
 
     def taskIterator(self):
         """
@@ -369,9 +470,8 @@ class WMWorkloadHelper(PersistencyHelper):
         Get all tasks from a workload
         """
         tasks = []
-        pathNames = self.listAllTaskPathNames()
-        for n in pathNames:
-            tasks.append(self.getTaskByPath(taskPath=n))
+        for t in self.taskIterator():
+            tasks.extend(t.taskIterator())
 
         return tasks
 
@@ -397,6 +497,8 @@ class WMWorkloadHelper(PersistencyHelper):
             raise RuntimeError(msg)
         self.data.tasks.tasklist.append(taskName)
         setattr(self.data.tasks, taskName, task)
+        if self._taskIndexData is self.data:
+            self._indexTasks(task)
         return
 
     def newTask(self, taskName):
@@ -424,8 +526,11 @@ class WMWorkloadHelper(PersistencyHelper):
         Remove given task with given name
 
         """
+        task = getattr(self.data.tasks, taskName)
         self.data.tasks.__delattr__(taskName)
         self.data.tasks.tasklist.remove(taskName)
+        if self._taskIndexData is self.data:
+            self._unindexTasks(task)
         return
 
     def setSiteWildcardsLists(self, siteWhitelist, siteBlacklist, wildcardDict):
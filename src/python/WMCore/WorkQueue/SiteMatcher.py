@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+SiteMatcher
+
+Match workqueue elements to sites with free job slots.
+
+Sites are numbered and sets of sites are kept as integer bitsets, so the
+site restriction of an element (white list, black list and data location)
+and the sites that still have free slots are combined with a single and.
+Elements are matched in descending priority order, so the number of jobs
+running at a site with a priority higher or equal to the current element
+only ever grows and is kept as a running count per site.
+"""
+
+import random
+
+
+class SiteMatcher(object):
+    """
+    Assign elements to sites honouring thresholds and job priorities
+
+    thresholds is a dictionary of site name to the maximum number of running
+    jobs at that site, siteJobCounts a dictionary of site name to a
+    dictionary of priority to the number of jobs running at that priority.
+    siteJobCounts is updated with the jobs of the matched elements.
+    """
+    def __init__(self, thresholds, siteJobCounts):
+        self.thresholds = thresholds
+        self.siteJobCounts = siteJobCounts
+
+        self.sites = thresholds.keys()
+        self.siteIndex = dict((site, i) for i, site in enumerate(self.sites))
+        self.allSites = (1 << len(self.sites)) - 1
+        self.locationMasks = {}
+
+        # jobs running at each site with a priority >= the current one
+        self.runningJobs = [0] * len(self.sites)
+        # sites with free slots at the current priority
+        self.openSites = self.allSites
+
+        # pending counts in descending priority order, taken into
+        # account when the element priority drops to their level
+        self.pendingCounts = []
+        for site, counts in siteJobCounts.items():
+            if site not in self.siteIndex:
+                continue
+            for prio, jobs in counts.items():
+                self.pendingCounts.append((prio, site, jobs))
+        self.pendingCounts.sort(key=lambda x: x[0], reverse=True)
+        self.pendingIndex = 0
+
+        for site in self.sites:
+            self._addJobs(site, 0)
+
+    def _randomSite(self, mask):
+        """
+        Pick one of the sites in the mask at random. Try random sites first,
+        that is quick when many sites are possible, and only list the sites
+        in the mask if that fails.
+        """
+        for _ in range(8):
+            index = random.randrange(len(self.sites))
+            if mask >> index & 1:
+                return self.sites[index]
+        return random.choice(self._siteNames(mask))
+
+    def _siteNames(self, mask):
+        """Return the names of the sites in the mask"""
+        sites = []
+        while mask:
+            lowest = mask & -mask
+            sites.append(self.sites[lowest.bit_length() - 1])
+            mask ^= lowest
+        return sites
+
+    def _addJobs(self, site, jobs):
+        """Count jobs running at site, closing it when full"""
+        index = self.siteIndex[site]
+        self.runningJobs[index] += jobs
+        if self.runningJobs[index] < self.thresholds[site]:
+            self.openSites |= 1 << index
+        else:
+            self.openSites &= ~(1 << index)
+
+    def _advanceTo(self, prio):
+        """Take into account the existing jobs with priority >= prio"""
+        while self.pendingIndex < len(self.pendingCounts) and \
+                self.pendingCounts[self.pendingIndex][0] >= prio:
+            _, site, jobs = self.pendingCounts[self.pendingIndex]
+            self._addJobs(site, jobs)
+            self.pendingIndex += 1
+
+    def siteMask(self, sites):
+        """Bitset of the known sites in sites"""
+        mask = 0
+        for site in sites:
+            if site in self.siteIndex:
+                mask |= 1 << self.siteIndex[site]
+        return mask
+
+    def _locationMask(self, locations):
+        """Bitset of a data location list, these repeat a lot among elements"""
+        key = tuple(locations)
+        try:
+            return self.locationMasks[key]
+        except KeyError:
+            mask = self.locationMasks[key] = self.siteMask(locations)
+            return mask
+
+    def restrictionMask(self, element):
+        """
+        Bitset of the sites that pass the element site restriction,
+        it follows WorkQueueElement.passesSiteRestriction
+        """
+        if element['SiteWhitelist']:
+            mask = self.siteMask(element['SiteWhitelist'])
+        else:
+            mask = self.allSites
+        mask &= ~self.siteMask(element['SiteBlacklist'])
+
+        if element.get('NoLocationUpdate'):
+            return mask
+
+        if element['NoInputUpdate'] is False:
+            for locations in element['Inputs'].values():
+                mask &= self._locationMask(locations)
+            if element['ParentFlag']:
+                for locations in element['ParentData'].values():
+                    mask &= self._locationMask(locations)
+
+        if element['NoPileupUpdate'] is False:
+            for locations in element['PileupData'].values():
+                mask &= self._locationMask(locations)
+
+        return mask
+
+    def match(self, element):
+        """
+        Find a site for the element, elements must be given in descending
+        priority order.  Returns the site, picked at random among the
+        possible ones, or None if the element can't run anywhere.
+        """
+        prio = element['Priority']
+        self._advanceTo(prio)
+
+        candidates = self.restrictionMask(element) & self.openSites
+        if not candidates:
+            return None
+
+        possibleSite = self._randomSite(candidates)
+        jobs = element['Jobs'] * element.get('blowupFactor', 1.0)
+        self._addJobs(possibleSite, jobs)
+        counts = self.siteJobCounts.setdefault(possibleSite, {})
+        counts[prio] = counts.get(prio, 0) + jobs
+        return possibleSite
@@ -155,17 +155,20 @@ class WMBSHelper(WMConnectionBase):
     Interface between the WorkQueue and WMBS.
     """
 
-    def __init__(self, wmSpec, taskName, blockName=None, mask=None, cachepath='.'):
+    def __init__(self, wmSpec, taskName, blockName=None, mask=None, cachepath='.',
+                 sandboxOptions=None):
         """
         _init_
 
-        Initialize DAOs and other things needed.
+        Initialize DAOs and other things needed.  sandboxOptions are the
+        SandboxCreator arguments (compression, compressLevel, layerCache).
         """
         self.block = blockName
         self.mask = mask
         self.wmSpec = wmSpec
         self.topLevelTask = wmSpec.getTask(taskName)
         self.cachepath = cachepath
+        self.sandboxOptions = sandboxOptions or {}
         self.isDBS = True
 
         self.topLevelFileset = None
@@ -208,7 +211,7 @@ class WMBSHelper(WMConnectionBase):
 
     def createSandbox(self):
         """Create the runtime sandbox"""
-        sandboxCreator = SandboxCreator()
+        sandboxCreator = SandboxCreator(**self.sandboxOptions)
         sandboxCreator.makeSandbox(self.cachepath, self.wmSpec)
 
     def createTopLevelFileset(self, topLevelFilesetName=None):
@@ -135,6 +135,9 @@ class WorkQueue(WorkQueueBase):
 
         self.params.setdefault('JobDumpConfig', None)
         self.params.setdefault('BossAirConfig', None)
+        # SandboxCreator arguments for the workflow sandboxes, e.g. the
+        # compression, compressLevel and layerCache
+        self.params.setdefault('SandboxOptions', {})
 
         self.params['QueueURL'] = self.backend.queueUrl  # url this queue is visible on
         # backend took previous QueueURL and sanitized it
@@ -437,7 +440,8 @@ class WorkQueue(WorkQueueBase):
         self.logger.info("Adding WMBS subscription for %s" % match['RequestName'])
 
         mask = match['Mask']
-        wmbsHelper = WMBSHelper(wmspec, match['TaskName'], blockName, mask, self.params['CacheDir'])
+        wmbsHelper = WMBSHelper(wmspec, match['TaskName'], blockName, mask, self.params['CacheDir'],
+                                self.params['SandboxOptions'])
 
         sub, match['NumOfFilesAdded'] = wmbsHelper.createSubscriptionAndAddFiles(block=dbsBlock)
         self.logger.info("Created top level subscription %s for %s with %s files" % (sub['id'],
@@ -469,7 +473,8 @@ class WorkQueue(WorkQueueBase):
             if ele['NumOfFilesAdded'] != len(dbsBlock['Files']):
                 self.logger.info("Adding new files to open block %s (%s)" % (blockName, ele.id))
                 from WMCore.WorkQueue.WMBSHelper import WMBSHelper
-                wmbsHelper = WMBSHelper(wmspec, ele['TaskName'], blockName, ele['Mask'], self.params['CacheDir'])
+                wmbsHelper = WMBSHelper(wmspec, ele['TaskName'], blockName, ele['Mask'], self.params['CacheDir'],
+                                        self.params['SandboxOptions'])
                 ele['NumOfFilesAdded'] += wmbsHelper.createSubscriptionAndAddFiles(block=dbsBlock)[1]
                 self.backend.updateElements(ele.id, NumOfFilesAdded=ele['NumOfFilesAdded'])
             if dbsBlock['IsOpen'] != ele['OpenForNewData']:
@@ -5,13 +5,13 @@ WorkQueueBackend
 Interface to WorkQueue persistent storage
 """
 
-import random
 import time
 import urllib
 
 from WMCore.Database.CMSCouch import CouchServer, CouchNotFoundError, Document
 from WMCore.WorkQueue.WorkQueueExceptions import WorkQueueNoMatchingElements
 from WMCore.WorkQueue.DataStructs.CouchWorkQueueElement import CouchWorkQueueElement, fixElementConflicts
+from WMCore.WorkQueue.SiteMatcher import SiteMatcher
 from WMCore.Wrappers import JsonWrapper as json
 from WMCore.WMSpec.WMWorkload import WMWorkloadHelper
 from WMCore.Lexicon import sanitizeURL
@@ -368,29 +368,12 @@ class WorkQueueBackend(object):
         sortedElements.sort(key=lambda element: element['CreationTime'])
         sortedElements.sort(key = lambda x: x['Priority'], reverse = True)
          
+        matcher = SiteMatcher(thresholds, siteJobCounts)
         for element in sortedElements:
-            prio = element['Priority']
-
-            possibleSite = None
-            sites = thresholds.keys()
-            random.shuffle(sites)
-            for site in sites:
-                if element.passesSiteRestriction(site):
-                    # Count the number of jobs currently running of greater priority
-                    prio = element['Priority']
-                    curJobCount = sum(map(lambda x: x[1] if x[0] >= prio else 0, siteJobCounts.get(site, {}).items()))
-                    self.logger.debug("Job Count: %s, site: %s threshods: %s" % (curJobCount, site, thresholds[site]))
-                    if curJobCount < thresholds[site]:
-                        possibleSite = site
-                        break
-
+            possibleSite = matcher.match(element)
             if possibleSite:
                 self.logger.debug("Possible site exists %s" % str(possibleSite))
                 elements.append(element)
-                if possibleSite not in siteJobCounts:
-                    siteJobCounts[possibleSite] = {}
-                siteJobCounts[possibleSite][prio] = siteJobCounts[possibleSite].setdefault(prio, 0) + \
-                                                    element['Jobs'] * element.get('blowupFactor', 1.0)
             else:
                 self.logger.info("No possible site for %s with doc id %s", element['RequestName'], element.id)
 
@@ -16,6 +16,7 @@ import time
 import traceback
 import sys
 
+from WMCore.DAOFactory import daoStatistics
 from WMCore.Database.Transaction import Transaction
 from WMCore.Database.CMSCouch import CouchError
 from WMCore.Database.CouchUtils import CouchConnectionError
@@ -119,6 +120,10 @@ class BaseWorkerThread:
         logging.info("Initialising default transaction")
         myThread.transaction = Transaction(myThread.dbi)
 
+        if hasattr(self.component.config, "Agent"):
+            if getattr(self.component.config.Agent, "daoStatistics", False):
+                daoStatistics.enable()
+
         # Call worker setup
         self.setup(parameters)
         myThread.transaction.commit()
@@ -177,6 +182,9 @@ class BaseWorkerThread:
                                     msg += " Raise a bug against me. Rollback."
                                     logging.error(msg)
                                     myThread.transaction.rollback()
+                                if daoStatistics.enabled:
+                                    logging.info(daoStatistics.report())
+                                    daoStatistics.reset()
                         except Exception as ex:
                             if myThread.transaction.transaction is not None:
                                 myThread.transaction.rollback()
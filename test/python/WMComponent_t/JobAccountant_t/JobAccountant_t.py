@@ -11,6 +11,7 @@ import threading
 import unittest
 import time
 import copy
+import pickle
 
 import WMCore.WMBase
 from WMCore.FwkJobReport.Report import Report
@@ -33,7 +34,7 @@ from WMCore.DataStructs.Run   import Run
 from WMComponent.JobAccountant.JobAccountantPoller import JobAccountantPoller
 from WMComponent.DBS3Buffer.DBSBufferFile import DBSBufferFile
 from WMComponent.DBS3Buffer.DBSBufferDataset import DBSBufferDataset
-from WMComponent.JobAccountant.AccountantWorker import AccountantWorker
+from WMComponent.JobAccountant.AccountantWorker import AccountantWorker, preloadJobReport, PreloadedReport
 from nose.plugins.attrib import attr
 
 class JobAccountantTest(unittest.TestCase):
@@ -662,6 +663,94 @@ class JobAccountantTest(unittest.TestCase):
 
         return
 
+    def testReportLoaderProcesses(self):
+        """
+        _testReportLoaderProcesses_
+
+        Verify that the split jobs are accounted the same way when the job
+        reports are loaded by a pool of processes.
+        """
+        self.setupDBForSplitJobSuccess()
+        config = self.createConfig()
+        config.JobAccountant.reportLoaderProcesses = 2
+
+        self.testJobB["state"] = "complete"
+        self.testJobC["state"] = "complete"
+        self.stateChangeAction.execute(jobs = [self.testJobB, self.testJobC])
+
+        accountant = JobAccountantPoller(config)
+        accountant.setup()
+        accountant.algorithm()
+        accountant.terminate()
+
+        fwjrBasePath = os.path.join(WMCore.WMBase.getTestBase(),
+                                    "WMComponent_t/JobAccountant_t/fwjrs/")
+        for (testJob, fwjrName) in [(self.testJobA, "SplitSuccessA.pkl"),
+                                    (self.testJobB, "SplitSuccessB.pkl"),
+                                    (self.testJobC, "SplitSuccessC.pkl")]:
+            jobReport = Report()
+            jobReport.unpersist(fwjrBasePath + fwjrName)
+            self.verifyFileMetaData(testJob["id"], jobReport.getAllFilesFromStep("cmsRun1"), site = "T2_CH_CERN")
+            self.verifyJobSuccess(testJob["id"])
+
+        self.recoOutputFileset.loadData()
+        self.alcaOutputFileset.loadData()
+        self.assertEqual(len(self.recoOutputFileset.getFiles(type = "list")), 3)
+        self.assertEqual(len(self.alcaOutputFileset.getFiles(type = "list")), 3)
+        self.assertEqual(len(self.testSubscription.filesOfStatus("Completed")), 1)
+        return
+
+    def testPreloadJobReport(self):
+        """
+        _testPreloadJobReport_
+
+        Verify that the report loader processes send back the files, outcome
+        and FWJR couch document payload of a report without the report
+        itself, and that a PreloadedReport behaves like the report.
+        """
+        fwjrPath = os.path.join(WMCore.WMBase.getTestBase(),
+                                "WMComponent_t/JobAccountant_t/fwjrs/SplitSuccessA.pkl")
+        jobReport = Report()
+        jobReport.unpersist(fwjrPath)
+
+        summary = preloadJobReport({"id": 1, "fwjr_path": fwjrPath})
+        self.assertEqual(summary["fwjr"], jobReport.__to_json__(None))
+        self.assertEqual(summary["jobSuccess"], jobReport.taskSuccessful())
+        self.assertEqual(sorted([x["lfn"] for x in summary["allFiles"]]),
+                         sorted([x["lfn"] for x in jobReport.getAllFiles()]))
+        for fwjrFile in summary["allFiles"]:
+            step, outputModule, n = fwjrFile["fileRef"]
+            fileRef = getattr(jobReport.getOutputModule(step, outputModule).files, "file%i" % n)
+            self.assertEqual(fileRef.lfn, fwjrFile["lfn"])
+        self.assertFalse("WMCore.FwkJobReport.Report" in pickle.dumps(summary, 2))
+
+        # the changes the worker and ChangeState make end up in the payload
+        preloaded = PreloadedReport(pickle.loads(pickle.dumps(summary, 2)))
+        for fileRef in jobReport.getAllFileRefs():
+            fileRef.location = "T1_US_FNAL_Disk"
+        preloaded.mapLocations(lambda location: "T1_US_FNAL_Disk")
+        for fwjrFile in summary["allFiles"]:
+            step, outputModule, n = fwjrFile["fileRef"]
+            fileRef = getattr(jobReport.getOutputModule(step, outputModule).files, "file%i" % n)
+            fileRef.merged = True
+            preloaded.setFileMerged(fwjrFile["fileRef"])
+        jobReport.stripInputFiles()
+        preloaded.stripInputFiles()
+        jobReport.setTaskName("/Test/Task")
+        preloaded.setTaskName("/Test/Task")
+        self.assertEqual(preloaded.__to_json__(None), jobReport.__to_json__(None))
+        self.assertEqual(preloaded.getExitCode(), jobReport.getExitCode())
+        self.assertEqual(preloaded.getAllInputFiles(), [])
+        for step in jobReport.listSteps():
+            self.assertEqual([(x["lfn"], x["locations"]) for x in preloaded.getAllFilesFromStep(step)],
+                             [(x["lfn"], x["locations"]) for x in jobReport.getAllFilesFromStep(step)])
+
+        summary = preloadJobReport({"id": 1, "fwjr_path": "/does/not/exist"})
+        self.assertFalse(summary["jobSuccess"])
+        self.assertEqual(summary["allFiles"], [])
+        self.assertEqual(PreloadedReport(summary).getExitCode(), 84)
+        return
+
     def setupDBForMergedSkimSuccess(self):
         """
         _setupDBForMergedSkimSuccess_
@@ -28,6 +28,7 @@ from WMCore.WMBS.Fileset      import Fileset
 from WMCore.WMBS.Workflow     import Workflow
 from WMCore.WMBS.Subscription import Subscription
 from WMCore.DataStructs.Run   import Run
+from WMCore.DataStructs.JobStore import JobStore
 
 from WMCore.Agent.Configuration              import Configuration
 from WMComponent.JobCreator.JobCreatorPoller import JobCreatorPoller
@@ -303,12 +304,12 @@ class JobCreatorTest(unittest.TestCase):
         self.assertTrue('job_1' in listOfDirs)
         self.assertTrue('job_2' in listOfDirs)
         self.assertTrue('job_3' in listOfDirs)
-        jobDir = os.listdir(groupDirectory)[0]
-        jobFile = os.path.join(groupDirectory, jobDir, 'job.pkl')
-        self.assertTrue(os.path.isfile(jobFile))
-        f = open(jobFile, 'r')
-        job = cPickle.load(f)
-        f.close()
+        jobStore = JobStore(groupDirectory)
+        self.assertTrue(jobStore.exists())
+        self.assertEqual(len(jobStore.jobIDs()),
+                         len([x for x in os.listdir(groupDirectory) if x.startswith('job_')]))
+        job = jobStore.getJob(jobStore.jobIDs()[0])
+        jobStore.close()
 
         self.assertEqual(job.baggage.PresetSeeder.generator.initialSeed, 1001)
         self.assertEqual(job.baggage.PresetSeeder.evtgenproducer.initialSeed, 1001)
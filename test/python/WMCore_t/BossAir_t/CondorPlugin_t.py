@@ -8,6 +8,7 @@ CondorPlugin unittests
 from __future__ import print_function
 import time
 import os.path
+import subprocess
 import threading
 import unittest
 
@@ -16,6 +17,7 @@ from subprocess import Popen, PIPE
 
 from WMCore.BossAir.BossAirAPI   import BossAirAPI
 from WMCore.BossAir.StatusPoller import StatusPoller
+from WMCore.BossAir.Plugins.CondorPlugin         import CondorPlugin
 from WMCore.JobStateMachine.ChangeState          import ChangeState
 from WMComponent.JobSubmitter.JobSubmitterPoller import JobSubmitterPoller
 from WMComponent.JobTracker.JobTrackerPoller     import JobTrackerPoller
@@ -467,5 +469,132 @@ class CondorPluginTest(BossAirTest):
         return
 
 
+class FakeCondorQ(object):
+    """
+    Stand in for subprocess.Popen that answers with canned condor_q output
+    """
+    output = ""
+
+    def __init__(self, command, **kwargs):
+        self.returncode = 0
+
+    def communicate(self):
+        return FakeCondorQ.output, ""
+
+
+def condorQAd(jobID, jobStatus, site = "undefined"):
+    """
+    Format a classAd like the condor_q command in CondorPlugin.getClassAds
+    """
+    return "(JobStatus:%i)  (stateTime:300)  (runningTime:200)  (submitTime:100)  " \
+           "(DESIRED_Sites:T2_XX_SiteA)  (ExtDESIRED_Sites:T2_XX_SiteA)  " \
+           "(runningCMSSite:%s)  (WMAgentID:%i):::" % (jobStatus, site, jobID)
+
+
+class TrackingCondorPlugin(CondorPlugin):
+    """
+    CondorPlugin with only the state used for tracking, the real __init__
+    needs a database for the site lookups
+    """
+    def __init__(self):
+        self.agent = "WMAgent"
+        self.removeTime = 60
+        self.classAdCache = {}
+        self.trackedAds = {}
+        self.pool = []
+
+    def close(self):
+        return
+
+
+class CondorPluginTrackTest(unittest.TestCase):
+    """
+    _CondorPluginTrackTest_
+
+    Feed canned classAds to the CondorPlugin tracking, no condor needed
+    """
+    def setUp(self):
+        self.plugin = TrackingCondorPlugin()
+        self.popen = subprocess.Popen
+        subprocess.Popen = FakeCondorQ
+        return
+
+    def tearDown(self):
+        subprocess.Popen = self.popen
+        return
+
+    def testGetClassAds(self):
+        """
+        _testGetClassAds_
+
+        Verify that the classAds are parsed and that unchanged ads come
+        from the cache
+        """
+        FakeCondorQ.output = condorQAd(1, 1) + condorQAd(2, 2, "T2_XX_SiteA")
+        jobInfo = self.plugin.getClassAds()
+        self.assertEqual(sorted(jobInfo.keys()), [1, 2])
+        self.assertEqual(jobInfo[1]["JobStatus"], "1")
+        self.assertEqual(jobInfo[2]["runningCMSSite"], "T2_XX_SiteA")
+        self.assertEqual(jobInfo[2]["submitTime"], "100")
+
+        FakeCondorQ.output = condorQAd(1, 1) + condorQAd(2, 4, "T2_XX_SiteA") + condorQAd(3, 1)
+        newJobInfo = self.plugin.getClassAds()
+        self.assertTrue(newJobInfo[1] is jobInfo[1])
+        self.assertFalse(newJobInfo[2] is jobInfo[2])
+        self.assertEqual(newJobInfo[2]["JobStatus"], "4")
+        self.assertEqual(newJobInfo[3]["JobStatus"], "1")
+        self.assertEqual(len(self.plugin.classAdCache), 3)
+
+        # ads that went away are dropped from the cache
+        FakeCondorQ.output = condorQAd(3, 1)
+        self.assertEqual(self.plugin.getClassAds().keys(), [3])
+        self.assertEqual(len(self.plugin.classAdCache), 1)
+        return
+
+    def testTrack(self):
+        """
+        _testTrack_
+
+        Verify that track picks up status changes and skips the jobs whose
+        classAd did not change
+        """
+        jobs = [{"jobid": 1, "status": "New", "status_time": 0},
+                {"jobid": 2, "status": "Idle", "status_time": 100},
+                {"jobid": 3, "status": "Running", "status_time": 200}]
+
+        FakeCondorQ.output = condorQAd(1, 1) + condorQAd(2, 2, "T2_XX_SiteA")
+        runningList, changeList, completeList = self.plugin.track(jobs)
+        self.assertEqual([job["jobid"] for job in runningList], [1, 2])
+        self.assertEqual([job["jobid"] for job in changeList], [1, 2])
+        self.assertEqual([job["jobid"] for job in completeList], [3])
+        self.assertEqual((jobs[0]["status"], jobs[0]["status_time"]), ("Idle", 100))
+        self.assertEqual((jobs[1]["status"], jobs[1]["status_time"]), ("Running", 200))
+        self.assertEqual(jobs[1]["location"], "T2_XX_SiteA")
+        self.assertEqual(jobs[1]["globalState"], "Running")
+
+        # Nothing changed, the cached ads are not looked at again
+        for ad in self.plugin.classAdCache.values():
+            ad["JobStatus"] = "5"
+        runningList, changeList, completeList = self.plugin.track(jobs[:2])
+        self.assertEqual([job["jobid"] for job in runningList], [1, 2])
+        self.assertEqual(changeList, [])
+        self.assertEqual(completeList, [])
+        self.assertEqual(jobs[0]["status"], "Idle")
+
+        # A changed ad is handled
+        FakeCondorQ.output = condorQAd(1, 1) + condorQAd(2, 4, "T2_XX_SiteA")
+        runningList, changeList, completeList = self.plugin.track(jobs[:2])
+        self.assertEqual([job["jobid"] for job in changeList], [2])
+        self.assertEqual((jobs[1]["status"], jobs[1]["status_time"]), ("Complete", 300))
+        self.assertEqual(jobs[1]["globalState"], "Complete")
+
+        # No classAds at all, the jobs go through Removed
+        FakeCondorQ.output = ""
+        runningList, changeList, completeList = self.plugin.track(jobs[:1])
+        self.assertEqual(changeList, jobs[:1])
+        self.assertEqual(jobs[0]["status"], "Removed")
+        return
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -15,6 +15,7 @@ from subprocess import Popen, PIPE
 
 from WMCore.BossAir.BossAirAPI   import BossAirAPI
 from WMCore.BossAir.StatusPoller import StatusPoller
+from WMCore.BossAir.Plugins.PyCondorPlugin       import PyCondorPlugin
 from WMCore.JobStateMachine.ChangeState          import ChangeState
 from WMComponent.JobSubmitter.JobSubmitterPoller import JobSubmitterPoller
 from WMComponent.JobTracker.JobTrackerPoller     import JobTrackerPoller
@@ -457,5 +458,97 @@ class PyCondorPluginTest(BossAirTest):
         return
 
 
+class TrackingPyCondorPlugin(PyCondorPlugin):
+    """
+    PyCondorPlugin answering with canned classAds instead of asking the
+    schedd, the real __init__ needs a database for the site lookups
+    """
+    def __init__(self):
+        self.removeTime = 60
+        self.statusNames = PyCondorPlugin.exitCodeMap()
+        self.globalStates = PyCondorPlugin.stateMap()
+        self.trackedAds = {}
+        self.pool = []
+        self.classAds = {}
+        self.processed = []
+
+    def close(self):
+        return
+
+    def getClassAds(self):
+        return dict((jobID, dict(ad)) for jobID, ad in self.classAds.items()), None
+
+    def procClassAd(self, job, jobAd, changeList, completeList, runningList):
+        self.processed.append(job['jobid'])
+        PyCondorPlugin.procClassAd(self, job, jobAd, changeList, completeList, runningList)
+
+
+def pyCondorAd(jobID, jobStatus, site = None):
+    """
+    A classAd as PyCondorPlugin.getClassAds builds it
+    """
+    return {"JobStatus": jobStatus, "stateTime": 300, "runningTime": 200,
+            "submitTime": 100, "DESIRED_Sites": "T2_XX_SiteA",
+            "ExtDESIRED_Sites": "T2_XX_SiteA", "runningCMSSite": site,
+            "WMAgentID": jobID}
+
+
+class PyCondorPluginTrackTest(unittest.TestCase):
+    """
+    _PyCondorPluginTrackTest_
+
+    Feed canned classAds to the PyCondorPlugin tracking, no condor needed
+    """
+    def testTrack(self):
+        """
+        _testTrack_
+
+        Verify that track picks up status changes and skips the jobs whose
+        classAd did not change
+        """
+        plugin = TrackingPyCondorPlugin()
+        jobs = [{"jobid": 1, "status": "New", "status_time": 0},
+                {"jobid": 2, "status": "Idle", "status_time": 100}]
+
+        plugin.classAds = {1: pyCondorAd(1, 1), 2: pyCondorAd(2, 2, "T2_XX_SiteA")}
+        runningList, changeList, completeList = plugin.track(jobs)
+        self.assertEqual([job["jobid"] for job in runningList], [1, 2])
+        self.assertEqual([job["jobid"] for job in changeList], [1, 2])
+        self.assertEqual(completeList, [])
+        self.assertEqual(plugin.processed, [1, 2])
+        self.assertEqual((jobs[0]["status"], jobs[0]["status_time"]), ("Idle", 100))
+        self.assertEqual((jobs[1]["status"], jobs[1]["status_time"]), ("Running", 200))
+        self.assertEqual(jobs[1]["location"], "T2_XX_SiteA")
+        self.assertEqual(jobs[1]["globalState"], "Running")
+
+        # Equal classAds are skipped
+        runningList, changeList, completeList = plugin.track(jobs)
+        self.assertEqual([job["jobid"] for job in runningList], [1, 2])
+        self.assertEqual(changeList, [])
+        self.assertEqual(plugin.processed, [1, 2])
+
+        # A changed classAd is handled
+        plugin.classAds[2] = pyCondorAd(2, 4, "T2_XX_SiteA")
+        runningList, changeList, completeList = plugin.track(jobs)
+        self.assertEqual([job["jobid"] for job in runningList], [1])
+        self.assertEqual([job["jobid"] for job in changeList], [2])
+        self.assertEqual([job["jobid"] for job in completeList], [2])
+        self.assertEqual(plugin.processed, [1, 2, 2])
+        self.assertEqual((jobs[1]["status"], jobs[1]["status_time"]), ("Complete", 300))
+
+        # and skipped again while it is complete
+        runningList, changeList, completeList = plugin.track(jobs)
+        self.assertEqual([job["jobid"] for job in completeList], [2])
+        self.assertEqual(changeList, [])
+        self.assertEqual(plugin.processed, [1, 2, 2])
+
+        # No classAds at all, the jobs go through Removed
+        plugin.classAds = {}
+        runningList, changeList, completeList = plugin.track(jobs[:1])
+        self.assertEqual(changeList, jobs[:1])
+        self.assertEqual(jobs[0]["status"], "Removed")
+        return
+
+
 if __name__ == '__main__':
     unittest.main()
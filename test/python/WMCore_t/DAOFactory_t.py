@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+_DAOFactory_t_
+
+Unit tests for the DAOFactory class cache and DAO statistics.
+"""
+
+import unittest
+import threading
+
+from WMCore.DAOFactory import DAOFactory, daoStatistics
+from WMQuality.TestInit import TestInit
+
+class DAOFactoryTest(unittest.TestCase):
+    def setUp(self):
+        """
+        _setUp_
+
+        Setup the database and logging connection.  Try to create all of the
+        WMBS tables.
+        """
+        self.testInit = TestInit(__file__)
+        self.testInit.setLogging()
+        self.testInit.setDatabaseConnection()
+        self.testInit.setSchema(customModules = ["WMCore.WMBS"],
+                                useDefault = False)
+        return
+
+    def tearDown(self):
+        """
+        _tearDown_
+
+        Drop all the WMBS tables and stop counting DAO calls.
+        """
+        daoStatistics.disable()
+        daoStatistics.reset()
+        self.testInit.clearDatabase()
+        return
+
+    def testClassCache(self):
+        """
+        _testClassCache_
+
+        Verify that the DAO classes are only imported once and that every call
+        still returns a new DAO.
+        """
+        myThread = threading.currentThread()
+        daoFactory = DAOFactory(package = "WMCore.WMBS", logger = myThread.logger,
+                                dbinterface = myThread.dbi)
+
+        locationNew = daoFactory(classname = "Locations.New")
+        module = "WMCore.WMBS.%s.Locations.New" % daoFactory.dialect()
+        self.assertTrue(module in DAOFactory._daoClasses)
+        self.assertTrue(isinstance(locationNew, DAOFactory._daoClasses[module]))
+
+        otherFactory = DAOFactory(package = "WMCore.WMBS", logger = myThread.logger,
+                                  dbinterface = myThread.dbi)
+        otherLocationNew = otherFactory(classname = "Locations.New")
+        self.assertFalse(otherLocationNew is locationNew)
+        self.assertEqual(type(otherLocationNew), type(locationNew))
+        self.assertEqual(otherFactory.dialect(), myThread.dialect)
+        return
+
+    def testStatistics(self):
+        """
+        _testStatistics_
+
+        Verify that the DAO calls and returned rows are counted when the
+        statistics are enabled, also for DAOs made before that.
+        """
+        myThread = threading.currentThread()
+        daoFactory = DAOFactory(package = "WMCore.WMBS", logger = myThread.logger,
+                                dbinterface = myThread.dbi)
+
+        locationNew = daoFactory(classname = "Locations.New")
+        locationNew.execute(siteName = "T2_XX_Untimed")
+        self.assertEqual(daoStatistics.statistics(), {})
+
+        daoStatistics.enable()
+        locationNew.execute(siteName = "T2_XX_SiteA")
+        locationNew.execute(siteName = "T2_XX_SiteB")
+        daoFactory(classname = "Locations.List").execute()
+
+        daoStatistics.disable()
+        locationNew.execute(siteName = "T2_XX_SiteC")
+        # the DAOs run unwrapped again
+        self.assertFalse(hasattr(locationNew.execute, "untimed"))
+        self.assertFalse("execute" in locationNew.__dict__)
+
+        dialect = daoFactory.dialect()
+        statistics = daoStatistics.statistics()
+        self.assertEqual(statistics["WMCore.WMBS.%s.Locations.New" % dialect]["calls"], 2)
+        self.assertEqual(statistics["WMCore.WMBS.%s.Locations.List" % dialect]["calls"], 1)
+        self.assertEqual(statistics["WMCore.WMBS.%s.Locations.List" % dialect]["rows"], 3)
+        self.assertTrue("Locations.New: 2 calls" in daoStatistics.report())
+
+        daoStatistics.reset()
+        self.assertEqual(daoStatistics.statistics(), {})
+        return
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+_JobStore_t_
+
+Unittests for the JobStore persistency mechanism
+"""
+
+import os
+import cPickle
+import unittest
+
+from WMQuality.TestInit import TestInit
+
+from WMCore.DataStructs.JobStore import JobStore, JobStoreException, loadJob, JOB_STORE_NAME
+from WMCore.DataStructs.Job import Job
+
+class JobStoreTest(unittest.TestCase):
+    def setUp(self):
+        """
+        _setUp_
+
+        Create a job collection directory to keep the store in.
+        """
+        self.testInit = TestInit(__file__)
+        self.collectionDir = self.testInit.generateWorkDir()
+        return
+
+    def tearDown(self):
+        self.testInit.delWorkDir()
+        return
+
+    def testSaveLoad(self):
+        """
+        _testSaveLoad_
+
+        Verify that jobs can be appended to the store and loaded back, one
+        by one and all at once.
+        """
+        jobStore = JobStore(self.collectionDir)
+        self.assertFalse(jobStore.exists())
+        self.assertEqual(jobStore.jobIDs(), [])
+
+        for i in range(50):
+            newJob = Job("Job%s" % i)
+            newJob["id"] = i
+            jobStore.addJob(newJob)
+        jobStore.save()
+
+        for i in range(50, 100):
+            newJob = Job("Job%s" % i)
+            newJob["id"] = i
+            jobStore.addJob(newJob)
+        jobStore.save()
+
+        self.assertTrue(jobStore.exists())
+        self.assertEqual(sorted(jobStore.jobIDs()), range(100))
+        self.assertEqual(jobStore.getJob(42)["name"], "Job42")
+        self.assertEqual(jobStore.getJob(100), None)
+        self.assertFalse(100 in jobStore)
+        jobStore.close()
+
+        jobs = JobStore(self.collectionDir).loadJobs()
+        self.assertEqual(len(jobs), 100)
+        for i in range(100):
+            self.assertEqual(jobs[i]["id"], i)
+            self.assertEqual(jobs[i]["name"], "Job%d" % i)
+
+        return
+
+    def testOverwriteAndTruncation(self):
+        """
+        _testOverwriteAndTruncation_
+
+        Verify that the last record of a job wins and that a record that
+        was not completely written is ignored.
+        """
+        jobStore = JobStore(self.collectionDir)
+        for name in ["First", "Second"]:
+            newJob = Job(name)
+            newJob["id"] = 1
+            jobStore.addJob(newJob)
+            jobStore.save()
+
+        newJob = Job("Truncated")
+        newJob["id"] = 2
+        jobStore.addJob(newJob)
+        jobStore.save()
+
+        storePath = os.path.join(self.collectionDir, JOB_STORE_NAME)
+        fileHandle = open(storePath, "r+b")
+        fileHandle.truncate(os.path.getsize(storePath) - 10)
+        fileHandle.close()
+
+        jobStore = JobStore(self.collectionDir)
+        self.assertEqual(jobStore.jobIDs(), [1])
+        self.assertEqual(jobStore.getJob(1)["name"], "Second")
+        jobStore.close()
+
+        fileHandle = open(storePath, "w")
+        fileHandle.write("Not a job store")
+        fileHandle.close()
+        self.assertRaises(JobStoreException, JobStore(self.collectionDir).getJob, 1)
+        return
+
+    def testLoadJob(self):
+        """
+        _testLoadJob_
+
+        Verify that loadJob finds jobs in the store of their collection and
+        falls back to the job.pkl of old job cache directories.
+        """
+        storedJob = Job("Stored")
+        storedJob["id"] = 1
+        jobStore = JobStore(self.collectionDir)
+        jobStore.addJob(storedJob)
+        jobStore.save()
+
+        pickledJob = Job("Pickled")
+        pickledJob["id"] = 2
+        os.mkdir(os.path.join(self.collectionDir, "job_2"))
+        jobHandle = open(os.path.join(self.collectionDir, "job_2", "job.pkl"), "w")
+        cPickle.dump(pickledJob, jobHandle)
+        jobHandle.close()
+
+        jobStores = {}
+        self.assertEqual(loadJob(os.path.join(self.collectionDir, "job_1"), 1, jobStores)["name"],
+                         "Stored")
+        self.assertEqual(loadJob(os.path.join(self.collectionDir, "job_2"), 2, jobStores)["name"],
+                         "Pickled")
+        self.assertEqual(loadJob(os.path.join(self.collectionDir, "job_3"), 3, jobStores), None)
+        self.assertEqual(jobStores.keys(), [self.collectionDir])
+        return
+
+if __name__ == '__main__':
+    unittest.main()
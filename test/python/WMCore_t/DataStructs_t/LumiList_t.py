@@ -1,7 +1,13 @@
 #! /usr/bin/env python
 
+from __future__ import print_function
+
+import random
+import time
 import unittest
 
+from nose.plugins.attrib import attr
+
 #import FWCore.ParameterSet.Config as cms
 from WMCore.DataStructs.LumiList import LumiList
 
@@ -336,6 +342,60 @@ class LumiListTest(unittest.TestCase):
         with self.assertRaises(RuntimeError):
             w = LumiList(wmagentFormat=([1], ['1,2,3']))  # Need twice as many lumis as runs
 
+    def testRandomSetAlgebra(self):
+        """
+        Compare -, & and | and the filters against plain python sets
+        """
+        rand = random.Random(1234)
+        for _ in range(50):
+            alumis = dict((run, rand.sample(range(1, 200), rand.randint(0, 150))) for run in range(1, 4))
+            blumis = dict((run, rand.sample(range(1, 200), rand.randint(0, 150))) for run in range(2, 5))
+            aset = set((run, lumi) for run in alumis for lumi in alumis[run])
+            bset = set((run, lumi) for run in blumis for lumi in blumis[run])
+            a = LumiList(runsAndLumis = alumis)
+            b = LumiList(runsAndLumis = blumis)
+
+            self.assertEqual(set((a - b).getLumis()), aset - bset)
+            self.assertEqual(set((a & b).getLumis()), aset & bset)
+            self.assertEqual(set((a | b).getLumis()), aset | bset)
+
+            candidates = [(run, lumi) for run in range(0, 5) for lumi in range(0, 202)]
+            self.assertEqual(a.filterLumis(candidates), [x for x in candidates if x in aset])
+            for candidate in candidates:
+                self.assertEqual(a.contains(candidate), candidate in aset)
+
+    @attr("performance")
+    def testPerformance(self):
+        """
+        Micro-benchmark of the set algebra and filters on lists with 10^5 ranges
+        """
+        rand = random.Random(4321)
+
+        def makeList(nRanges):
+            compactList = {}
+            for run in range(10):
+                lumi = 1
+                compactList[str(run)] = []
+                for _ in range(nRanges / 10):
+                    lumi += rand.randint(1, 5)
+                    compactList[str(run)].append([lumi, lumi + rand.randint(0, 5)])
+                    lumi += 6
+            return LumiList(compactList = compactList)
+
+        a = makeList(100000)
+        b = makeList(100000)
+        candidates = [(rand.randint(0, 9), rand.randint(1, 1000000)) for _ in range(100000)]
+
+        for label, operation in [("a - b", lambda: a - b),
+                                 ("a & b", lambda: a & b),
+                                 ("a | b", lambda: a | b),
+                                 ("filterLumis", lambda: a.filterLumis(candidates)),
+                                 ("contains", lambda: [x in a for x in candidates])]:
+            startTime = time.time()
+            operation()
+            print("\n%s: %.3f s" % (label, time.time() - startTime), end = "")
+        print()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -7,6 +7,7 @@ Unittest for the WMCore.DataStructs.Run class
 """
 
 
+import cPickle
 import unittest
 from WMCore.DataStructs.Run import Run
 
@@ -151,6 +152,68 @@ class RunTest(unittest.TestCase):
         s.add(run10)
         s.add(run11)
 
+        self.assertEqual(len(s), 10)
+        self.assertTrue(Run(9, 3, 2, 1) in s)
+
+        # Hash has to follow changes to the lumis
+        run12 = Run(10, 1, 2)
+        value = hash(run12)
+        run12.lumis.append(3)
+        self.assertNotEqual(hash(run12), value)
+        self.assertEqual(hash(run12), hash(Run(10, 1, 2, 3)))
+
+    def testSortedLumis(self):
+        """
+        lumis are kept sorted and unique
+
+        """
+        run = Run(1, 5, 3, 3, 1)
+        self.assertEqual(run.lumis, [1, 3, 5])
+        self.assertTrue(3 in run)
+        self.assertFalse(4 in run)
+        self.assertEqual(run.lumis.index(5), 2)
+
+        run.lumis.append(4)
+        run.lumis.append(10)
+        run.lumis.append(3)
+        self.assertEqual(run.lumis, [1, 3, 4, 5, 10])
+
+        run.extend([12, 2, 11, 2])
+        self.assertEqual(run.lumis, [1, 2, 3, 4, 5, 10, 11, 12])
+
+        run + Run(1, 0, 4, 20)
+        self.assertEqual(run.lumis, [0, 1, 2, 3, 4, 5, 10, 11, 12, 20])
+
+        run[0] = 30
+        self.assertEqual(run.lumis[-1], 30)
+        del run[0]
+        self.assertEqual(run.lumis[0], 2)
+
+        run.lumis = [7, 6, 6]
+        self.assertEqual(run.lumis, [6, 7])
+        self.assertEqual(run, Run(1, 7, 6))
+
+    def testSerialization(self):
+        """
+        pickle and json round trips, including pickles of the old format
+
+        """
+        run = Run(1, 3, 1, 2)
+        for protocol in [0, 2]:
+            newRun = cPickle.loads(cPickle.dumps(run, protocol))
+            self.assertEqual(newRun, run)
+            self.assertEqual(hash(newRun), hash(run))
+            newRun.lumis.append(0)
+            self.assertEqual(newRun.lumis, [0, 1, 2, 3])
+
+        legacyRun = Run.__new__(Run)
+        legacyRun.__setstate__({"config": {}, "run": 1, "lumis": [3, 1, 2]})
+        self.assertEqual(legacyRun, run)
+
+        jsonRun = run.__to_json__()
+        self.assertEqual(jsonRun["Lumis"], [1, 2, 3])
+        self.assertEqual(Run().__from_json__(jsonRun, None), run)
+
 
 
 
@@ -7,12 +7,15 @@ need to add Couch as an external, include it in start up scripts etc.
 """
 
 from WMCore.Database.CMSCouch import CouchServer, Document, Database, CouchInternalServerError, CouchNotFoundError
+from WMCore.Database.CMSCouch import WriteBehindQueue, CouchBadRequestError
 import random
+import socket
 import unittest
 import os
 import hashlib
 import base64
 import sys
+import time
 
 class CMSCouchTest(unittest.TestCase):
     test_counter = 0
@@ -363,6 +366,95 @@ class CMSCouchTest(unittest.TestCase):
         self.assertEqual(1, len(self.db.allDocs({'limit':1}, ["1", "3"])['rows']))
         self.assertTrue('error' in self.db.allDocs(keys = ["1", "4"])['rows'][1])
 
+    def testWriteBehind(self):
+        """
+        Test that documents queued in write behind mode are written by the
+        background thread and that conflicts reach the callbacks
+        """
+        conflicts = []
+        def callback(db, data, result):
+            conflicts.append(result['id'])
+
+        self.db.startWriteBehind(batchSize = 10, interval = 1, maxBacklog = 20)
+        for i in range(55):
+            self.db.queue(Document(id = str(i), inputDict = {'foo': i}), callback = callback)
+        self.db.queue(Document(id = "1", inputDict = {'foo': 'again'}), callback = callback)
+        self.db.flush()
+        self.assertEqual(55, len(self.db.allDocs()['rows']))
+        self.assertEqual(conflicts, ["1"])
+        self.assertEqual(self.db.document("1")['foo'], 1)
+
+        # documents are written after the interval without a flush
+        self.db.queue(Document(id = "lonely", inputDict = {'foo': 0}))
+        time.sleep(3)
+        self.assertTrue(self.db.documentExists("lonely"))
+
+        self.db.commit(Document(id = "last", inputDict = {'foo': 0}))
+        self.assertTrue(self.db.documentExists("last"))
+        self.db.stopWriteBehind()
+        # back to synchronous commits
+        self.assertEqual(1, len(self.db.commit({'foo': 1})))
+
+class PoisonDatabase(object):
+    """
+    Stand in for a Database that rejects every batch holding a poison document
+    and can't be reached for its first outages commits
+    """
+    name = "poison"
+
+    def __init__(self, outages = 0):
+        self.written = []
+        self.outages = outages
+
+    def _commitBatch(self, batch):
+        if self.outages > 0:
+            self.outages -= 1
+            raise socket.error("Connection refused")
+        docs = [doc for doc, _ in batch]
+        if "poison" in [doc["_id"] for doc in docs]:
+            raise CouchBadRequestError("Document must be a JSON object", None, None)
+        self.written.extend(docs)
+
+class WriteBehindQueueTest(unittest.TestCase):
+    def testPoisonDocument(self):
+        """
+        Test that only a document couch rejects is dropped, the rest of its
+        batch is still written and the error raised by the next flush()
+        """
+        db = PoisonDatabase()
+        queue = WriteBehindQueue(db, batchSize = 2, interval = 0.5, maxBacklog = 4)
+        queue.put({"_id": "0"})
+        queue.put({"_id": "poison"})
+        for i in range(1, 10):
+            queue.put({"_id": str(i)})
+
+        self.assertRaises(CouchBadRequestError, queue.flush)
+        self.assertEqual(sorted([doc["_id"] for doc in db.written]),
+                         [str(i) for i in range(10)])
+        queue.flush()
+        queue.stop()
+
+    def testOutage(self):
+        """
+        Test that batches are retried until couch is back instead of being
+        dropped, with put() waiting on the backlog meanwhile
+        """
+        db = PoisonDatabase(outages = 5)
+        queue = WriteBehindQueue(db, batchSize = 2, interval = 0.1, maxBacklog = 4)
+        for i in range(10):
+            queue.put({"_id": str(i)})
+
+        while True:
+            try:
+                queue.flush()
+                break
+            except socket.error:
+                pass
+        self.assertEqual(db.outages, 0)
+        self.assertEqual([doc["_id"] for doc in db.written],
+                         [str(i) for i in range(10)])
+        queue.stop()
+
 if __name__ == "__main__":
     if len(sys.argv) >1 :
         suite = unittest.TestSuite()
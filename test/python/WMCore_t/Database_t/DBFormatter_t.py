@@ -14,7 +14,10 @@ import commands
 import logging
 import unittest
 import os
+import resource
+import tempfile
 import threading
+import time
 
 from nose.plugins.attrib import attr
 
@@ -101,6 +104,101 @@ insert into test (bind1, bind2) values (:bind1, :bind2) """
         output = dbformatter.formatOneDict(result)
         self.assertEqual( output,  {'bind2': 'value2a', 'bind1': 'value1a'} )
 
+    def testStreaming(self):
+        """
+        Read results in batches instead of all at once
+        """
+        myThread = threading.currentThread()
+        dbformatter = DBFormatter(myThread.logger, myThread.dbi)
+
+        result = myThread.dbi.processData(myThread.select, stream = True)
+        self.assertEqual(dbformatter.iterKeys(result), ('bind1', 'bind2'))
+        self.assertEqual(list(dbformatter.iterFormat(result)),
+                         [('value1a', 'value2a'), ('value1b', 'value2b'),
+                          ('value1c', 'value2d')])
+        self.assertTrue(result[0].closed)
+
+        select = "select * from test where bind1 = :bind1"
+        binds = [{'bind1': 'value1c'}, {'bind1': 'value1x'}, {'bind1': 'value1a'}]
+        result = myThread.dbi.processData(select, binds, stream = True)
+        self.assertEqual(list(dbformatter.iterFormatDict(result)),
+                         [{'bind2': 'value2d', 'bind1': 'value1c'},
+                          {'bind2': 'value2a', 'bind1': 'value1a'}])
+
+        result = myThread.dbi.processData(myThread.select, stream = True)
+        self.assertEqual(dbformatter.formatDict(result),
+                         dbformatter.formatDict(myThread.dbi.processData(myThread.select)))
+
+        result = myThread.dbi.streamData(myThread.select, size = 2)
+        self.assertEqual(len(result[0].fetchmany()), 2)
+        result[0].close()
+        self.assertEqual(result[0].fetchmany(), [])
+        return
+
+
+class DBFormatterStreamingTest(unittest.TestCase):
+    """
+    _DBFormatterStreamingTest_
+
+    Benchmark of the streaming mode of DBFormatter on a SQLite database made
+    by DBFactory, which TestInit doesn't support
+
+    """
+
+    def setUp(self):
+        "make a SQLite database file and create the table"
+        self.logger = logging.getLogger('DBFormatterStreamingTest')
+        fd, self.dbFile = tempfile.mkstemp(suffix = ".sqlite")
+        os.close(fd)
+        self.dbi = DBFactory(self.logger, dburl = "sqlite:///%s" % self.dbFile).connect()
+        self.select = "select * from test"
+
+        transaction = Transaction(self.dbi)
+        transaction.processData("create table test (bind1 varchar(20), bind2 varchar(20))")
+        transaction.commit()
+        return
+
+    def tearDown(self):
+        """
+        Delete the database file
+        """
+        os.remove(self.dbFile)
+
+    @attr("performance")
+    def testStreamingBenchmark(self):
+        """
+        Compare the peak memory and speed of formatDict and iterFormatDict
+        """
+        dbformatter = DBFormatter(self.logger, self.dbi)
+        numRows = 200000
+        transaction = Transaction(self.dbi)
+        for start in range(0, numRows, 10000):
+            binds = [{'bind1': 'value1_%i' % i, 'bind2': 'value2_%i' % i}
+                     for i in range(start, start + 10000)]
+            transaction.processData("insert into test (bind1, bind2) values (:bind1, :bind2)",
+                                    binds)
+        transaction.commit()
+
+        # the peak RSS only grows, so stream first
+        start = time.time()
+        count = 0
+        for row in dbformatter.iterFormatDict(self.dbi.processData(self.select, stream = True)):
+            count += 1
+        streamTime = time.time() - start
+        streamRSS = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        start = time.time()
+        rows = dbformatter.formatDict(self.dbi.processData(self.select))
+        listTime = time.time() - start
+        listRSS = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        self.assertEqual(count, numRows)
+        self.assertEqual(len(rows), numRows)
+        print("\nSQLite: streamed %i rows at %.0f rows/s, peak RSS %i kB; "
+              "formatDict %.0f rows/s, peak RSS %i kB" %
+              (count, count / streamTime, streamRSS, len(rows) / listTime, listRSS))
+        return
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -122,5 +122,45 @@ class DBCoreTest(unittest.TestCase):
 
         return
 
+    def testSubstitutionPlanCache(self):
+        """
+        _testSubstitutionPlanCache_
+
+        Verify that the rewritten SQL is reused for the same statement and bind
+        names, and that statements with one or repeated binds are handled.
+        """
+        myInterface = MySQLInterface(logger = logging, engine = None)
+        sql = "UPDATE wmbs_job SET state = :state, retry_count = :retry WHERE id = :id OR id = :ids"
+        binds = [{"state": 1, "retry": 0, "id": 10, "ids": 11},
+                 {"state": 2, "retry": 1, "id": 20, "ids": 21}]
+
+        (updatedSQL, bindList) = myInterface.substitute(sql, binds)
+        self.assertEqual(updatedSQL, "UPDATE wmbs_job SET state = %s, retry_count = %s WHERE id = %s OR id = %s")
+        self.assertEqual(bindList, [(1, 0, 10, 11), (2, 1, 20, 21)])
+        self.assertEqual(len(myInterface.substitutionPlans), 1)
+
+        (updatedSQL, bindList) = myInterface.substitute(sql, {"ids": 5, "id": 4, "retry": 3, "state": 2})
+        self.assertEqual(bindList, [(2, 3, 4, 5)])
+        self.assertEqual(len(myInterface.substitutionPlans), 1)
+
+        sql = "SELECT id FROM wmbs_job WHERE state = :state OR retry_count = :state"
+        (updatedSQL, bindList) = myInterface.substitute(sql, [{"state": 3}, {"state": 4}])
+        self.assertEqual(updatedSQL, "SELECT id FROM wmbs_job WHERE state = %s OR retry_count = %s")
+        self.assertEqual(bindList, [(3, 3), (4, 4)])
+
+        (updatedSQL, bindList) = myInterface.substitute("SELECT id FROM wmbs_job WHERE state = :state",
+                                                        {"state": 3})
+        self.assertEqual(bindList, [(3,)])
+
+        (updatedSQL, bindList) = myInterface.substitute("SELECT id FROM wmbs_job", {"state": 3})
+        self.assertEqual(updatedSQL, "SELECT id FROM wmbs_job")
+        self.assertEqual(bindList, [()])
+        self.assertEqual(len(myInterface.substitutionPlans), 4)
+
+        myInterface.maxSubstitutionPlans = 4
+        myInterface.substitute("SELECT id FROM wmbs_job WHERE id = :id", {"id": 1})
+        self.assertEqual(len(myInterface.substitutionPlans), 1)
+        return
+
 if __name__ == "__main__":
     unittest.main()
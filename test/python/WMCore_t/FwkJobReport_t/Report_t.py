@@ -8,10 +8,11 @@ Unit tests for the Report class.
 import unittest
 import os
 import time
+import cPickle
 
 from WMCore.Algorithms import BasicAlgos
 from WMCore.Configuration import ConfigSection
-from WMCore.FwkJobReport.Report import Report
+from WMCore.FwkJobReport.Report import Report, FwkJobReportException
 from WMCore.WMBase import getTestBase
 from WMQuality.TestInitCouchApp import TestInitCouchApp
 
@@ -680,7 +681,7 @@ cms::Exception caught in EventProcessor and rethrown
 
         myReport.save(path1)
         info = BasicAlgos.getFileInfo(filename=path1)
-        self.assertEqual(info['Size'], 7101)
+        self.assertEqual(info['Size'], 1958)
 
         inputFiles = myReport.getAllInputFiles()
         self.assertEqual(len(inputFiles), 1)
@@ -689,10 +690,55 @@ cms::Exception caught in EventProcessor and rethrown
 
         myReport.save(path2)
         info = BasicAlgos.getFileInfo(filename=path2)
-        self.assertEqual(info['Size'], 6210)
+        self.assertEqual(info['Size'], 1598)
 
         return
 
+    def testPersistFormats(self):
+        """
+        _testPersistFormats_
+
+        Verify that a report survives a round trip through the compact
+        format, that legacy pickled reports can still be loaded and that
+        a report can be loaded with only some of its sections.
+        """
+        myReport = Report("cmsRun1")
+        myReport.parse(self.xmlPath)
+        myReport.addError("cmsRun1", 8001, "CMSException", "Bad things happened")
+
+        compactPath = os.path.join(self.testDir, 'compactReport.pkl')
+        legacyPath = os.path.join(self.testDir, 'legacyReport.pkl')
+        myReport.save(compactPath)
+        handle = open(legacyPath, 'w')
+        cPickle.dump(myReport.data, handle)
+        handle.close()
+
+        for path in [compactPath, legacyPath]:
+            loadedReport = Report()
+            loadedReport.load(path)
+            self.assertEqual(loadedReport.data.dictionary_whole_tree_(),
+                             myReport.data.dictionary_whole_tree_())
+            self.assertEqual(loadedReport.__to_json__(None), myReport.__to_json__(None))
+            self.assertFalse(loadedReport.partial)
+
+        partialReport = Report()
+        partialReport.load(compactPath, sections=["errors"])
+        self.assertTrue(partialReport.partial)
+        self.assertEqual(partialReport.listSteps(), ["cmsRun1"])
+        self.assertEqual(partialReport.getExitCodes(), set([8001]))
+        self.assertEqual(partialReport.getFirstStartLastStop(), myReport.getFirstStartLastStop())
+        self.assertFalse(hasattr(partialReport.retrieveStep("cmsRun1"), "performance"))
+        self.assertFalse(hasattr(partialReport.retrieveStep("cmsRun1"), "output"))
+        self.assertRaises(FwkJobReportException, partialReport.save, compactPath)
+
+        # Sections missing from the report are just skipped
+        partialReport = Report()
+        partialReport.load(compactPath, sections=["output", "nonExistent"])
+        self.assertEqual(len(partialReport.getAllFilesFromStep("cmsRun1")),
+                         len(myReport.getAllFilesFromStep("cmsRun1")))
+        self.assertFalse(hasattr(partialReport.retrieveStep("cmsRun1"), "errors"))
+        return
+
     def testDuplicatStep(self):
         """
         _testDuplicateStep_
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+_XMLParser_t_
+
+Tests and benchmark of the streaming FWJR XML parser on large synthetic
+job reports.
+"""
+from __future__ import print_function
+
+import os
+import time
+import tempfile
+import unittest
+
+from nose.plugins.attrib import attr
+
+from WMCore.Algorithms.ParseXMLFile import xmlFileToNode
+from WMCore.FwkJobReport.Report import Report, FwkJobReportException
+
+def writeSyntheticReport(fileName, nInputFiles, nLumis, nBranches = 100, truncate = False):
+    """
+    _writeSyntheticReport_
+
+    Write a FWJR with nInputFiles input files of nLumis lumis each and one
+    output file with all the lumis.
+    """
+    branches = "<Branches>\n%s</Branches>\n" % "".join(["  <Branch>Branch%i_source__HLT.</Branch>\n" % x
+                                                        for x in range(nBranches)])
+    def runs(firstLumi, lastLumi):
+        lumis = "".join(["   <LumiSection ID=\"%i\"/>\n" % x for x in range(firstLumi, lastLumi)])
+        return "<Runs>\n<Run ID=\"1\">\n%s</Run>\n</Runs>\n" % lumis
+
+    reportFile = open(fileName, "w")
+    reportFile.write("<FrameworkJobReport>\n")
+    for i in range(nInputFiles):
+        reportFile.write("<InputFile>\n<State  Value=\"closed\"/>\n")
+        reportFile.write("<LFN>/store/data/input%i.root</LFN>\n<PFN>input%i.root</PFN>\n" % (i, i))
+        reportFile.write("<Catalog></Catalog>\n<ModuleLabel>source</ModuleLabel>\n<GUID>%i</GUID>\n" % i)
+        reportFile.write(branches)
+        reportFile.write("<InputType>primaryFiles</InputType>\n<InputSourceClass>PoolSource</InputSourceClass>\n")
+        reportFile.write("<EventsRead>%i</EventsRead>\n" % nLumis)
+        reportFile.write(runs(i * nLumis + 1, (i + 1) * nLumis + 1))
+        reportFile.write("</InputFile>\n")
+
+    reportFile.write("<File>\n<State  Value=\"closed\"/>\n")
+    reportFile.write("<LFN>/store/unmerged/output.root</LFN>\n<PFN>output.root</PFN>\n<Catalog></Catalog>\n")
+    reportFile.write("<ModuleLabel>outputRECORECO</ModuleLabel>\n<GUID>output</GUID>\n")
+    reportFile.write(branches)
+    reportFile.write("<OutputModuleClass>PoolOutputModule</OutputModuleClass>\n")
+    reportFile.write("<TotalEvents>%i</TotalEvents>\n<DataType>Data</DataType>\n" % (nInputFiles * nLumis))
+    reportFile.write("<BranchHash>0123456789</BranchHash>\n")
+    reportFile.write(runs(1, nInputFiles * nLumis + 1))
+    reportFile.write("<Inputs>\n")
+    for i in range(nInputFiles):
+        reportFile.write("<Input>\n<LFN>/store/data/input%i.root</LFN>\n<PFN>input%i.root</PFN>\n</Input>\n" % (i, i))
+    reportFile.write("</Inputs>\n</File>\n")
+    if not truncate:
+        reportFile.write("<ReadBranches>\n</ReadBranches>\n</FrameworkJobReport>\n")
+    reportFile.close()
+    return
+
+class XMLParserTest(unittest.TestCase):
+    """
+    _XMLParserTest_
+
+    """
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.reportPath = os.path.join(self.tempDir, "Report.xml")
+        return
+
+    def tearDown(self):
+        if os.path.exists(self.reportPath):
+            os.remove(self.reportPath)
+        os.rmdir(self.tempDir)
+        return
+
+    def testSyntheticReport(self):
+        """
+        _testSyntheticReport_
+
+        Verify files, runs and lumis of a synthetic report.
+        """
+        writeSyntheticReport(self.reportPath, nInputFiles = 3, nLumis = 50)
+        report = Report("cmsRun1")
+        report.parse(self.reportPath)
+
+        inputFiles = report.getInputFilesFromStep("cmsRun1")
+        self.assertEqual(len(inputFiles), 3)
+        self.assertEqual(inputFiles[1]["lfn"], "/store/data/input1.root")
+        self.assertEqual(inputFiles[1]["runs"].pop().lumis, range(51, 101))
+
+        outputFiles = report.getAllFilesFromStep("cmsRun1")
+        self.assertEqual(len(outputFiles), 1)
+        self.assertEqual(outputFiles[0]["module_label"], "outputRECORECO")
+        self.assertEqual(outputFiles[0]["events"], 150)
+        self.assertEqual(outputFiles[0]["runs"].pop().lumis, range(1, 151))
+        self.assertEqual(outputFiles[0]["input"], ["/store/data/input%i.root" % x for x in range(3)])
+        self.assertEqual(report.report.parameters.ReadBranches, "")
+        return
+
+    def testTruncatedReport(self):
+        """
+        _testTruncatedReport_
+
+        A truncated report must not leave any files behind in the report.
+        """
+        writeSyntheticReport(self.reportPath, nInputFiles = 3, nLumis = 50, truncate = True)
+        report = Report("cmsRun1")
+        self.assertRaises(FwkJobReportException, report.parse, self.reportPath)
+        self.assertEqual(report.getInputFilesFromStep("cmsRun1"), [])
+        self.assertEqual(report.getAllFilesFromStep("cmsRun1"), [])
+        self.assertEqual(report.getStepErrors("cmsRun1")["error0"].exitCode, 50115)
+        return
+
+    @attr("performance")
+    def testBenchmark(self):
+        """
+        _testBenchmark_
+
+        Time the parsing of a report with 200k lumis against just building
+        the full node tree of the same report.
+        """
+        writeSyntheticReport(self.reportPath, nInputFiles = 20, nLumis = 5000)
+
+        startTime = time.time()
+        xmlFileToNode(self.reportPath)
+        treeTime = time.time() - startTime
+
+        startTime = time.time()
+        report = Report("cmsRun1")
+        report.parse(self.reportPath)
+        parseTime = time.time() - startTime
+
+        print("\nNode tree only: %.2f s, streaming parse into report: %.2f s" % (treeTime, parseTime))
+        self.assertEqual(len(report.getInputFilesFromStep("cmsRun1")), 20)
+        return
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+"""
+_BulkStateTransition_t_
+
+Unit tests and benchmark for the bulk state transition mode of ChangeState,
+run against an in memory stand-in for the JobDump couch database.
+"""
+from __future__ import print_function
+
+import copy
+import time
+import unittest
+import urlparse
+
+from nose.plugins.attrib import attr
+
+from WMCore.JobStateMachine.ChangeState import bulkStateTransition, addStateTransition
+
+class CouchStandIn(object):
+    """
+    _CouchStandIn_
+
+    Minimal in memory emulation of the couch calls used to record state
+    transitions. Every call sleeps for latency seconds to emulate the round
+    trip to the server.
+    """
+    def __init__(self, latency = 0.0, conflicts = None):
+        self.name = "changestate_t%2Fjobs"
+        self.latency = latency
+        self.docs = {}
+        self.requests = 0
+        # Number of times a write to a document id will conflict
+        self.conflicts = conflicts or {}
+
+    def _roundTrip(self):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _store(self, doc):
+        current = self.docs.get(doc["_id"], None)
+        if self.conflicts.get(doc["_id"], 0) > 0:
+            self.conflicts[doc["_id"]] -= 1
+            return {"id": doc["_id"], "error": "conflict", "reason": "Document update conflict."}
+        if current is not None and current["_rev"] != doc.get("_rev", None):
+            return {"id": doc["_id"], "error": "conflict", "reason": "Document update conflict."}
+        doc = copy.deepcopy(doc)
+        doc["_rev"] = "%i-rev" % (int(doc.get("_rev", "0-rev").split("-")[0]) + 1)
+        self.docs[doc["_id"]] = doc
+        return {"id": doc["_id"], "rev": doc["_rev"]}
+
+    def makeRequest(self, uri = None, data = None, type = 'GET', decode = True):
+        """
+        Emulate the JobDump/_update/stateTransition handler
+        """
+        self._roundTrip()
+        path, query = uri.split("?")
+        docID = path.split("/")[-1]
+        params = dict(urlparse.parse_qsl(query))
+        doc = copy.deepcopy(self.docs.get(docID, {"_id": docID, "states": {}}))
+        addStateTransition(doc, {"oldstate": params["oldstate"],
+                                 "newstate": params["newstate"],
+                                 "location": params["location"],
+                                 "timestamp": int(params["timestamp"])})
+        self._store(doc)
+        return "OK"
+
+    def allDocs(self, options = {}, keys = []):
+        self._roundTrip()
+        rows = []
+        for key in keys:
+            if key in self.docs:
+                rows.append({"id": key, "key": key, "doc": copy.deepcopy(self.docs[key]),
+                             "value": {"rev": self.docs[key]["_rev"]}})
+            else:
+                rows.append({"key": key, "error": "not_found"})
+        return {"rows": rows}
+
+    def post(self, uri, data):
+        self._roundTrip()
+        return [self._store(doc) for doc in data["docs"]]
+
+def makeJobDocuments(couchDB, numJobs):
+    """
+    Create numJobs job documents with a single state transition
+    """
+    for jobID in range(numJobs):
+        couchDB.docs[str(jobID)] = {"_id": str(jobID), "_rev": "1-rev", "type": "job",
+                                    "states": {"0": {"oldstate": "none", "newstate": "new",
+                                                     "location": "Agent", "timestamp": 1}}}
+
+def singleStateTransition(couchDB, docIDs, transition):
+    """
+    Record the state transition one document at a time, the way ChangeState
+    does it without the bulk mode.
+    """
+    for docID in docIDs:
+        updateUri = "/" + couchDB.name + "/_design/JobDump/_update/stateTransition/" + docID
+        updateUri += "?oldstate=%s&newstate=%s&location=%s&timestamp=%s" % (transition["oldstate"],
+                                                                            transition["newstate"],
+                                                                            transition["location"],
+                                                                            transition["timestamp"])
+        couchDB.makeRequest(uri = updateUri, type = "PUT", decode = False)
+
+class BulkStateTransitionTest(unittest.TestCase):
+
+    transition = {"oldstate": "created", "newstate": "executing",
+                  "location": "T1_US_FNAL", "timestamp": 1000}
+
+    def testAddStateTransition(self):
+        """
+        _testAddStateTransition_
+
+        Verify the transitions are appended after the highest existing key.
+        """
+        doc = addStateTransition({"_id": "1"}, self.transition)
+        self.assertEqual(doc["states"], {"1": self.transition})
+
+        doc = {"_id": "1", "states": {"0": {}, "9": {}, "10": {}}}
+        addStateTransition(doc, self.transition)
+        self.assertEqual(doc["states"]["11"], self.transition)
+        return
+
+    def testBulkMatchesUpdateHandler(self):
+        """
+        _testBulkMatchesUpdateHandler_
+
+        Verify that the bulk transition produces the same documents as the
+        update handler and creates documents that are missing.
+        """
+        singleDB = CouchStandIn()
+        bulkDB = CouchStandIn()
+        makeJobDocuments(singleDB, 25)
+        makeJobDocuments(bulkDB, 25)
+
+        docIDs = [str(x) for x in range(30)]
+        singleStateTransition(singleDB, docIDs, self.transition)
+        failed = bulkStateTransition(bulkDB, dict((x, self.transition) for x in docIDs),
+                                     batchSize = 7)
+
+        self.assertEqual(failed, [])
+        self.assertEqual(singleDB.docs, bulkDB.docs)
+        self.assertEqual(singleDB.requests, 30)
+        self.assertEqual(bulkDB.requests, 10)
+        return
+
+    def testConflictRetry(self):
+        """
+        _testConflictRetry_
+
+        Verify that conflicting documents are retried and given up on after
+        the maximum number of retries.
+        """
+        couchDB = CouchStandIn(conflicts = {"1": 2, "2": 10})
+        makeJobDocuments(couchDB, 3)
+
+        failed = bulkStateTransition(couchDB, dict((str(x), self.transition) for x in range(3)),
+                                     maxRetries = 3)
+
+        self.assertEqual(failed, ["2"])
+        self.assertEqual(couchDB.docs["0"]["states"]["1"], self.transition)
+        self.assertEqual(couchDB.docs["1"]["states"]["1"], self.transition)
+        self.assertEqual(len(couchDB.docs["2"]["states"]), 1)
+        return
+
+    @attr("performance")
+    def testBenchmark(self):
+        """
+        _testBenchmark_
+
+        Compare the transitions per second of the per job update handler and
+        of the bulk mode against a stand-in with 1ms latency per request.
+        """
+        numJobs = 2000
+        docIDs = [str(x) for x in range(numJobs)]
+
+        couchDB = CouchStandIn(latency = 0.001)
+        makeJobDocuments(couchDB, numJobs)
+        startTime = time.time()
+        singleStateTransition(couchDB, docIDs, self.transition)
+        singleRate = numJobs / (time.time() - startTime)
+
+        couchDB = CouchStandIn(latency = 0.001)
+        makeJobDocuments(couchDB, numJobs)
+        startTime = time.time()
+        bulkStateTransition(couchDB, dict((x, self.transition) for x in docIDs))
+        bulkRate = numJobs / (time.time() - startTime)
+
+        print("\nState transitions per second: single %.0f, bulk %.0f" % (singleRate, bulkRate))
+        self.assertTrue(bulkRate > singleRate)
+        return
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,8 +7,11 @@ General test of Lexicon
 """
 
 import logging
+import time
 import unittest
 
+from nose.plugins.attrib import attr
+
 from WMCore.Lexicon import *
 
 class LexiconTest(unittest.TestCase):
@@ -779,5 +782,79 @@ class LexiconTest(unittest.TestCase):
         self.assertTrue(primaryDatasetType("cosmic"), "data should be allowed")
         self.assertTrue(primaryDatasetType("test"), "test should be allowed")
 
+    def testValidateMany(self):
+        """
+        _testValidateMany_
+
+        Check that the failures are returned instead of raised
+        """
+        good = ['/store/data/Run2012A/Cosmics/RAW/v1/000/190/000/%i.root' % i for i in range(10)]
+        bad = ['/store/data/Run2012A/Cosmics/raw/v1/000/190/000/1.root', '/bad/lfn']
+        failures = validateMany('lfn', good + bad)
+        self.assertEqual([x[0] for x in failures], bad)
+        for candidate, error in failures:
+            self.assertRaises(AssertionError, lfn, candidate)
+            self.assertTrue(candidate in error)
+
+        self.assertEqual(validateMany(lfn, good), [])
+        self.assertEqual(validateMany('block', ['/a/b/RAW#1', '/a/b/RAW']),
+                         [('/a/b/RAW', 'need to have # in the last parts of block')])
+        self.assertEqual(len(validateMany('dataset', ['/a/b/RAW', '/a/b', '/a/b/raw'])), 2)
+        self.assertRaises(ValueError, validateMany, 'noSuchCheck', good)
+        self.assertRaises(ValueError, validateMany, '_splitLFN', good)
+
+    def testLFNParserCache(self):
+        """
+        _testLFNParserCache_
+
+        Parts remembered for an LFN prefix are used for the other files only
+        """
+        first = parseLFN('/store/data/Run2012A/Cosmics/RAW/v1/000/1.root')
+        second = parseLFN('/store/data/Run2012A/Cosmics/RAW/v1/001/2.root')
+        self.assertEqual(second['lfnCounter'], '001')
+        self.assertEqual(second['filename'], '2.root')
+        self.assertEqual(first['lfnCounter'], '000')
+        second['primaryDataset'] = 'Changed'
+        self.assertEqual(parseLFN('/store/data/Run2012A/Cosmics/RAW/v1/000/1.root'), first)
+
+        # counter and filename aren't the last parts of user LFNs with subdirectories
+        result = parseLFN('/store/user/giffels/Primary/a/b/c/d/file.root')
+        self.assertEqual(result['lfnCounter'], 'c')
+        self.assertEqual(result['filename'], 'd')
+
+        base = parseLFNBase('/store/data/Run2012A/Cosmics/RAW/v1')
+        base['dataTier'] = 'Changed'
+        self.assertEqual(parseLFNBase('/store/data/Run2012A/Cosmics/RAW/v1')['dataTier'], 'RAW')
+
+    @attr("performance")
+    def testLFNValidationBenchmark(self):
+        """
+        _testLFNValidationBenchmark_
+
+        Time the validation of many LFNs one by one and at once
+        """
+        lfns = ['/store/mc/Summer12/TTJets/AODSIM/PU_S7-v1/%05i/%i.root' % (i / 1000, i)
+                for i in range(50000)]
+
+        start = time.time()
+        for candidate in lfns:
+            lfn(candidate)
+        singleTime = time.time() - start
+
+        start = time.time()
+        failures = validateMany('lfn', lfns)
+        manyTime = time.time() - start
+
+        start = time.time()
+        for candidate in lfns:
+            parseLFN(candidate)
+        parseTime = time.time() - start
+
+        print("\nLexicon: %i LFNs validated in %.2fs one by one (%.0f/s), "
+              "%.2fs with validateMany (%.0f/s), parsed in %.2fs" %
+              (len(lfns), singleTime, len(lfns) / singleTime, manyTime,
+               len(lfns) / manyTime, parseTime))
+        self.assertEqual(failures, [])
+
 if __name__ == "__main__":
     unittest.main()
@@ -48,6 +48,7 @@ from WMCore.Agent.Configuration             import Configuration
 # WMCore library imports
 from WMCore.ResourceControl.ResourceControl  import ResourceControl
 from WMCore.FwkJobReport.Report              import Report
+from WMCore.DataStructs.JobStore             import loadJob
 
 # WMSpec stuff
 from WMCore.WMSpec.Makers.TaskMaker import TaskMaker
@@ -442,11 +443,8 @@ class WMAgentTest(unittest.TestCase):
 
         # First job should be in here
         self.assertTrue('job_1' in os.listdir(groupDirectory))
-        jobFile = os.path.join(groupDirectory, 'job_1', 'job.pkl')
-        self.assertTrue(os.path.isfile(jobFile))
-        f = open(jobFile, 'r')
-        job = cPickle.load(f)
-        f.close()
+        job = loadJob(os.path.join(groupDirectory, 'job_1'), 1)
+        self.assertNotEqual(job, None)
 
 
         self.assertEqual(job['workflow'], name)
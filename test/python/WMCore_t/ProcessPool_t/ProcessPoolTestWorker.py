@@ -12,5 +12,7 @@ class ProcessPoolTestWorker(ProcessPoolWorker):
         __call__
 
         """
+        if input == "DROP":
+            return None
 
         return input
@@ -7,7 +7,9 @@ Unit tests for the ProcessPool class.
 import unittest
 import nose
 
-from WMCore.ProcessPool.ProcessPool import ProcessPool
+from WMCore.ProcessPool.ProcessPool import ProcessPool, ProcessPoolException
+from WMCore.ProcessPool.ProcessPool import CODECS, encodeFrame, decodeFrame, codecsById
+from WMCore.Configuration import Configuration
 from WMQuality.TestInit import TestInit
 
 class ProcessPoolTest(unittest.TestCase):
@@ -123,7 +125,122 @@ class ProcessPoolTest(unittest.TestCase):
                              "Error: Wrong number of results returned.")
 
 
+    def testD_Frames(self):
+        """
+        _testFrames_
+
+        Verify that batches of work survive the frame encoding with every
+        codec and that broken frames are rejected.
+        """
+        codecs = codecsById()
+        work = [{"id": 1, "fwjr_path": "/some/path/Report.0.pkl"},
+                ["COMMAND1", "COMMAND2"], "STOP"]
+
+        for codecName in ["json", "pickle", "marshal"]:
+            codec = CODECS[codecName]()
+            frame, encodeTime = encodeFrame(codec, work, pid=1234, decodeTime=0.5)
+            self.assertTrue(encodeTime >= 0.0)
+            items, header = decodeFrame(frame, codecs)
+            self.assertEqual(items, work)
+            self.assertEqual(header[0], codec.codecId)
+            self.assertEqual(header[1:3], (1234, 0.5))
+            self.assertEqual(header[4], len(work))
+
+        frame, _ = encodeFrame(CODECS["json"](), [], completed=10)
+        self.assertEqual(decodeFrame(frame, codecs)[0], [])
+        self.assertEqual(decodeFrame(frame, codecs)[1][4], 10)
+
+        codec = CODECS["raw"]()
+        frame, _ = encodeFrame(codec, ["\x00binary", ""])
+        self.assertEqual(decodeFrame(frame, codecs)[0], ["\x00binary", ""])
+        self.assertRaises(ProcessPoolException, encodeFrame, codec, [1])
+
+        frame, _ = encodeFrame(CODECS["pickle"](), work)
+        self.assertRaises(ProcessPoolException, decodeFrame, frame[:-1], codecs)
+        self.assertRaises(ProcessPoolException, decodeFrame, frame[:5], codecs)
+        self.assertRaises(ProcessPoolException, decodeFrame, "x" + frame[1:], codecs)
+        return
+
+
+class BatchedProcessPoolTest(unittest.TestCase):
+    """
+    _BatchedProcessPoolTest_
+
+    Run work through the slaves without a database
+    """
+    def setUp(self):
+        """
+        _setUp_
 
+        """
+        self.testInit = TestInit(__file__)
+        self.testInit.setLogging()
+        self.config = Configuration()
+        self.config.section_("Agent")
+        self.config.Agent.useHeartbeat = False
+        self.testInit.generateWorkDir(self.config)
+        self.processPool = None
+        return
+
+    def tearDown(self):
+        """
+        _tearDown_
+
+        """
+        if self.processPool:
+            self.processPool.close()
+        self.testInit.delWorkDir()
+        return
+
+    def testBatchedPool(self):
+        """
+        _testBatchedPool_
+
+        Run work through pickle encoded batches with back-pressure.  Some
+        items give no result and some give several, a whole batch gives no
+        result at all.
+        """
+        self.processPool = ProcessPool("ProcessPool_t.ProcessPoolTestWorker",
+                                       totalSlaves = 2,
+                                       componentDir = self.config.General.workDir,
+                                       namespace = "WMCore_t",
+                                       config = self.config,
+                                       inPort = "5565",
+                                       outPort = "5568",
+                                       codec = "pickle",
+                                       batchSize = 10,
+                                       maxRunningWork = 50)
+
+        input = []
+        expected = []
+        for i in range(200):
+            if 100 <= i < 110 or i % 7 == 0:
+                input.append("DROP")
+            elif i % 5 == 0:
+                input.append(["A%s" % i, "B%s" % i, "C%s" % i])
+                expected.extend(input[-1])
+            else:
+                input.append("COMMAND%s" % i)
+                expected.append(input[-1])
+
+        self.processPool.enqueue(input)
+        result = self.processPool.dequeue(len(expected))
+        self.assertEqual(sorted(result), sorted(expected))
+
+        stats = self.processPool.getStatistics()
+        self.assertEqual(stats["queueDepth"], 0)
+        self.assertEqual(stats["buffered"], 0)
+        self.assertEqual(stats["pool"]["itemsSent"], 200)
+        self.assertEqual(stats["pool"]["framesSent"], 20)
+        self.assertEqual(stats["pool"]["framesReceived"], 20)
+        self.assertEqual(stats["pool"]["itemsReceived"], len(expected))
+
+        # Nothing is left running, asking for more does not block
+        self.assertEqual(self.processPool.dequeue(0), [])
+        self.processPool.enqueue(["DROP"] * 10)
+        self.assertEqual(self.processPool.dequeue(1), [])
+        self.assertEqual(self.processPool.getStatistics()["queueDepth"], 0)
+        return
 
 
 if __name__ == "__main__":
@@ -63,12 +63,28 @@ class Image(RESTEntity):
     def get(self):
         return gif_bytes
 
+class Counter(RESTEntity):
+    calls = 0
+
+    def validate(self, *args): pass
+
+    @restcall(cache=300)
+    @tools.expires(secs=300)
+    def get(self):
+        Counter.calls += 1
+        return rows([Counter.calls])
+
+    @restcall
+    def put(self):
+        return rows(["ok"])
+
 class Root(RESTApi):
     def __init__(self, app, config, mount):
         RESTApi.__init__(self, app, config, mount)
         self._add({ "simple": Simple(app, self, config, mount),
                     "image":  Image(app, self, config, mount),
-                    "multi":  Multi(app, self, config, mount) })
+                    "multi":  Multi(app, self, config, mount),
+                    "counter": Counter(app, self, config, mount) })
 
 class Tester(webtest.WebCase):
 
@@ -242,6 +258,32 @@ class Tester(webtest.WebCase):
             assert b["result"][i][0] == "row"
             assert b["result"][i][1] == i
 
+    def test_response_cache(self):
+        h = self.h + [("Accept", "application/json")]
+        self.getPage("/test/counter", headers = h)
+        self.assertStatus("200 OK")
+        self.assertHeader("X-REST-Cache", "miss")
+        first = cjson.decode(self.body)["result"][0]
+        etag = dict((k.lower(), v) for k, v in self.headers)["etag"]
+
+        self.getPage("/test/counter", headers = h)
+        self.assertStatus("200 OK")
+        self.assertHeader("X-REST-Cache", "hit")
+        self.assertHeader("ETag", etag)
+        assert cjson.decode(self.body)["result"][0] == first
+
+        self.getPage("/test/counter", headers = h + [("If-None-Match", etag)])
+        self.assertStatus("304 Not Modified")
+        self.assertHeader("X-REST-Cache", "hit")
+
+        self.getPage("/test/counter", method = "PUT", headers = h)
+        self.assertStatus("200 OK")
+
+        self.getPage("/test/counter", headers = h + [("If-None-Match", etag)])
+        self.assertStatus("200 OK")
+        self.assertHeader("X-REST-Cache", "miss")
+        assert cjson.decode(self.body)["result"][0] == first + 1
+
 def setup_server():
     srcfile = __file__.split("/")[-1].split(".py")[0]
     setup_test_server(srcfile, "Root", authz_key_file=FAKE_FILE, port=PORT)
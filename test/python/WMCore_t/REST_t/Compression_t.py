@@ -0,0 +1,104 @@
+"""Unit tests and benchmark for the REST streaming compressors."""
+
+import bz2
+import json
+import time
+import unittest
+import zlib
+
+from nose.plugins.attrib import attr
+
+from WMCore.REST.Format import _stream_compress, _stream_compressor, _compression_pool
+from WMCore.REST.Format import zlib_compressor, register_compressor
+
+def _decompress(encoding, data):
+    """Decompress `data` produced for `encoding`."""
+    if encoding == 'deflate':
+        return zlib.decompress(data, -zlib.MAX_WBITS)
+    elif encoding == 'gzip':
+        return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+    elif encoding == 'bzip2':
+        return bz2.decompress(data)
+
+def _payload(nrows):
+    """Reply chunks much like those of a JSON formatted row result."""
+    yield '{"result": [\n'
+    for i in xrange(nrows):
+        row = {"name": "/Prim%d/Proc-v%d/RECO#%08x" % (i % 50, i % 7, i * 7919),
+               "size": i * 1234567, "events": i % 10000, "is_open": i % 3 == 0,
+               "site": "T2_CH_CERN" if i % 2 else "T1_US_FNAL_Disk"}
+        yield (i and ",\n" or "") + json.dumps(row)
+    yield "]}\n"
+
+class CompressionTest(unittest.TestCase):
+    def test_round_trip(self):
+        """All codecs, flush policies and threading give the original data"""
+        original = "".join(_payload(5000))
+        for encoding in ('deflate', 'gzip', 'bzip2'):
+            for flush in ('full', 'sync', 'none'):
+                for workers in (0, 2):
+                    compress = _stream_compressor[encoding](9, flush)
+                    parts = list(_stream_compress(_payload(5000), compress, 64 * 1024, workers))
+                    self.assertEqual(_decompress(encoding, "".join(parts)), original)
+
+    def test_chunk_boundaries(self):
+        """With sync and full flush every compressed chunk expands in full"""
+        for flush in ('full', 'sync'):
+            compress = _stream_compressor['deflate'](9, flush)
+            d = zlib.decompressobj(-zlib.MAX_WBITS)
+            output = []
+            for part in _stream_compress(_payload(5000), compress, 16 * 1024, 2):
+                output.append(d.decompress(part))
+                # everything up to the end of the part came out
+                self.assertEqual(d.unconsumed_tail, "")
+            self.assertEqual("".join(output), "".join(_payload(5000)))
+
+    def test_pool_sizes(self):
+        """Each number of workers gets its own shared pool"""
+        self.assertTrue(_compression_pool(1) is _compression_pool(1))
+        self.assertFalse(_compression_pool(1) is _compression_pool(3))
+
+    def test_empty_and_register(self):
+        """Empty replies are valid streams, new codecs can be registered"""
+        compress = _stream_compressor['gzip'](6, 'sync')
+        self.assertEqual(_decompress('gzip', "".join(_stream_compress([], compress, 1024, 0))), "")
+
+        register_compressor('x-raw-deflate', zlib_compressor(-zlib.MAX_WBITS))
+        try:
+            compress = _stream_compressor['x-raw-deflate'](1, 'none')
+            data = "".join(_stream_compress(["a" * 1000] * 10, compress, 1024, 0))
+            self.assertEqual(_decompress('deflate', data), "a" * 10000)
+        finally:
+            del _stream_compressor['x-raw-deflate']
+
+    @attr('performance')
+    def test_benchmark(self):
+        """Ratio, throughput and latency to the first chunk of each codec,
+        the payload is generated while it is compressed like in a server"""
+        size = sum(len(x) for x in _payload(50000))
+        start = time.time()
+        for x in _payload(50000):
+            pass
+        print("\nPayload %d bytes, generated in %.2f s" % (size, time.time() - start))
+        for encoding, level in (('deflate', 9), ('deflate', 6), ('gzip', 6),
+                                ('gzip', 1), ('bzip2', 9)):
+            for flush in ('full', 'sync', 'none'):
+                if encoding == 'bzip2' and flush != 'none':
+                    continue
+                for workers in (0, 2):
+                    compress = _stream_compressor[encoding](level, flush)
+                    start = time.time()
+                    first = None
+                    csize = 0
+                    for part in _stream_compress(_payload(50000), compress, 64 * 1024, workers):
+                        if first is None:
+                            first = time.time() - start
+                        csize += len(part)
+                    elapsed = time.time() - start
+                    print("%-8s level %d flush %-4s workers %d: ratio %5.2f, %6.1f MB/s,"
+                          " first chunk %.1f ms" % (encoding, level, flush, workers,
+                                                     float(size) / csize,
+                                                     size / elapsed / 1e6, first * 1e3))
+
+if __name__ == "__main__":
+    unittest.main()
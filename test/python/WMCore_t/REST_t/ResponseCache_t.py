@@ -0,0 +1,91 @@
+"""Unit tests for the REST server side response cache."""
+
+import time
+import unittest
+
+from nose.plugins.attrib import attr
+
+from WMCore.REST.Server import ResponseCache
+
+def _key(api, path = None, **kwargs):
+    return ResponseCache.key(api, path or "/" + api, kwargs, "application/json", "", None)
+
+class ResponseCacheTest(unittest.TestCase):
+    def test_key(self):
+        """Keys ignore argument order but not the roles or the encoding"""
+        user = { 'roles': { 'admin': { 'group': set(['b', 'a']), 'site': set() } } }
+        k1 = ResponseCache.key("a", "/a", {"x": "1", "y": ["2", "3"]}, "f", "deflate", user)
+        k2 = ResponseCache.key("a", "/a", {"y": ["2", "3"], "x": "1"}, "f", "deflate", user)
+        self.assertEqual(k1, k2)
+        self.assertNotEqual(k1, ResponseCache.key("a", "/a", {"x": "1", "y": ["2", "3"]},
+                                                  "f", "deflate", None))
+        self.assertNotEqual(k1, ResponseCache.key("a", "/a", {"x": "1", "y": ["2", "3"]},
+                                                  "f", "gzip", user))
+        hash(k1)
+
+    def test_get_put(self):
+        """Entries are returned until they expire and counted in stats"""
+        cache = ResponseCache()
+        key = _key("a", x = "1")
+        self.assertEqual(cache.get(key), None)
+        self.assertTrue(cache.put(key, cache.generation("a"), 60, {"ETag": '"x"'}, "body"))
+        self.assertEqual(cache.get(key)[1:], ({"ETag": '"x"'}, "body"))
+
+        self.assertTrue(cache.put(_key("b"), cache.generation("b"), -1, {}, "old"))
+        self.assertEqual(cache.get(_key("b")), None)
+
+        stats = cache.stats()
+        self.assertEqual(stats["entries"], 1)
+        self.assertEqual(stats["size"], 4)
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+        self.assertAlmostEqual(stats["hit_ratio"], 1. / 3)
+
+    def test_eviction(self):
+        """Least recently used entries are evicted to stay within max_size"""
+        cache = ResponseCache(max_size = 10)
+        for api in ("a", "b", "c"):
+            cache.put(_key(api), cache.generation(api), 60, {}, "xxxx")
+        self.assertEqual(cache.get(_key("a")), None)
+        self.assertNotEqual(cache.get(_key("b")), None)
+        cache.put(_key("d"), cache.generation("d"), 60, {}, "xxxx")
+        self.assertEqual(cache.get(_key("c")), None)
+        self.assertNotEqual(cache.get(_key("b")), None)
+        self.assertEqual(cache.stats()["size"], 8)
+        self.assertFalse(cache.put(_key("e"), cache.generation("e"), 60, {}, "x" * 11))
+
+    def test_invalidate(self):
+        """Invalidation drops entries and responses computed meanwhile"""
+        cache = ResponseCache()
+        cache.put(_key("a", x = "1"), cache.generation("a"), 60, {}, "a1")
+        cache.put(_key("a", x = "2"), cache.generation("a"), 60, {}, "a2")
+        cache.put(_key("b"), cache.generation("b"), 60, {}, "b")
+
+        generation = cache.generation("a")
+        cache.invalidate("a")
+        self.assertEqual(cache.get(_key("a", x = "1")), None)
+        self.assertNotEqual(cache.get(_key("b")), None)
+        self.assertFalse(cache.put(_key("a", x = "1"), generation, 60, {}, "stale"))
+        self.assertTrue(cache.put(_key("a", x = "1"), cache.generation("a"), 60, {}, "new"))
+
+        generation = cache.generation("b")
+        cache.invalidate()
+        self.assertEqual(cache.stats()["entries"], 0)
+        self.assertEqual(cache.stats()["size"], 0)
+        self.assertFalse(cache.put(_key("b"), generation, 60, {}, "stale"))
+
+    @attr("performance")
+    def test_benchmark(self):
+        """Cache lookups are much cheaper than a response"""
+        cache = ResponseCache()
+        key = _key("a", x = "1")
+        cache.put(key, cache.generation("a"), 60, {}, "x" * 4096)
+        start = time.time()
+        for _ in xrange(10000):
+            ResponseCache.key("a", "/a", {"x": "1"}, "application/json", "", None)
+            cache.get(key)
+        elapsed = time.time() - start
+        print("\n10000 lookups: %.3f s, %s" % (elapsed, cache.stats()))
+        self.assertEqual(cache.stats()["hits"], 10000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,7 +12,10 @@ import os
 import time
 import tempfile
 import shutil
+import threading
 import nose
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
 from httplib import HTTPException
 from WMCore.DataStructs.Run import Run
 from WMCore.DataStructs.Mask import Mask
@@ -410,5 +413,123 @@ class TestRequests(unittest.TestCase):
         self.assertEqual(out[3], False)
         self.assertTrue('html' in out[0])
 
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """Answers every GET over a keep-alive connection and counts the connections"""
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def do_GET(self):
+        body = '{"path": "%s"}' % self.path
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class ThreadedServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadedServer(("127.0.0.1", 0), KeepAliveHandler)
+        self.server.connections = 0
+        self.url = "http://127.0.0.1:%i" % self.server.server_address[1]
+        self.thread = threading.Thread(target = self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        Requests.connectionPool.clear()
+
+    def tearDown(self):
+        Requests.connectionPool.clear()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def testSharedConnections(self):
+        """Requests objects for the same host reuse the same connection"""
+        before = Requests.connectionPool.statistics()
+        for i in range(10):
+            req = JSONRequests(self.url, {'cachepath' : None})
+            self.assertEqual(req.get('/test%i' % i)[0], {"path": "/test%i" % i})
+
+        after = Requests.connectionPool.statistics()
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(after["requests"] - before["requests"], 10)
+        self.assertEqual(after["handshakes"] - before["handshakes"], 1)
+        self.assertEqual(after["reused"] - before["reused"], 9)
+        self.assertEqual(after["idle"], 1)
+
+        req = JSONRequests(self.url, {'cachepath' : None, 'pool' : False})
+        req.get('/unpooled')
+        self.assertEqual(self.server.connections, 2)
+        self.assertEqual(Requests.connectionPool.statistics()["requests"], after["requests"])
+
+    def testSharedConnectionsDefaultCache(self):
+        """Requests objects with the default cache path share openers too"""
+        environ = dict(os.environ)
+        for var in ('REQUESTS_CACHE_DIR', 'WMCORE_CACHE_DIR'):
+            os.environ.pop(var, None)
+        try:
+            before = Requests.connectionPool.statistics()
+            paths = set()
+            for i in range(5):
+                req = JSONRequests(self.url)
+                paths.add(req['req_cache_path'])
+                self.assertEqual(req.get('/default%i' % i)[0], {"path": "/default%i" % i})
+            after = Requests.connectionPool.statistics()
+        finally:
+            os.environ.clear()
+            os.environ.update(environ)
+
+        self.assertEqual(len(paths), 1)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(after["handshakes"] - before["handshakes"], 1)
+        self.assertEqual(after["reused"] - before["reused"], 4)
+        self.assertEqual(after["idle"], 1)
+
+    def testConcurrentRequests(self):
+        """Each thread gets an opener of its own"""
+        errors = []
+        def worker(n):
+            try:
+                for i in range(20):
+                    req = JSONRequests(self.url, {'cachepath' : None})
+                    if req.get('/t%i/%i' % (n, i))[0] != {"path": "/t%i/%i" % (n, i)}:
+                        errors.append((n, i))
+            except Exception as ex:
+                errors.append(ex)
+        threads = [threading.Thread(target = worker, args = (n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertTrue(self.server.connections <= 4)
+        self.assertTrue(Requests.connectionPool.statistics()["idle"] <= 4)
+
+    def testIdleExpiry(self):
+        """Idle openers are closed after maxIdle seconds"""
+        pool = Requests.ConnectionPool(maxIdle = 0, maxIdlePerKey = 1)
+        pool.checkin("key", pool.checkout("key", lambda: DummyOpener()))
+        pool.checkin("key", DummyOpener())
+        self.assertEqual(pool.statistics()["idle"], 1)
+        time.sleep(0.01)
+        opener = pool.checkout("key", lambda: DummyOpener())
+        self.assertEqual(pool.statistics()["idle"], 0)
+        self.assertEqual(pool.statistics()["handshakes"], 2)
+        self.assertEqual(pool.statistics()["reused"], 0)
+
+class DummyOpener(object):
+    """Stands in for an httplib2.Http without connections"""
+    def __init__(self):
+        self.connections = {}
+
 if __name__ == "__main__":
     unittest.main()
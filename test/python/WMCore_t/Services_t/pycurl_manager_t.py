@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+_pycurl_manager_t_
+
+Unit tests for the pycurl_manager RequestHandler against a local HTTP server
+"""
+
+import json
+import threading
+import time
+import unittest
+import urlparse
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+
+from WMCore.Services.pycurl_manager import RequestHandler
+
+
+class StandInServer(ThreadingMixIn, HTTPServer):
+    """HTTP server answering every request in its own thread"""
+    daemon_threads = True
+
+    def __init__(self):
+        HTTPServer.__init__(self, ("127.0.0.1", 0), StandInHandler)
+        self.failures = {}
+        self.lock = threading.Lock()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Returns the block parameter as JSON after sleeping for the delay
+    parameter, fails the first requests of a block listed in fail.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        query = dict(urlparse.parse_qsl(urlparse.urlparse(self.path).query))
+        time.sleep(float(query.get("delay", 0)))
+
+        with self.server.lock:
+            failures = self.server.failures.get(query.get("block"), 0)
+            if failures:
+                self.server.failures[query["block"]] = failures - 1
+        if failures:
+            code, body = 503, "Service Unavailable"
+        elif query.get("block") == "missing":
+            code, body = 404, "Not Found"
+        else:
+            code, body = 200, json.dumps([{"name": query.get("block")}])
+
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class RequestHandlerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer()
+        self.url = "http://127.0.0.1:%i/blocks" % self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def testConcurrentRequests(self):
+        """Requests run at the same time and all results come back"""
+        parray = [{"block": "block%i" % i, "delay": "0.5"} for i in range(20)]
+        handler = RequestHandler(config={"multiconnections": 10})
+
+        start = time.time()
+        results = list(handler.multirequest(self.url, parray))
+        elapsed = time.time() - start
+
+        self.assertEqual(sorted([x["name"] for x in results]),
+                         sorted(["block%i" % i for i in range(20)]))
+        for item in results:
+            self.assertEqual(item["block"], item["name"])
+        # two rounds of ten requests, one at a time would take ten seconds
+        self.assertTrue(elapsed < 5, "20 requests took %.1fs" % elapsed)
+
+    def testResultsAsTheyComplete(self):
+        """Fast requests are not held back by slow ones"""
+        parray = [{"block": "slow", "delay": "1"}, {"block": "fast", "delay": "0"}]
+        handler = RequestHandler(config={"multiconnections": 2})
+        results = [x["name"] for x in handler.multirequest(self.url, parray)]
+        self.assertEqual(results, ["fast", "slow"])
+
+    def testRetries(self):
+        """Failed requests are retried and errors raised once retries run out"""
+        self.server.failures = {"flaky": 2}
+        handler = RequestHandler(config={"retries": 2})
+        results = list(handler.multirequest(self.url, [{"block": "flaky"}, {"block": "fine"}]))
+        self.assertEqual(sorted([x["name"] for x in results]), ["fine", "flaky"])
+
+        self.server.failures = {"flaky": 3}
+        self.assertRaises(Exception, list, handler.multirequest(self.url, [{"block": "flaky"}]))
+        self.assertRaises(Exception, list, handler.multirequest(self.url, [{"block": "missing"}]))
+
+    def testTimeout(self):
+        """Each request has its own timeout"""
+        handler = RequestHandler(config={"timeout": 1})
+        parray = [{"block": "slow", "delay": "3"}]
+        start = time.time()
+        self.assertRaises(Exception, list, handler.multirequest(self.url, parray))
+        self.assertTrue(time.time() - start < 3)
+        self.assertEqual(list(handler.multirequest(self.url, [])), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
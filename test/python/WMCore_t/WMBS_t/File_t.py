@@ -10,7 +10,7 @@ import logging
 import threading
 
 from WMCore.DAOFactory         import DAOFactory
-from WMCore.WMBS.File          import File, addFilesToWMBSInBulk
+from WMCore.WMBS.File          import File, addFilesToWMBSInBulk, loadFilesByID
 from WMCore.WMBS.Fileset       import Fileset
 from WMCore.WMBS.Workflow      import Workflow
 from WMCore.WMBS.Subscription  import Subscription
@@ -756,6 +756,66 @@ class FileTest(unittest.TestCase):
 
         return
 
+    def testLoadFilesByID(self):
+        """
+        _testLoadFilesByID_
+
+        Verify that the meta data and checksums of many files are loaded with
+        the bulk DAOs, also when the files don't fit in one IN clause.
+        """
+        fileIDs = []
+        for i in range(1200):
+            testFile = File(lfn = "/this/is/a/lfn%s" % i, size = 1024 + i,
+                            events = i, checksums = {'cksum': i, 'adler32': 'ad%s' % i})
+            testFile.create()
+            fileIDs.append(testFile["id"])
+
+        noChecksum = File(lfn = "/this/is/a/lfnNoChecksum", size = 10, events = 1,
+                          checksums = {})
+        noChecksum.create()
+        fileIDs.append(noChecksum["id"])
+
+        checksumAction = self.daofactory(classname = "Files.GetBulkChecksum")
+        checksums = checksumAction.execute(files = fileIDs)
+        self.assertEqual(len(checksums), 1200)
+        self.assertFalse(noChecksum["id"] in checksums)
+
+        files = loadFilesByID(self.daofactory, fileIDs)
+        self.assertEqual(len(files), 1201)
+        for i, fileID in enumerate(fileIDs[:-1]):
+            self.assertEqual(files[fileID]["lfn"], "/this/is/a/lfn%s" % i)
+            self.assertEqual(files[fileID]["size"], 1024 + i)
+            self.assertEqual(files[fileID]["events"], i)
+            self.assertEqual(files[fileID]["checksums"],
+                             {'cksum': str(i), 'adler32': 'ad%s' % i})
+        self.assertEqual(files[noChecksum["id"]]["checksums"], {})
+
+        files = loadFilesByID(self.daofactory, fileIDs[:3], loadChecksums = False,
+                              doingJobSplitting = True)
+        self.assertEqual(sorted(files.keys()), sorted(fileIDs[:3]))
+        self.assertEqual(files[fileIDs[0]]["checksums"], {})
+        self.assertEqual(files[fileIDs[0]]["minrun"], None)
+        self.assertEqual(files[fileIDs[0]]["locations"], set())
+        self.assertEqual(files[fileIDs[0]]["runs"], set())
+        self.assertEqual(loadFilesByID(self.daofactory, []), {})
+
+        testFile = File(lfn = "/this/is/a/lfnWithRuns", size = 10, events = 1,
+                        locations = set(["T1_US_FNAL_Disk", "T2_CH_CERN"]))
+        testFile.addRun(Run(1, *[45]))
+        testFile.addRun(Run(2, *[46, 47]))
+        testFile.create()
+
+        files = loadFilesByID(self.daofactory, [testFile["id"], fileIDs[0]],
+                              loadLocations = True, loadRunLumis = True)
+        self.assertEqual(files[testFile["id"]]["locations"],
+                         set(["T1_US_FNAL_Disk", "T2_CH_CERN"]))
+        self.assertEqual(sorted(files[testFile["id"]]["runs"]),
+                         [Run(1, *[45]), Run(2, *[46, 47])])
+        self.assertEqual(files[fileIDs[0]]["locations"], set())
+        self.assertEqual(files[fileIDs[0]]["runs"], set())
+
+        return
+
     def testBulkParentage(self):
         """
         _testBulkParentage_
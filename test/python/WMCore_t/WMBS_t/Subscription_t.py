@@ -1439,6 +1439,58 @@ class SubscriptionTest(unittest.TestCase):
 
         return
 
+    def testBulkCommitMany(self):
+        """
+        _testBulkCommitMany_
+
+        Commit more job groups and jobs than fit in one IN clause and verify
+        that every job group and job got its own id.
+        """
+        testWorkflow = Workflow(spec = "spec.xml", owner = "Simon",
+                                name = "wf001", task = "Test")
+        testWorkflow.create()
+
+        testFileset = Fileset(name = "TestFileset")
+        testFileset.create()
+        testFiles = []
+        for i in range(1200):
+            testFile = File(lfn = "/this/is/a/lfn%s" % i, size = 1024, events = 20,
+                            locations = set(["goodse.cern.ch"]))
+            testFile.addRun(Run(1, *[i]))
+            testFile.create()
+            testFileset.addFile(testFile)
+            testFiles.append(testFile)
+        testFileset.commit()
+
+        testSubscription = Subscription(fileset = testFileset,
+                                        workflow = testWorkflow)
+        testSubscription.create()
+
+        jobGroups = []
+        for i in range(600):
+            testJobGroup = JobGroup(subscription = testSubscription)
+            for testFile in testFiles[2 * i:2 * i + 2]:
+                testJob = Job(name = "TestJob-%s" % testFile["lfn"])
+                testJob.addFile(testFile)
+                testJobGroup.add(testJob)
+            jobGroups.append(testJobGroup)
+
+        testSubscription.bulkCommit(jobGroups = jobGroups)
+
+        jobIDs = set()
+        for testJobGroup in jobGroups:
+            self.assertEqual(testJobGroup.id, testJobGroup.exists())
+            for testJob in testJobGroup.jobs:
+                self.assertEqual(testJob["jobgroup"], testJobGroup.id)
+                self.assertEqual(testJob["id"], testJob.exists())
+                jobIDs.add(testJob["id"])
+        self.assertEqual(len(set([x.id for x in jobGroups])), 600)
+        self.assertEqual(len(jobIDs), 1200)
+
+        result = testSubscription.filesOfStatus(status = "Acquired")
+        self.assertEqual(len(result), 1200)
+        return
+
 
     def testFilesOfStatusByLimit(self):
         """
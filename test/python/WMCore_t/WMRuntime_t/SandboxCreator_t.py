@@ -87,6 +87,43 @@ class SandboxCreator_t(unittest.TestCase):
         shutil.rmtree( extractDir )
         shutil.rmtree( tempdir )
 
+    def testSandboxLayers(self):
+        """
+        The WMCore layer is built once and shared by the sandboxes, other
+        compressions give other archive names
+        """
+        tempdir  = tempfile.mkdtemp()
+        creator  = SandboxCreator.SandboxCreator(compression = 'gz', compressLevel = 1)
+        workload = TestWorkloads.twoTaskTree()
+        boxpath  = creator.makeSandbox(tempdir, workload)
+        self.assertTrue(boxpath.endswith('-Sandbox.tar.gz'))
+        self.assertFalse(creator.buildStats['layerReused'])
+        self.assertEqual(creator.buildStats['size'], os.path.getsize(boxpath))
+        layerPath = creator.buildStats['layer']
+        self.assertTrue(os.path.basename(layerPath).startswith('WMCore-%s' % creator.layerHash()))
+
+        # the sandbox is not rebuilt while it exists
+        self.assertEqual(creator.makeSandbox(tempdir, workload), boxpath)
+
+        workload = TestWorkloads.twoTaskTree()
+        workload.setName('OtherWorkload')
+        creator  = SandboxCreator.SandboxCreator(compression = '')
+        otherpath = creator.makeSandbox(tempdir, workload)
+        self.assertTrue(otherpath.endswith('OtherWorkload-Sandbox.tar'))
+        self.assertTrue(creator.buildStats['layerReused'])
+        self.assertEqual(creator.buildStats['layer'], layerPath)
+
+        for path in [boxpath, otherpath]:
+            tarHandle = tarfile.open(path, 'r')
+            names = tarHandle.getnames()
+            tarHandle.close()
+            self.assertTrue('WMCore.zip' in names)
+            self.assertTrue('WMSandbox/WMWorkload.pkl' in names)
+            self.assertTrue('PSetTweaks/__init__.py' in names)
+
+        self.assertRaises(ValueError, SandboxCreator.SandboxCreator, compression = 'xz')
+        shutil.rmtree( tempdir )
+
     def fileExistsTest(self,file,msg = None):
         if (msg == None):
             msg = "Failed file existence test for (%s)" % file
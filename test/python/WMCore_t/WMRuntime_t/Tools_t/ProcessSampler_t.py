@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+_ProcessSampler_t_
+
+Unit tests for the /proc based process sampler
+"""
+
+import os
+import subprocess
+import time
+import unittest
+
+from WMCore.WMRuntime.Tools.ProcessSampler import ProcessSampler, RingBuffer, processTree
+
+
+class ProcessSamplerTest(unittest.TestCase):
+
+    def setUp(self):
+        # a shell running a busy child process
+        script = "python -c 'x = [0] * 1000000\nwhile True: pass' & wait"
+        self.process = subprocess.Popen(["sh", "-c", script], preexec_fn = os.setsid)
+        time.sleep(1)
+
+    def tearDown(self):
+        os.killpg(self.process.pid, 9)
+        self.process.wait()
+
+    def testRingBuffer(self):
+        """Only the last values are kept, the summary covers all of them"""
+        buffer = RingBuffer(3)
+        self.assertEqual(buffer.summary(), (None, None, None))
+        for value in [5, 1, 9, 4, 2]:
+            buffer.append(value)
+        self.assertEqual(buffer.recent(), [9, 4, 2])
+        self.assertEqual(buffer.last(), 2)
+        self.assertEqual(buffer.summary(), (1, 9, 4.2))
+
+    def testProcessTree(self):
+        """The child processes are found"""
+        pids = processTree(self.process.pid)
+        self.assertEqual(pids[0], self.process.pid)
+        self.assertEqual(len(pids), 2)
+
+    def testSample(self):
+        """The memory and CPU of the whole tree are sampled"""
+        sampler = ProcessSampler(self.process.pid)
+        first = sampler.sample()
+        self.assertTrue(first['RSS'] > 4000)
+        self.assertTrue(first['VSize'] >= first['RSS'])
+        self.assertFalse('PCPU' in first)
+
+        time.sleep(0.5)
+        second = sampler.sample()
+        self.assertTrue(second['PCPU'] > 50)
+        self.assertEqual(sampler.summary('RSS')[0], min(first['RSS'], second['RSS']))
+
+        self.assertEqual(ProcessSampler(2 ** 22 + 1).sample(), None)
+
+    def testBackgroundSampling(self):
+        """Sub-second sampling in a thread"""
+        sampler = ProcessSampler(self.process.pid, bufferSize = 4)
+        sampler.start(0.1)
+        time.sleep(1)
+        sampler.stop()
+        self.assertTrue(sampler.buffers['RSS'].count > 5)
+        self.assertEqual(len(sampler.buffers['RSS'].recent()), 4)
+        self.assertTrue(sampler.summary('PCPU')[2] > 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,10 @@
-from WMCore.WMSpec.Persistency import PersistencyHelper
+from WMCore.WMSpec.Persistency import PersistencyHelper, SpecCache, specCache
+import os
+import shutil
+import tempfile
 import unittest
 from WMCore.WMSpec.WMStep import WMStep, makeWMStep
+from WMCore.WMSpec.WMWorkload import newWorkload, WMWorkloadHelper
 
 
 class PersistencyTest(unittest.TestCase):
@@ -19,6 +23,67 @@ class PersistencyTest(unittest.TestCase):
         self.assertEqual(dbname, 'mydb')
         self.assertEqual(doc, 'doc/spec')
 
+    def testSpecCache(self):
+        """Cached loads are reused until the file changes"""
+        tempDir = tempfile.mkdtemp()
+        try:
+            specPath = os.path.join(tempDir, "WMSandbox", "WMWorkload.pkl")
+            os.makedirs(os.path.dirname(specPath))
+            workload = newWorkload("SpecCacheTest")
+            workload.save(specPath)
+
+            specCache.clear()
+            before = specCache.statistics()
+            first = newWorkload("placeholder")
+            first.load(specPath, cache = True)
+            second = newWorkload("placeholder")
+            second.load(specPath, cache = True)
+            self.assertEqual(second.name(), "SpecCacheTest")
+            self.assertTrue(first.data is second.data)
+
+            uncached = newWorkload("placeholder")
+            uncached.load(specPath)
+            self.assertFalse(uncached.data is second.data)
+
+            # a new version of the file is loaded again
+            workload.setOwnerDetails("someone", "somegroup")
+            workload.save(specPath)
+            os.utime(specPath, (0, 0))
+            third = newWorkload("placeholder")
+            third.load(specPath, cache = True)
+            self.assertFalse(third.data is second.data)
+            self.assertEqual(third.getOwner()["name"], "someone")
+
+            after = specCache.statistics()
+            self.assertEqual(after["hits"] - before["hits"], 1)
+            self.assertEqual(after["misses"] - before["misses"], 2)
+            self.assertEqual(after["entries"], 1)
+        finally:
+            specCache.clear()
+            shutil.rmtree(tempDir)
+
+    def testSpecCacheEviction(self):
+        """Least recently used specs are dropped over the size limit"""
+        tempDir = tempfile.mkdtemp()
+        try:
+            cache = SpecCache(maxSize = 1)
+            paths = []
+            for name in ["a", "b"]:
+                path = os.path.join(tempDir, name)
+                newWorkload(name).save(path)
+                paths.append(path)
+
+            self.assertEqual(WMWorkloadHelper(cache.load(paths[0])).name(), "a")
+            self.assertEqual(WMWorkloadHelper(cache.load(paths[1])).name(), "b")
+            self.assertEqual(WMWorkloadHelper(cache.load(paths[1])).name(), "b")
+            stats = cache.statistics()
+            self.assertEqual(stats["entries"], 1)
+            self.assertEqual(stats["evictions"], 1)
+            self.assertEqual(stats["hits"], 1)
+            self.assertEqual(stats["size"], os.path.getsize(paths[1]))
+        finally:
+            shutil.rmtree(tempDir)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -6,9 +6,12 @@ Unittest for WMWorkload class
 """
 
 import os
+import time
 import unittest
 
-from WMCore.WMSpec.WMWorkload import WMWorkload, WMWorkloadHelper, WMWorkloadException
+from nose.plugins.attrib import attr
+
+from WMCore.WMSpec.WMWorkload import WMWorkload, WMWorkloadHelper, WMWorkloadException, parseTaskPath
 from WMCore.WMSpec.WMTask import WMTask, WMTaskHelper
 from WMCore.WMSpec.WMSpecErrors import WMSpecFactoryException
 import WMCore_t.WMSpec_t.TestWorkloads as TestSpecs
@@ -206,6 +209,78 @@ class WMWorkloadTest(unittest.TestCase):
         )
         # probably need to flesh this out a bit more
 
+    def testTaskIndex(self):
+        """task lookups follow changes to the task tree"""
+        workload = WMWorkloadHelper(WMWorkload("workload1"))
+        task1 = workload.newTask("task1")
+        subtask = task1.addTask("subtask1")
+
+        self.assertEqual(workload.getTaskByPath("/workload1/task1").name(), "task1")
+        self.assertEqual(workload.getTaskByPath("/workload1/task1/subtask1").name(), "subtask1")
+        self.assertEqual(workload.getTaskByName("subtask1").getPathName(), "/workload1/task1/subtask1")
+        self.assertEqual(workload.getTaskByPath("/workload1/task1/nothere"), None)
+        self.assertEqual(workload.getTaskByName("nothere"), None)
+        self.assertRaises(RuntimeError, workload.getTaskByPath, "/workload2/task1")
+        self.assertRaises(RuntimeError, workload.getTaskByPath, "/workload1/task2")
+
+        # tasks added and removed through the task helpers
+        subtask.addTask("subtask2")
+        self.assertEqual(workload.getTaskByPath("/workload1/task1/subtask1/subtask2").name(), "subtask2")
+        task1.deleteChild("subtask1")
+        self.assertEqual(workload.getTaskByPath("/workload1/task1/subtask1"), None)
+        self.assertEqual(workload.getTaskByName("subtask2"), None)
+
+        # tasks added and removed through the workload
+        workload.newTask("task2")
+        self.assertEqual(workload.getTaskByPath("/workload1/task2").name(), "task2")
+        workload.removeTask("task1")
+        self.assertRaises(RuntimeError, workload.getTaskByPath, "/workload1/task1")
+        self.assertEqual(workload.getTaskByName("task1"), None)
+
+        # path changes and replaced workload data
+        workload.getTask("task2").setPathName("/workload1/renamed")
+        self.assertEqual(workload.getTaskByName("task2").getPathName(), "/workload1/renamed")
+        workload.save(self.persistFile)
+        workload.load(self.persistFile)
+        self.assertEqual(workload.getTaskByName("task2").getPathName(), "/workload1/renamed")
+        self.assertEqual([x.name() for x in workload.getAllTasks()], ["task2"])
+        return
+
+    @attr("performance")
+    def testTaskLookupBenchmark(self):
+        """time task lookups on a 51 task chain"""
+        workload = WMWorkloadHelper(WMWorkload("BenchmarkChain"))
+        parent = workload.newTask("Task1")
+        allTasks = [parent]
+        for i in range(1, 18):
+            allTasks.append(parent.addTask("Task%iMerge" % i))
+            allTasks.append(parent.addTask("Task%iCleanup" % i))
+            if i < 17:
+                parent = allTasks[-2].addTask("Task%i" % (i + 1))
+                allTasks.append(parent)
+        pathNames = workload.listAllTaskPathNames()
+        self.assertEqual(len(pathNames), 51)
+        self.assertEqual(sorted(pathNames), sorted([x.getPathName() for x in allTasks]))
+
+        start = time.time()
+        for _ in range(20):
+            for pathName in pathNames:
+                topTask = workload.getTask(parseTaskPath(pathName)[1])
+                task = [x for x in topTask.taskIterator() if x.getPathName() == pathName][0]
+        walkTime = time.time() - start
+
+        start = time.time()
+        for _ in range(20):
+            for pathName in pathNames:
+                task = workload.getTaskByPath(pathName)
+                self.assertEqual(task.getPathName(), pathName)
+        indexTime = time.time() - start
+
+        print("\n%i lookups on a %i task chain: %.3fs walking the tree, %.3fs indexed" %
+              (20 * len(pathNames), len(pathNames), walkTime, indexTime))
+        self.assertEqual([x.getPathName() for x in workload.getAllTasks()], pathNames)
+        return
+
     def testD_Owner(self):
         """Test setOwner/getOwner function. """
 
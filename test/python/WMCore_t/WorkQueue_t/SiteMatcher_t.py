@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+"""
+    SiteMatcher unit tests and benchmark
+"""
+
+import random
+import time
+import unittest
+
+from nose.plugins.attrib import attr
+
+from WMCore.WorkQueue.DataStructs.WorkQueueElement import WorkQueueElement
+from WMCore.WorkQueue.SiteMatcher import SiteMatcher
+
+
+def syntheticElements(numElements, sites, seed=1234):
+    """
+    Elements with random priorities, site lists and data locations
+    """
+    rand = random.Random(seed)
+    blocks = [rand.sample(sites, rand.randint(1, 5)) for _ in range(200)]
+    elements = []
+    for i in range(numElements):
+        args = {'RequestName': 'request_%i' % (i % 100),
+                'Jobs': rand.randint(1, 100),
+                'Priority': rand.choice([1000, 10000, 100000, 200000]),
+                'CreationTime': i}
+        kind = i % 4
+        if kind == 0:
+            args['SiteWhitelist'] = rand.sample(sites, rand.randint(1, 20))
+        elif kind == 1:
+            args['SiteBlacklist'] = rand.sample(sites, rand.randint(1, 20))
+            args['Inputs'] = {'/a/b/RAW#%i' % i: rand.choice(blocks)}
+        elif kind == 2:
+            args['Inputs'] = {'/a/b/RAW#%i' % i: rand.choice(blocks)}
+            args['PileupData'] = {'/mb/c/GEN-SIM': rand.choice(blocks)}
+            args['NoInputUpdate'] = bool(i % 3)
+        else:
+            args['Inputs'] = {'/a/b/RAW#%i' % i: rand.choice(blocks)}
+            args['ParentFlag'] = True
+            args['ParentData'] = {'/a/b/GEN#%i' % i: rand.choice(blocks)}
+            args['NoLocationUpdate'] = bool(i % 2)
+        elements.append(WorkQueueElement(**args))
+
+    elements.sort(key=lambda x: x['CreationTime'])
+    elements.sort(key=lambda x: x['Priority'], reverse=True)
+    return elements
+
+
+def referenceMatch(elements, thresholds, siteJobCounts):
+    """
+    Site matching as availableWork used to do it, one site at a time
+    """
+    matched = []
+    for element in elements:
+        prio = element['Priority']
+        possibleSite = None
+        sites = thresholds.keys()
+        random.shuffle(sites)
+        for site in sites:
+            if element.passesSiteRestriction(site):
+                curJobCount = sum(map(lambda x: x[1] if x[0] >= prio else 0, siteJobCounts.get(site, {}).items()))
+                if curJobCount < thresholds[site]:
+                    possibleSite = site
+                    break
+        if possibleSite:
+            matched.append(element)
+            siteJobCounts.setdefault(possibleSite, {})
+            siteJobCounts[possibleSite][prio] = siteJobCounts[possibleSite].get(prio, 0) + \
+                                                element['Jobs'] * element.get('blowupFactor', 1.0)
+    return matched
+
+
+class SiteMatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sites = ['T2_XX_Site%i' % i for i in range(100)]
+
+    def testRestrictionMask(self):
+        """Restriction mask agrees with passesSiteRestriction"""
+        matcher = SiteMatcher(dict((site, 100) for site in self.sites), {})
+        for element in syntheticElements(400, self.sites):
+            mask = matcher.restrictionMask(element)
+            for site in self.sites:
+                self.assertEqual(bool(mask & matcher.siteMask([site])),
+                                 element.passesSiteRestriction(site))
+
+    def testMatchingAgreesWithReference(self):
+        """Same matches as the site by site algorithm when only one site is possible"""
+        elements = syntheticElements(2000, self.sites)
+        rand = random.Random(42)
+        for element in elements:
+            element['SiteWhitelist'] = [rand.choice(self.sites)]
+            element['NoLocationUpdate'] = True
+        thresholds = dict((site, rand.randint(0, 2000)) for site in self.sites)
+        thresholds['T2_XX_NotUsed'] = 100
+        initialCounts = {self.sites[0]: {100000: 500, 1000: 1000},
+                         self.sites[1]: {200000: 3000},
+                         'T2_XX_Unknown': {1000: 10}}
+
+        referenceCounts = dict((k, dict(v)) for k, v in initialCounts.items())
+        expected = referenceMatch(elements, thresholds, referenceCounts)
+
+        siteJobCounts = dict((k, dict(v)) for k, v in initialCounts.items())
+        matcher = SiteMatcher(thresholds, siteJobCounts)
+        matched = [x for x in elements if matcher.match(x)]
+
+        self.assertTrue(0 < len(matched) < len(elements))
+        self.assertEqual([x.id for x in matched], [x.id for x in expected])
+        self.assertEqual(siteJobCounts, referenceCounts)
+
+    def testThresholds(self):
+        """Higher priority jobs fill up sites, lower priority ones don't count"""
+        thresholds = {'T2_XX_SiteA': 100, 'T2_XX_SiteB': 0}
+        siteJobCounts = {'T2_XX_SiteA': {10: 70, 1: 1000}}
+        matcher = SiteMatcher(thresholds, siteJobCounts)
+        high = WorkQueueElement(RequestName='high', Jobs=40, Priority=20)
+        same = WorkQueueElement(RequestName='same', Jobs=40, Priority=10)
+        low = WorkQueueElement(RequestName='low', Jobs=40, Priority=1)
+        self.assertEqual(matcher.match(high), 'T2_XX_SiteA')
+        self.assertEqual(matcher.match(same), None)
+        self.assertEqual(matcher.match(low), None)
+        self.assertEqual(siteJobCounts, {'T2_XX_SiteA': {20: 40.0, 10: 70, 1: 1000}})
+
+        matcher = SiteMatcher(thresholds, {})
+        self.assertEqual(matcher.match(low), 'T2_XX_SiteA')
+        self.assertEqual(matcher.match(low), 'T2_XX_SiteA')
+        self.assertEqual(matcher.match(low), 'T2_XX_SiteA')
+        self.assertEqual(matcher.match(low), None)
+
+    @attr("performance")
+    def testBenchmark(self):
+        """Time the matching of many synthetic elements to many sites"""
+        sites = ['T2_XX_Site%i' % i for i in range(500)]
+        elements = syntheticElements(20000, sites)
+        thresholds = dict((site, 5000) for site in sites)
+
+        start = time.time()
+        matcher = SiteMatcher(thresholds, {})
+        matched = len([x for x in elements if matcher.match(x)])
+        matcherTime = time.time() - start
+
+        start = time.time()
+        referenceMatch(elements[:1000], thresholds, {})
+        referenceTime = time.time() - start
+
+        print("\nSiteMatcher: %i/%i elements matched to %i sites in %.2fs, "
+              "site by site matching of 1000 elements took %.2fs" %
+              (matched, len(elements), len(sites), matcherTime, referenceTime))
+        self.assertTrue(matched > 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
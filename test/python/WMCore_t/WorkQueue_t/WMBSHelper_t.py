@@ -697,6 +697,24 @@ class WMBSHelperTest(unittest.TestCase):
                          "Error: Wrong split algo.")
         return
 
+    def testSandboxOptions(self):
+        """
+        _testSandboxOptions_
+
+        Verify that the sandbox options reach the SandboxCreator
+        """
+        testWorkload = self.createTestWMSpec()
+        testTopLevelTask = getFirstTask(testWorkload)
+        testWMBSHelper = WMBSHelper(testWorkload, testTopLevelTask.name(), "SomeBlock",
+                                    cachepath = self.workDir,
+                                    sandboxOptions = {'compression': 'gz', 'compressLevel': 1})
+        testWMBSHelper.createSandbox()
+
+        sandbox = os.path.join(self.workDir, testWorkload.name(),
+                               "%s-Sandbox.tar.gz" % testWorkload.name())
+        self.assertTrue(os.path.exists(sandbox))
+        return
+
     def testTruncatedWFInsertion(self):
         """
         _testTruncatedWFInsertion_